@@ -0,0 +1,189 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Benchmark of decoders for response bodies of mAP groups API.
+
+Decodes synthetic SCIM list responses with every installed decoder
+and the streaming parser, and compares them with the standard `json`
+decoder, which is what `response.json()` did before decoders were pluggable.
+Peak memory is measured with `tracemalloc` and excludes the body itself.
+
+Run with `python benchmarks/decode_groups.py --help` for the options.
+For example, `-g 1 -m 100000` decodes a single group with a large member list.
+"""
+
+import json
+import timeit
+import tracemalloc
+
+import rich_click as click
+
+from rich.console import Console
+from rich.table import Table
+
+from weko_group_cache_db.decoder import (
+    DECODERS,
+    STREAM_CHUNK_SIZE,
+    GroupPage,
+    GroupPageDecoder,
+    get_decoder,
+    parse_group_page,
+)
+from weko_group_cache_db.exc import ConfigurationError
+
+
+def synthetic_response(groups: int, members: int) -> bytes:
+    """Build a SCIM list response of mAP groups API.
+
+    Arguments:
+        groups (int): Number of groups in `entry`.
+        members (int): Number of members of each group.
+
+    Returns:
+        bytes: The encoded response body.
+
+    """
+    prefix = "https://sample.gakunin.jp/api/groups/"
+    body = {
+        "schemas": ["urn:ietf:params:scim:api:messages:2.0:ListResponse"],
+        "totalResults": groups,
+        "itemsPerPage": groups,
+        "startIndex": 1,
+        "entry": [
+            {
+                "schemas": ["urn:ietf:params:scim:schemas:core:2.0:Group"],
+                "id": f"{prefix}jc_group{index}",
+                "displayName": f"Group {index}",
+                "meta": {
+                    "resourceType": "Group",
+                    "location": f"{prefix}jc_group{index}",
+                    "created": "2025-01-01T00:00:00Z",
+                    "lastModified": "2025-11-17T00:00:00Z",
+                },
+                "members": [
+                    {
+                        "value": f"user{member}@sample.ac.jp",
+                        "$ref": f"https://sample.gakunin.jp/api/users/user{member}",
+                        "display": f"User {member}",
+                    }
+                    for member in range(members)
+                ],
+            }
+            for index in range(groups)
+        ],
+    }
+    return json.dumps(body).encode()
+
+
+def stream_decoder(content: bytes) -> GroupPage:
+    """Parse a response body in chunks as `STREAM_RESPONSES` does.
+
+    Arguments:
+        content (bytes): Response body.
+
+    Returns:
+        GroupPage: Group IDs and pagination of the response.
+
+    """
+    view = memoryview(content)
+    return parse_group_page(
+        bytes(view[start : start + STREAM_CHUNK_SIZE])
+        for start in range(0, len(content), STREAM_CHUNK_SIZE)
+    )
+
+
+def measure(
+    decode: GroupPageDecoder, content: bytes, repeat: int
+) -> tuple[GroupPage, float, int]:
+    """Measure a decoder on a response body.
+
+    Arguments:
+        decode (GroupPageDecoder): The decoder.
+        content (bytes): Response body.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        tuple[GroupPage, float, int]:
+            The decoded page, the fastest time in seconds
+            and the peak memory in bytes.
+
+    """
+    tracemalloc.start()
+    try:
+        page = decode(content)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    elapsed = min(timeit.repeat(lambda: decode(content), number=1, repeat=repeat))
+    return page, elapsed, peak
+
+
+@click.command()
+@click.option(
+    "-g",
+    "--groups",
+    type=int,
+    multiple=True,
+    default=[100, 1000, 5000],
+    show_default=True,
+    help="Number of groups in a response. Can be repeated.",
+)
+@click.option(
+    "-m",
+    "--members",
+    type=int,
+    default=20,
+    show_default=True,
+    help="Number of members of each group.",
+)
+@click.option(
+    "-n",
+    "--repeat",
+    type=int,
+    default=5,
+    show_default=True,
+    help="Number of timed runs; the fastest one is reported.",
+)
+def main(groups: tuple[int, ...], members: int, repeat: int) -> None:
+    """Compare decoders of mAP groups API responses."""  # noqa: DOC501
+    decoders = {}
+    for name in DECODERS:
+        try:
+            decoders[name] = get_decoder(name)
+        except ConfigurationError:
+            click.echo(f"Skipping {name}: not installed.")
+    decoders["stream"] = stream_decoder
+
+    table = Table(title=f"Decoding responses with {members} members per group")
+    table.add_column("Groups", justify="right")
+    table.add_column("Size", justify="right")
+    table.add_column("Decoder")
+    table.add_column("Time", justify="right")
+    table.add_column("vs json", justify="right")
+    table.add_column("Peak memory", justify="right")
+
+    for count in groups:
+        content = synthetic_response(count, members)
+        results = {
+            name: measure(decode, content, repeat) for name, decode in decoders.items()
+        }
+        baseline, baseline_elapsed, _ = results["json"]
+        for name, (page, elapsed, peak) in results.items():
+            if page != baseline:
+                msg = f"{name} decoded different group IDs."
+                raise click.ClickException(msg)
+            table.add_row(
+                str(count),
+                f"{len(content) / 1_000_000:.1f} MB",
+                name,
+                f"{elapsed * 1000:.2f} ms",
+                f"{baseline_elapsed / elapsed:.1f}x",
+                f"{peak / 1_000_000:.1f} MB",
+            )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
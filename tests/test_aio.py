@@ -0,0 +1,601 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import asyncio
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import redis
+
+from weko_group_cache_db.aio import (
+    fetch_all,
+    fetch_all_async,
+    fetch_and_cache,
+    fetch_map_groups,
+    set_groups_to_redis,
+    touch_groups,
+)
+from weko_group_cache_db.breaker import setup_circuit_breaker
+from weko_group_cache_db.cache import WRITE_SCRIPT, CacheResult, Freshness, groups_digest
+from weko_group_cache_db.exc import CertificateError, CircuitOpenError, UpdateError
+from weko_group_cache_db.groups import MapGroups
+from weko_group_cache_db.loader import Institution
+
+AsyncClient = httpx.AsyncClient
+
+
+def test_fetch_all(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config()
+
+    with (
+        patch("weko_group_cache_db.aio.iter_institutions", return_value=institutions) as mock_load,
+        patch("weko_group_cache_db.aio.fetch_all_async", new_callable=AsyncMock) as mock_fetch_all_async,
+    ):
+        mock_fetch_all_async.return_value = {
+            institutions[0].fqdn: CacheResult(2, changed=True),
+            institutions[1].fqdn: CacheResult(3, changed=False),
+        }
+        fetch_all(toml_path="institutions.toml")
+
+    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_fetch_all_async.assert_awaited_once_with(ANY, stale_only=False)
+    assert list(mock_fetch_all_async.await_args_list[0].args[0]) == institutions
+    assert log_capture.records[-1].getMessage() == "Cached groups for 2 institution(s): 1 changed, 1 unchanged."
+
+
+def test_fetch_all_sharded(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(5)]
+    set_test_config(SHARD_COUNT=2, SHARD_INDEX=0)
+
+    with (
+        patch("weko_group_cache_db.aio.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.aio.fetch_all_async", new_callable=AsyncMock) as mock_fetch_all_async,
+    ):
+        mock_fetch_all_async.return_value = {}
+        fetch_all(toml_path="institutions.toml")
+
+    assert list(mock_fetch_all_async.await_args_list[0].args[0]) == [institutions[0], institutions[1], institutions[3]]
+
+
+def test_fetch_all_no_institutions(set_test_config, log_capture):
+    set_test_config()
+
+    with (
+        patch("weko_group_cache_db.aio.iter_institutions", return_value=[]),
+        patch("weko_group_cache_db.aio.fetch_all_async", new_callable=AsyncMock) as mock_fetch_all_async,
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    mock_fetch_all_async.assert_not_awaited()
+    assert log_capture.records[0].getMessage() == "No institutions found to fetch and cache groups for."
+
+
+def test_fetch_all_errors(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(1)]
+    set_test_config()
+    errors = [UpdateError(institutions[0].fqdn, origin=httpx.ConnectError("Request failed"))]
+
+    with (
+        patch("weko_group_cache_db.aio.iter_institutions", return_value=institutions),
+        patch(
+            "weko_group_cache_db.aio.fetch_all_async",
+            new_callable=AsyncMock,
+            return_value={error.fqdn: error for error in errors},
+        ),
+        pytest.raises(ExceptionGroup, match=r"Failed to update information from 1 institution\(s\)\.") as eg,
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    assert eg.value.exceptions == tuple(errors)
+
+
+def test_fetch_all_async(institutions_data, set_test_config, log_capture):
+    data = institutions_data(3)
+    institutions = [Institution(**item) for item in data]
+    test_config = set_test_config(FETCH_CONCURRENCY=2, REQUEST_RETRY_FACTOR=0)
+    results = {
+        data[0]["fqdn"]: CacheResult(2, changed=True),
+        data[1]["fqdn"]: httpx.ConnectError("Request failed"),
+        data[2]["fqdn"]: CacheResult(4, changed=False),
+    }
+
+    async def _retrieve(institution, _store):
+        await asyncio.sleep(0)
+        result = results[institution.fqdn]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    mock_store = AsyncMock()
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock, return_value=mock_store),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=_retrieve),
+    ):
+        outcomes = asyncio.run(fetch_all_async(institutions))
+
+    mock_store.aclose.assert_awaited_once()
+    assert list(outcomes) == [item["fqdn"] for item in data]
+    assert outcomes[data[0]["fqdn"]] == CacheResult(2, changed=True)
+    assert outcomes[data[2]["fqdn"]] == CacheResult(4, changed=False)
+    error = outcomes[data[1]["fqdn"]]
+    assert isinstance(error, UpdateError)
+    assert isinstance(error.origin, httpx.ConnectError)
+    messages = {record.getMessage() for record in log_capture.records}
+    assert f"Successfully cached 2 groups for {data[0]['fqdn']}." in messages
+    assert f"Successfully cached 4 groups for {data[2]['fqdn']}." in messages
+    assert (
+        f"Despite retries {test_config.REQUEST_RETRIES} times, failed to cache groups "
+        f"to Redis for institution: {data[1]['fqdn']}."
+    ) in messages
+
+
+def test_fetch_all_async_streams_institutions(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config()
+    started = []
+    started_before_loaded = []
+
+    def _load():
+        for institution in institutions:
+            started_before_loaded.append(list(started))
+            yield institution
+
+    async def _retrieve(institution, _store):
+        started.append(institution.fqdn)
+        await asyncio.sleep(0)
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=_retrieve),
+    ):
+        outcomes = asyncio.run(fetch_all_async(_load()))
+
+    assert list(outcomes) == [institution.fqdn for institution in institutions]
+    assert started_before_loaded == [[], [institutions[0].fqdn]]
+
+
+def test_fetch_all_async_certificate_error(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REQUEST_RETRIES=3)
+    error = CertificateError(institution.fqdn, "certificate and key do not match")
+    mock_retrieve = AsyncMock(side_effect=error)
+
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=mock_retrieve),
+    ):
+        outcomes = asyncio.run(fetch_all_async([institution]))
+
+    mock_retrieve.assert_awaited_once()
+    outcome = outcomes[institution.fqdn]
+    assert isinstance(outcome, UpdateError)
+    assert outcome.origin is error
+    assert str(error) in [record.getMessage() for record in log_capture.records]
+
+
+def test_fetch_all_async_circuit_open(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REQUEST_RETRIES=3)
+    error = CircuitOpenError("https://sample.gakunin.jp/api/groups/", 0)
+    mock_retrieve = AsyncMock(side_effect=error)
+
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=mock_retrieve),
+    ):
+        outcomes = asyncio.run(fetch_all_async([institution]))
+
+    mock_retrieve.assert_awaited_once()
+    outcome = outcomes[institution.fqdn]
+    assert isinstance(outcome, UpdateError)
+    assert outcome.origin is error
+    assert f"Skipped institution {institution.fqdn}: {error}" in [record.getMessage() for record in log_capture.records]
+
+
+def test_fetch_all_async_unexpected_error(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(REQUEST_RETRIES=3)
+    error = RuntimeError("Unexpected")
+
+    async def _retrieve(institution, _store):
+        await asyncio.sleep(0)
+        if institution is institutions[0]:
+            raise error
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.aio.keep_stale_async", new_callable=AsyncMock) as mock_keep_stale,
+    ):
+        outcomes = asyncio.run(fetch_all_async(institutions))
+
+    outcome = outcomes[institutions[0].fqdn]
+    assert isinstance(outcome, UpdateError)
+    assert outcome.origin is error
+    assert outcomes[institutions[1].fqdn] == CacheResult(1, changed=False)
+    assert mock_keep_stale.await_args_list[0].args[1] == [institutions[0].fqdn]
+    assert (f"Failed to cache groups for institution {institutions[0].fqdn} due to an unexpected error.") in [
+        record.getMessage() for record in log_capture.records
+    ]
+
+
+def test_fetch_all_async_keeps_stale_caches(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(REQUEST_RETRIES=0)
+    results = {
+        institutions[0].fqdn: CacheResult(1, changed=False),
+        institutions[1].fqdn: httpx.ConnectError("Request failed"),
+    }
+
+    async def _retrieve(institution, _store):
+        await asyncio.sleep(0)
+        result = results[institution.fqdn]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.aio.keep_stale_async", new_callable=AsyncMock) as mock_keep_stale,
+    ):
+        asyncio.run(fetch_all_async(institutions))
+
+    mock_keep_stale.assert_awaited_once()
+    assert mock_keep_stale.await_args_list[0].args[1] == [institutions[1].fqdn]
+
+
+def test_fetch_all_async_stale_only(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(STALE_AFTER=3600)
+    now = datetime.now(UTC)
+    freshness = [
+        Freshness(now - timedelta(seconds=7200), 80000),
+        Freshness(now, 80000),
+        Freshness(now - timedelta(seconds=9000), 80000),
+    ]
+    retrieve = AsyncMock(return_value=CacheResult(1, changed=False))
+
+    mock_store = AsyncMock()
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock, return_value=mock_store),
+        patch("weko_group_cache_db.aio.get_freshness", new_callable=AsyncMock, return_value=freshness),
+        patch("weko_group_cache_db.aio.fetch_and_cache", return_value=retrieve),
+    ):
+        outcomes = asyncio.run(fetch_all_async(institutions, stale_only=True))
+
+    assert list(outcomes) == [institutions[2].fqdn, institutions[0].fqdn]
+    mock_store.aclose.assert_awaited_once()
+
+
+def test_fetch_all_async_stale_only_none_stale(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config()
+    freshness = [Freshness(datetime.now(UTC), 80000)] * 2
+
+    mock_store = AsyncMock()
+    with (
+        patch("weko_group_cache_db.aio.async_connection", new_callable=AsyncMock, return_value=mock_store),
+        patch("weko_group_cache_db.aio.get_freshness", new_callable=AsyncMock, return_value=freshness),
+        patch("weko_group_cache_db.aio.fetch_and_cache") as mock_fetch_and_cache,
+    ):
+        outcomes = asyncio.run(fetch_all_async(institutions, stale_only=True))
+
+    assert outcomes == {}
+    mock_fetch_and_cache.assert_not_called()
+    mock_store.aclose.assert_awaited_once()
+
+
+def test_fetch_and_cache_success_after_retries(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REQUEST_RETRY_FACTOR=0, REQUEST_RETRIES=2)
+    groups = ["jc_group1", "jc_group2"]
+
+    mock_store = AsyncMock()
+    mock_store.hmget.return_value = [None, None]
+    with (
+        patch("weko_group_cache_db.aio.fetch_map_groups", new_callable=AsyncMock) as mock_fetch,
+        patch("weko_group_cache_db.aio.set_groups_to_redis", new_callable=AsyncMock) as mock_set,
+    ):
+        mock_fetch.side_effect = [httpx.ConnectError("Request failed"), MapGroups(groups, {}), MapGroups(groups, {})]
+        mock_set.side_effect = [redis.RedisError("Cache error"), True]
+
+        result = asyncio.run(fetch_and_cache()(institution, mock_store))
+
+    assert result == CacheResult(len(groups), changed=True)
+    assert mock_fetch.await_count == 3  # noqa: PLR2004
+    assert mock_set.await_count == 2  # noqa: PLR2004
+    mock_set.assert_awaited_with(institution.fqdn, groups, validators={}, store=mock_store)
+    messages = [record.getMessage() for record in log_capture.records]
+    assert f"Failed to fetch groups from mAP API for institution: {institution.fqdn}" in messages
+    assert f"Failed to cache groups to Redis for institution: {institution.fqdn}" in messages
+
+
+def test_fetch_and_cache_all_request_exception(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    test_config = set_test_config(REQUEST_RETRY_FACTOR=0, REQUEST_RETRIES=2)
+
+    with (
+        patch("weko_group_cache_db.aio.fetch_map_groups", new_callable=AsyncMock) as mock_fetch,
+        patch("weko_group_cache_db.aio.set_groups_to_redis", new_callable=AsyncMock) as mock_set,
+    ):
+        mock_fetch.side_effect = httpx.ConnectError("Request failed")
+
+        with pytest.raises(httpx.ConnectError, match=r"Request failed"):
+            asyncio.run(fetch_and_cache()(institution, AsyncMock(hmget=AsyncMock(return_value=[None, None]))))
+
+    assert mock_fetch.await_count == test_config.REQUEST_RETRIES + 1
+    mock_set.assert_not_awaited()
+
+
+def test_fetch_and_cache_certificate_error(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    error = CertificateError(institution.fqdn, "certificate and key do not match")
+
+    with (
+        patch("weko_group_cache_db.aio.check_certificate", side_effect=error) as mock_check,
+        patch("weko_group_cache_db.aio.fetch_map_groups", new_callable=AsyncMock) as mock_fetch,
+        pytest.raises(CertificateError),
+    ):
+        asyncio.run(fetch_and_cache()(institution, AsyncMock()))
+
+    mock_check.assert_called_once_with(institution)
+    mock_fetch.assert_not_awaited()
+
+
+def test_fetch_and_cache_not_modified(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(CACHE_KEY_SUFFIX="_suffix")
+
+    mock_store = AsyncMock()
+    mock_store.hmget.return_value = [b'"v1"', None]
+    with (
+        patch("weko_group_cache_db.aio.fetch_map_groups", new_callable=AsyncMock) as mock_fetch,
+        patch("weko_group_cache_db.aio.touch_groups", new_callable=AsyncMock, side_effect=[-1]) as mock_touch,
+        patch("weko_group_cache_db.aio.set_groups_to_redis", new_callable=AsyncMock) as mock_set,
+    ):
+        mock_fetch.side_effect = [MapGroups(None, {"etag": '"v1"'}), MapGroups(["jc_group1"], {"etag": '"v2"'})]
+
+        mock_set.return_value = False
+        result = asyncio.run(fetch_and_cache()(institution, mock_store))
+
+    assert result == CacheResult(1, changed=False)
+    assert mock_fetch.await_args_list[0].args == (institution, {"etag": '"v1"'})
+    assert mock_fetch.await_args_list[1].args == (institution,)
+    mock_touch.assert_awaited_once_with(institution.fqdn, store=mock_store)
+    mock_set.assert_awaited_once_with(institution.fqdn, ["jc_group1"], validators={"etag": '"v2"'}, store=mock_store)
+
+
+def test_fetch_map_groups(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    body = {
+        "totalResults": 2,
+        "entry": [
+            {"id": "https://sample.gakunin.jp/api/groups/jc_group1", "title": "Group 1"},
+            {"id": "jc_group2", "title": "Group 2"},
+        ],
+    }
+    requests_sent: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests_sent.append(request)
+        return httpx.Response(200, json=body, headers={"ETag": '"v1"'})
+
+    transport = httpx.MockTransport(_handler)
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context") as mock_load_ssl_context,
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **kwargs: AsyncClient(transport=transport, timeout=kwargs["timeout"]),
+        ) as mock_client,
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        result = asyncio.run(fetch_map_groups(institution))
+
+    assert result == MapGroups(["jc_group1", "jc_group2"], {"etag": '"v1"'})
+    mock_load_ssl_context.assert_called_with(institution.client_cert_path, institution.client_key_path)
+    mock_client.assert_called_once_with(
+        verify=mock_load_ssl_context.return_value, timeout=20, limits=httpx.Limits(max_connections=1)
+    )
+    mock_rate_limiter.acquire_async.assert_awaited_once_with()
+    assert str(requests_sent[0].url) == f"https://sample.gakunin.jp/api/groups/{institution.sp_connector_id}"
+
+
+def test_fetch_map_groups_stream(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(STREAM_RESPONSES=True)
+    content = b'{"totalResults": 2, "entry": [{"id": "jc_group1"}, {"id": "jc_group2"}]}'
+
+    class _Chunks(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for start in range(0, len(content), 16):
+                yield content[start : start + 16]
+
+    transport = httpx.MockTransport(lambda _request: httpx.Response(200, stream=_Chunks()))
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **_kwargs: AsyncClient(transport=transport),
+        ),
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+        patch("weko_group_cache_db.aio.decode_group_page") as mock_decode,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        result = asyncio.run(fetch_map_groups(institution))
+
+    assert result == MapGroups(["jc_group1", "jc_group2"], {})
+    mock_decode.assert_not_called()
+
+
+def test_fetch_map_groups_paginated(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(PAGE_SIZE=2, PAGE_CONCURRENCY=2, FETCH_CONCURRENCY=3)
+    requests_sent: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests_sent.append(request)
+        start = int(request.url.params["startIndex"])
+        count = int(request.url.params["count"])
+        body = {
+            "totalResults": 5,
+            "startIndex": start,
+            "itemsPerPage": count,
+            "entry": [{"id": f"jc_group{index}"} for index in range(start, min(start + count, 6))],
+        }
+        return httpx.Response(200, json=body, headers={"ETag": f'"p{start}"'})
+
+    transport = httpx.MockTransport(_handler)
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **kwargs: AsyncClient(transport=transport, limits=kwargs["limits"]),
+        ) as mock_client,
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        result = asyncio.run(fetch_map_groups(institution, {"etag": '"v1"'}))
+
+    assert result == MapGroups([f"jc_group{index}" for index in range(1, 6)], {})
+    assert mock_client.call_args.kwargs["limits"] == httpx.Limits(max_connections=6)
+    assert mock_rate_limiter.acquire_async.await_count == len(requests_sent)
+    assert sorted(request.url.params["startIndex"] for request in requests_sent) == ["1", "3", "5"]
+    assert requests_sent[0].headers["If-None-Match"] == '"v1"'
+    assert all("If-None-Match" not in request.headers for request in requests_sent[1:])
+
+
+def test_fetch_map_groups_not_modified(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    requests_sent: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests_sent.append(request)
+        return httpx.Response(304)
+
+    transport = httpx.MockTransport(_handler)
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **_kwargs: AsyncClient(transport=transport),
+        ),
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        result = asyncio.run(fetch_map_groups(institution, {"etag": '"v1"'}))
+
+    assert result == MapGroups(None, {"etag": '"v1"'})
+    assert requests_sent[0].headers["If-None-Match"] == '"v1"'
+
+
+def test_fetch_map_groups_http_error(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+
+    transport = httpx.MockTransport(lambda _request: httpx.Response(503))
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **_kwargs: AsyncClient(transport=transport),
+        ),
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(fetch_map_groups(institution))
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_fetch_map_groups_invalid_json(institutions_data, set_test_config, stream):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(STREAM_RESPONSES=stream)
+
+    transport = httpx.MockTransport(lambda _request: httpx.Response(200, content=b"<html>Maintenance</html>"))
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **_kwargs: AsyncClient(transport=transport),
+        ),
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        with pytest.raises(httpx.DecodingError):
+            asyncio.run(fetch_map_groups(institution))
+
+
+def test_fetch_map_groups_circuit_open(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(CIRCUIT_BREAKER_THRESHOLD=1)
+    breaker = setup_circuit_breaker()
+    requests_sent: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests_sent.append(request)
+        return httpx.Response(503)
+
+    transport = httpx.MockTransport(_handler)
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch(
+            "weko_group_cache_db.aio.httpx.AsyncClient",
+            side_effect=lambda **_kwargs: AsyncClient(transport=transport),
+        ),
+        patch("weko_group_cache_db.aio.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_rate_limiter.acquire_async = AsyncMock()
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(fetch_map_groups(institution))
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(fetch_map_groups(institution))
+
+    assert breaker.state == "open"
+    assert len(requests_sent) == 1
+
+
+def test_set_groups_to_redis(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=100)
+    timestamp = datetime.now(UTC).isoformat(timespec="seconds")
+    groups = ["jc_group1", "jc_group2"]
+
+    mock_store = MagicMock()
+    mock_pipe = MagicMock(execute=AsyncMock(return_value=[0]))
+    mock_store.pipeline.return_value.__aenter__.return_value = mock_pipe
+    with patch("weko_group_cache_db.cache.datetime") as mock_datetime:
+        mock_datetime.now.return_value.isoformat.return_value = timestamp
+        changed = asyncio.run(
+            set_groups_to_redis("example-1.ac.jp", groups, validators={"etag": '"v1"'}, store=mock_store)
+        )
+
+    assert changed is False
+    mock_store.pipeline.assert_called_once_with(transaction=True)
+    mock_pipe.eval.assert_called_once_with(
+        WRITE_SCRIPT, 1, "example_1_ac_jp_suffix", timestamp, 100, groups_digest(groups), ",".join(groups), '"v1"', ""
+    )
+    mock_pipe.execute.assert_awaited_once_with()
+
+
+def test_touch_groups(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=100)
+
+    mock_store = MagicMock()
+    mock_pipe = MagicMock(execute=AsyncMock(return_value=[2]))
+    mock_store.pipeline.return_value.__aenter__.return_value = mock_pipe
+    count = asyncio.run(touch_groups("example-1.ac.jp", store=mock_store))
+
+    assert count == 2  # noqa: PLR2004
+    mock_store.pipeline.assert_called_once_with(transaction=False)
+    assert mock_pipe.eval.call_args[0][1:3] == (1, "example_1_ac_jp_suffix")
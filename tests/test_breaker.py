@@ -0,0 +1,198 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import asyncio
+import ssl
+
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+import requests
+
+from weko_group_cache_db.breaker import (
+    CircuitBreaker,
+    _current_circuit_breaker,
+    circuit_breaker,
+    is_endpoint_failure,
+    setup_circuit_breaker,
+)
+from weko_group_cache_db.exc import CircuitOpenError
+
+ENDPOINT = "https://sample.gakunin.jp/api/groups/"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail(breaker, error=None):
+    with pytest.raises(requests.ConnectionError), breaker.guard():
+        raise error or requests.ConnectionError
+
+
+def test_circuit_breaker_opens_after_consecutive_failures(log_capture):
+    clock = FakeClock()
+    breaker = CircuitBreaker(ENDPOINT, 3, 60, clock=clock)
+
+    _fail(breaker)
+    _fail(breaker)
+    with breaker.guard():
+        pass
+    _fail(breaker)
+    _fail(breaker)
+    assert breaker.state == "closed"
+
+    _fail(breaker)
+    assert breaker.state == "open"
+    assert log_capture.records[-1].getMessage() == f"Circuit breaker of {ENDPOINT} opened after 3 consecutive failures."
+
+    clock.now = 59.5
+    with pytest.raises(CircuitOpenError, match=r"is open for 0\.5 more seconds\.") as exc_info, breaker.guard():
+        pytest.fail("The request must not be sent.")
+    assert exc_info.value.endpoint == ENDPOINT
+    assert exc_info.value.retry_after == pytest.approx(0.5)
+
+
+def test_circuit_breaker_half_open_probe_succeeds(log_capture):
+    clock = FakeClock()
+    breaker = CircuitBreaker(ENDPOINT, 1, 60, clock=clock)
+    _fail(breaker)
+
+    clock.now = 60
+    assert breaker.state == "half-open"
+    with breaker.guard(), pytest.raises(CircuitOpenError, match="is probing whether it recovered"), breaker.guard():
+        pass
+
+    assert breaker.state == "closed"
+    assert log_capture.records[-1].getMessage() == f"Circuit breaker of {ENDPOINT} closed."
+    with breaker.guard():
+        pass
+
+
+def test_circuit_breaker_half_open_probe_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ENDPOINT, 2, 60, clock=clock)
+    _fail(breaker)
+    _fail(breaker)
+
+    clock.now = 100
+    _fail(breaker)
+
+    assert breaker.state == "open"
+    clock.now = 159
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    clock.now = 160
+    assert breaker.before_request() is True
+
+
+def test_circuit_breaker_cancelled_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ENDPOINT, 1, 60, clock=clock)
+    _fail(breaker)
+    clock.now = 60
+
+    with pytest.raises(KeyboardInterrupt), breaker.guard():
+        raise KeyboardInterrupt
+
+    assert breaker.state == "half-open"
+    assert breaker.before_request() is True
+
+
+def test_circuit_breaker_other_errors_are_successes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ENDPOINT, 1, 60, clock=clock)
+    _fail(breaker)
+    clock.now = 60
+
+    with pytest.raises(requests.exceptions.InvalidJSONError), breaker.guard():
+        raise requests.exceptions.InvalidJSONError
+
+    assert breaker.state == "closed"
+
+
+def test_circuit_breaker_disabled():
+    breaker = CircuitBreaker(ENDPOINT, 0, 60)
+
+    for _ in range(10):
+        _fail(breaker)
+
+    assert breaker.state == "closed"
+
+
+def test_circuit_breaker_guard_async():
+    clock = FakeClock()
+    breaker = CircuitBreaker(ENDPOINT, 1, 60, clock=clock)
+
+    async def _request():
+        with breaker.guard():
+            await asyncio.sleep(0)
+            error_message = "Connection refused"
+            raise httpx.ConnectError(error_message)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(_request())
+    assert breaker.state == "open"
+
+
+def _response(status_code):
+    return MagicMock(status_code=status_code)
+
+
+def _ssl_connect_error():
+    error = httpx.ConnectError("tlsv13 alert certificate required")
+    error.__cause__ = ssl.SSLError("tlsv13 alert certificate required")
+    return error
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (requests.ConnectionError(), True),
+        (requests.exceptions.ConnectTimeout(), True),
+        (requests.exceptions.ReadTimeout(), True),
+        (requests.HTTPError(response=_response(503)), True),
+        (requests.HTTPError(response=_response(500)), True),
+        (requests.HTTPError(response=_response(404)), False),
+        (requests.HTTPError(response=_response(429)), False),
+        (requests.HTTPError(), False),
+        (requests.exceptions.SSLError(), False),
+        (requests.exceptions.InvalidJSONError(), False),
+        (httpx.ConnectError("refused"), True),
+        (httpx.ReadTimeout("timed out"), True),
+        (httpx.HTTPStatusError("502", request=MagicMock(), response=_response(502)), True),
+        (httpx.HTTPStatusError("403", request=MagicMock(), response=_response(403)), False),
+        (_ssl_connect_error(), False),
+        (ssl.SSLError(), False),
+        (ValueError(), False),
+    ],
+)
+def test_is_endpoint_failure(error, expected):
+    assert is_endpoint_failure(error) is expected
+
+
+def test_setup_circuit_breaker(set_test_config):
+    set_test_config(CIRCUIT_BREAKER_THRESHOLD=4, CIRCUIT_BREAKER_RESET_TIMEOUT=30)
+
+    breaker = setup_circuit_breaker()
+
+    assert breaker.endpoint == ENDPOINT
+    assert breaker.threshold == 4  # noqa: PLR2004
+    assert breaker.reset_timeout == 30  # noqa: PLR2004
+    assert _current_circuit_breaker.get() is breaker
+
+
+def test_circuit_breaker_proxy(set_test_config):
+    set_test_config(CIRCUIT_BREAKER_THRESHOLD=7)
+    breaker = setup_circuit_breaker()
+
+    assert circuit_breaker.threshold == breaker.threshold
+    _current_circuit_breaker.set(None)  # pyright: ignore[reportArgumentType]
+    assert circuit_breaker.threshold == breaker.threshold
+    assert _current_circuit_breaker.get() is not breaker
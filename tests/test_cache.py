@@ -0,0 +1,413 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import asyncio
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+import pytest
+import redis
+
+from weko_group_cache_db.cache import (
+    EXTEND_SCRIPT,
+    TOUCH_SCRIPT,
+    WRITE_SCRIPT,
+    CacheResult,
+    Freshness,
+    WriteBuffer,
+    cache_key,
+    cache_ttl,
+    extend_caches,
+    get_all_validators,
+    get_freshness,
+    get_validators,
+    groups_digest,
+    keep_stale,
+    keep_stale_async,
+    parse_freshness,
+    parse_validators,
+    queue_extend,
+    queue_freshness,
+    queue_groups,
+    queue_touch,
+)
+from weko_group_cache_db.exc import CacheExpiredError
+
+
+def test_cache_key(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix")
+
+    assert cache_key("sample-1.repo.nii.ac.jp") == "sample_1_repo_nii_ac_jp_suffix"
+
+
+def test_cache_ttl(set_test_config):
+    set_test_config(CACHE_TTL=1000, CACHE_TTL_SPREAD=100)
+    fqdns = [f"example{i}.ac.jp" for i in range(50)]
+
+    ttls = [cache_ttl(fqdn) for fqdn in fqdns]
+
+    assert all(1000 <= ttl <= 1100 for ttl in ttls)  # noqa: PLR2004
+    assert len(set(ttls)) > 1
+    assert ttls == [cache_ttl(fqdn) for fqdn in fqdns]
+
+
+@pytest.mark.parametrize(("ttl", "spread"), [(1000, 0), (1000, -1), (-1, 100)])
+def test_cache_ttl_without_spread(set_test_config, ttl, spread):
+    set_test_config(CACHE_TTL=ttl, CACHE_TTL_SPREAD=spread)
+
+    assert cache_ttl("example.ac.jp") == ttl
+
+
+def test_queue_groups(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=100)
+    mock_pipe = MagicMock()
+
+    with patch("weko_group_cache_db.cache.datetime") as mock_datetime:
+        mock_datetime.now.return_value.isoformat.return_value = "2025-01-01T00:00:00+00:00"
+        count = queue_groups(mock_pipe, "example.ac.jp", ["jc_group1", "jc_group2"], {"etag": '"v1"'})
+
+    assert count == len(mock_pipe.method_calls)
+    mock_pipe.eval.assert_called_once_with(
+        WRITE_SCRIPT,
+        1,
+        "example_ac_jp_suffix",
+        "2025-01-01T00:00:00+00:00",
+        100,
+        groups_digest(["jc_group1", "jc_group2"]),
+        "jc_group1,jc_group2",
+        '"v1"',
+        "",
+    )
+
+
+def test_queue_groups_spread_ttl(set_test_config):
+    set_test_config(CACHE_TTL=100, CACHE_TTL_SPREAD=50)
+    mock_pipe = MagicMock()
+
+    queue_groups(mock_pipe, "example.ac.jp", ["jc_group1"])
+
+    assert mock_pipe.eval.call_args.args[4] == cache_ttl("example.ac.jp")
+
+
+def test_groups_digest():
+    digest = groups_digest(["jc_group1", "jc_group2"])
+
+    assert digest == groups_digest(["jc_group2", "jc_group1"])
+    assert digest != groups_digest(["jc_group1"])
+
+
+@pytest.mark.parametrize("ttl", [100, -1])
+def test_queue_touch(set_test_config, ttl):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=ttl)
+    mock_pipe = MagicMock()
+
+    with patch("weko_group_cache_db.cache.datetime") as mock_datetime:
+        mock_datetime.now.return_value.isoformat.return_value = "2025-01-01T00:00:00+00:00"
+        count = queue_touch(mock_pipe, "example.ac.jp")
+
+    assert count == len(mock_pipe.method_calls)
+    mock_pipe.eval.assert_called_once_with(TOUCH_SCRIPT, 1, "example_ac_jp_suffix", "2025-01-01T00:00:00+00:00", ttl)
+
+
+@pytest.mark.parametrize(
+    ("ttl", "stale_after", "updated_before"),
+    [(100, None, ""), (-1, None, ""), (100, 3600, "2024-12-31T23:00:00+00:00")],
+)
+def test_queue_extend(set_test_config, ttl, stale_after, updated_before):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=ttl)
+    mock_pipe = MagicMock()
+
+    with patch("weko_group_cache_db.cache.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime(2025, 1, 1, tzinfo=UTC)
+        count = queue_extend(mock_pipe, "example.ac.jp", stale_after=stale_after)
+
+    assert count == len(mock_pipe.method_calls)
+    mock_pipe.eval.assert_called_once_with(
+        EXTEND_SCRIPT, 1, "example_ac_jp_suffix", "2025-01-01T00:00:00+00:00", ttl, updated_before
+    )
+
+
+def test_extend_caches(set_test_config):
+    set_test_config()
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1, 0, 1]
+
+    extended = extend_caches(mock_store, ["example1.ac.jp", "example2.ac.jp", "example3.ac.jp"])
+
+    mock_store.pipeline.assert_called_once_with(transaction=False)
+    assert mock_pipe.eval.call_count == 3  # noqa: PLR2004
+    assert extended == ["example1.ac.jp", "example3.ac.jp"]
+
+
+def test_keep_stale_marks_every_cache(set_test_config, log_capture):
+    set_test_config(STALE_WHILE_REVALIDATE=True)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1, 1]
+
+    keep_stale(mock_store, ["example1.ac.jp", "example2.ac.jp"])
+
+    # failed institutions are marked stale however recently they were updated
+    assert [args.args[-1] for args in mock_pipe.eval.call_args_list] == ["", ""]
+    assert log_capture.records[-1].getMessage() == "Kept stale group caches of 2 of 2 failed institution(s)."
+
+
+@pytest.mark.parametrize(("enabled", "fqdns"), [(False, ["example1.ac.jp"]), (True, [])])
+def test_keep_stale_skipped(set_test_config, enabled, fqdns):
+    set_test_config(STALE_WHILE_REVALIDATE=enabled)
+
+    with patch("weko_group_cache_db.cache.extend_caches") as mock_extend:
+        keep_stale(MagicMock(), fqdns)
+
+    mock_extend.assert_not_called()
+
+
+def test_keep_stale_redis_error(set_test_config, log_capture):
+    set_test_config(STALE_WHILE_REVALIDATE=True)
+
+    with (
+        patch("weko_group_cache_db.cache.extend_caches", side_effect=redis.ConnectionError("Redis down")),
+        patch("weko_group_cache_db.cache.traceback.print_exc"),
+    ):
+        keep_stale(MagicMock(), ["example1.ac.jp"])
+
+    assert log_capture.records[0].getMessage() == "Failed to extend group caches of failed institutions."
+
+
+def test_keep_stale_async(set_test_config, log_capture):
+    set_test_config(STALE_WHILE_REVALIDATE=True)
+    mock_store = MagicMock()
+    mock_pipe = MagicMock(execute=AsyncMock(return_value=[1, 0]))
+    mock_store.pipeline.return_value.__aenter__.return_value = mock_pipe
+
+    asyncio.run(keep_stale_async(mock_store, ["example1.ac.jp", "example2.ac.jp"]))
+
+    mock_store.pipeline.assert_called_once_with(transaction=False)
+    assert mock_pipe.eval.call_count == 2  # noqa: PLR2004
+    assert log_capture.records[0].getMessage() == "Kept stale group caches of 1 of 2 failed institution(s)."
+
+
+def test_keep_stale_async_disabled(set_test_config):
+    set_test_config()
+    mock_store = MagicMock()
+
+    asyncio.run(keep_stale_async(mock_store, ["example1.ac.jp"]))
+
+    mock_store.pipeline.assert_not_called()
+
+
+def test_parse_validators():
+    assert parse_validators([b'"v1"', None]) == {"etag": '"v1"'}
+    assert parse_validators([b"", b"Mon, 17 Nov 2025 00:00:00 GMT"]) == {
+        "last_modified": "Mon, 17 Nov 2025 00:00:00 GMT"
+    }
+    assert parse_validators(('"v1"', "")) == {"etag": '"v1"'}
+
+
+def test_get_validators(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix")
+    mock_store = MagicMock()
+    mock_store.hmget.return_value = [b'"v1"', None]
+
+    assert get_validators(mock_store, "example.ac.jp") == {"etag": '"v1"'}
+    mock_store.hmget.assert_called_once_with("example_ac_jp_suffix", ("etag", "last_modified"))
+
+
+def test_get_all_validators(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix")
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [[b'"v1"', None], [None, None]]
+
+    assert get_all_validators(mock_store, ["example1.ac.jp", "example2.ac.jp"]) == [{"etag": '"v1"'}, {}]
+    mock_store.pipeline.assert_called_once_with(transaction=False)
+    assert mock_pipe.hmget.call_args_list == [
+        call("example1_ac_jp_suffix", ("etag", "last_modified")),
+        call("example2_ac_jp_suffix", ("etag", "last_modified")),
+    ]
+
+
+def test_queue_freshness(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix")
+    mock_pipe = MagicMock()
+
+    count = queue_freshness(mock_pipe, "example.ac.jp")
+
+    assert count == len(mock_pipe.method_calls)
+    assert mock_pipe.method_calls == [
+        call.hget("example_ac_jp_suffix", "updated_at"),
+        call.ttl("example_ac_jp_suffix"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("updated_at", "expected"),
+    [
+        (b"2025-01-01T00:00:00+00:00", datetime(2025, 1, 1, tzinfo=UTC)),
+        (b"2025-01-01T09:00:00+09:00", datetime(2025, 1, 1, tzinfo=UTC)),
+        (b"2025-01-01T00:00:00", datetime(2025, 1, 1, tzinfo=UTC)),
+        (b"invalid", None),
+        (None, None),
+    ],
+)
+def test_parse_freshness(updated_at, expected):
+    assert parse_freshness(updated_at, 100) == Freshness(expected, 100)
+
+
+def test_get_freshness(set_test_config):
+    set_test_config()
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [b"2025-01-01T00:00:00+00:00", 100, None, -2]
+
+    freshness = get_freshness(mock_store, ["example1.ac.jp", "example2.ac.jp"])
+
+    mock_store.pipeline.assert_called_once_with(transaction=False)
+    mock_pipe.execute.assert_called_once_with()
+    assert freshness == [Freshness(datetime(2025, 1, 1, tzinfo=UTC), 100), Freshness(None, -2)]
+
+
+@pytest.mark.parametrize(
+    ("age", "ttl", "expected"),
+    [
+        (None, -2, True),
+        (0, -2, True),
+        (0, 80000, False),
+        (0, -1, False),
+        (3599, 80000, False),
+        (3600, 80000, True),
+        (3600, -1, True),
+        (0, 600, True),
+        (0, 601, False),
+    ],
+)
+def test_freshness_is_stale(set_test_config, age, ttl, expected):
+    set_test_config(STALE_AFTER=3600, STALE_TTL_MARGIN=600)
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+    updated_at = None if age is None else now - timedelta(seconds=age)
+
+    assert Freshness(updated_at, ttl).is_stale(now) is expected
+
+
+def test_write_buffer_flush_by_size(set_test_config):
+    set_test_config(CACHE_TTL=100)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1, 0]
+    on_flushed = MagicMock()
+
+    buffer = WriteBuffer(mock_store, size=2, interval=60, on_flushed=on_flushed)
+    buffer.add("example1.ac.jp", ["jc_group1"])
+    mock_store.pipeline.assert_not_called()
+    buffer.add("example2.ac.jp", ["jc_group1", "jc_group2"])
+
+    mock_store.pipeline.assert_called_once_with(transaction=True)
+    mock_pipe.execute.assert_called_once_with(raise_on_error=False)
+    assert on_flushed.call_args_list == [
+        call("example1.ac.jp", CacheResult(1, changed=True), None),
+        call("example2.ac.jp", CacheResult(2, changed=False), None),
+    ]
+
+
+def test_write_buffer_touch(set_test_config):
+    set_test_config(CACHE_TTL=100)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1, 3, -1]
+    on_flushed = MagicMock()
+
+    with WriteBuffer(mock_store, size=10, interval=60, on_flushed=on_flushed) as buffer:
+        buffer.add("example1.ac.jp", ["jc_group1"], {"etag": '"v1"'})
+        buffer.touch("example2.ac.jp")
+        buffer.touch("example3.ac.jp")
+
+    mock_pipe.eval.assert_called()
+    assert on_flushed.call_args_list[:2] == [
+        call("example1.ac.jp", CacheResult(1, changed=True), None),
+        call("example2.ac.jp", CacheResult(3, changed=False), None),
+    ]
+    fqdn, result, error = on_flushed.call_args_list[2][0]
+    assert (fqdn, result) == ("example3.ac.jp", CacheResult(0, changed=False))
+    assert isinstance(error, CacheExpiredError)
+    assert str(error) == "Group cache of example3.ac.jp expired before it was refreshed."
+
+
+def test_write_buffer_flush_by_interval(set_test_config):
+    set_test_config(CACHE_TTL=100)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1]
+    on_flushed = MagicMock()
+
+    with patch("weko_group_cache_db.cache.time.monotonic", side_effect=[0.0, 5.0, 5.0]):
+        buffer = WriteBuffer(mock_store, size=10, interval=1, on_flushed=on_flushed)
+        buffer.add("example1.ac.jp", ["jc_group1"])
+
+    on_flushed.assert_called_once_with("example1.ac.jp", CacheResult(1, changed=True), None)
+
+
+def test_write_buffer_flush_on_exit(set_test_config):
+    set_test_config(CACHE_TTL=100)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1]
+    on_flushed = MagicMock()
+
+    with WriteBuffer(mock_store, size=10, interval=60, on_flushed=on_flushed) as buffer:
+        buffer.add("example1.ac.jp", ["jc_group1"])
+        on_flushed.assert_not_called()
+
+    on_flushed.assert_called_once_with("example1.ac.jp", CacheResult(1, changed=True), None)
+
+
+def test_write_buffer_flush_empty():
+    mock_store = MagicMock()
+
+    WriteBuffer(mock_store, size=10, interval=60, on_flushed=MagicMock()).flush()
+
+    mock_store.pipeline.assert_not_called()
+
+
+def test_write_buffer_command_error(set_test_config):
+    set_test_config(CACHE_TTL=100)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    error = redis.ResponseError("WRONGTYPE")
+    mock_pipe.execute.return_value = [1, error, 1]
+    on_flushed = MagicMock()
+
+    with WriteBuffer(mock_store, size=10, interval=60, on_flushed=on_flushed) as buffer:
+        buffer.add("example1.ac.jp", ["jc_group1"])
+        buffer.add("example2.ac.jp", ["jc_group1"])
+        buffer.add("example3.ac.jp", ["jc_group1"])
+
+    assert on_flushed.call_args_list == [
+        call("example1.ac.jp", CacheResult(1, changed=True), None),
+        call("example2.ac.jp", CacheResult(1, changed=False), error),
+        call("example3.ac.jp", CacheResult(1, changed=True), None),
+    ]
+
+
+@pytest.mark.parametrize("recovers", [True, False])
+def test_write_buffer_connection_error(set_test_config, recovers):
+    test_config = set_test_config(CACHE_TTL=100, REQUEST_RETRY_FACTOR=0, REQUEST_RETRIES=1)
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    error = redis.ConnectionError("Connection refused")
+    mock_pipe.execute.side_effect = [error, [1, 1]] if recovers else error
+    on_flushed = MagicMock()
+
+    with WriteBuffer(mock_store, size=10, interval=60, on_flushed=on_flushed) as buffer:
+        buffer.add("example1.ac.jp", ["jc_group1"])
+        buffer.add("example2.ac.jp", ["jc_group1"])
+
+    expected_error = None if recovers else error
+    expected_result = CacheResult(1, changed=recovers)
+    assert on_flushed.call_args_list == [
+        call("example1.ac.jp", expected_result, expected_error),
+        call("example2.ac.jp", expected_result, expected_error),
+    ]
+    assert mock_pipe.execute.call_count == test_config.REQUEST_RETRIES + 1
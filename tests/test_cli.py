@@ -9,7 +9,18 @@ from unittest.mock import patch
 import click
 import pytest
 
-from weko_group_cache_db.cli import DEFAULT_CONFIG_PATH, DEFAULT_INSTITUTIONS_PATH, one, run, validate_source_options
+from weko_group_cache_db.cli import (
+    DEFAULT_CONFIG_PATH,
+    DEFAULT_INSTITUTIONS_PATH,
+    certs,
+    expiry,
+    one,
+    run,
+    serve,
+    touch,
+    validate_shard_options,
+    validate_source_options,
+)
 from weko_group_cache_db.exc import UpdateError
 
 
@@ -31,7 +42,7 @@ def test_run_no_options(runner, log_capture):
     mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
     mock_setup_logger.assert_called_once()
     mock_validate_source_options.assert_called_once_with(None, None, None)
-    mock_fetch_all.assert_called_once_with(toml_path=DEFAULT_INSTITUTIONS_PATH)
+    mock_fetch_all.assert_called_once_with(stale_only=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
     assert log_capture.records[0].getMessage() == f"Loading from file source: {DEFAULT_INSTITUTIONS_PATH}"
     assert result.exit_code == 0
 
@@ -59,7 +70,7 @@ def test_run_with_config_path_option(runner, tmp_path, option, log_capture):
     mock_setup_config.assert_called_once_with(str(test_config_path))
     mock_setup_logger.assert_called_once()
     mock_validate_source_options.assert_called_once_with(None, None, None)
-    mock_fetch_all.assert_called_once_with(toml_path=DEFAULT_INSTITUTIONS_PATH)
+    mock_fetch_all.assert_called_once_with(stale_only=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
     assert log_capture.records[0].getMessage() == f"Loading from file source: {DEFAULT_INSTITUTIONS_PATH}"
     assert result.exit_code == 0
 
@@ -98,7 +109,7 @@ def test_run_with_file_path_option(runner, tmp_path, option, log_capture):
     mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
     mock_setup_logger.assert_called_once()
     mock_validate_source_options.assert_called_once_with(str(test_file_path), None, None)
-    mock_fetch_all.assert_called_once_with(toml_path=str(test_file_path))
+    mock_fetch_all.assert_called_once_with(stale_only=False, toml_path=str(test_file_path))
     assert log_capture.records[0].getMessage() == f"Loading from file source: {test_file_path!s}"
     assert result.exit_code == 0
 
@@ -147,6 +158,7 @@ def test_run_with_directory_opstions(runner, tmp_path, opt_dir, opt_list, log_ca
         str(test_fqdn_list_file),
     )
     mock_fetch_all.assert_called_once_with(
+        stale_only=False,
         directory_path=str(test_directory_path),
         fqdn_list_file=str(test_fqdn_list_file),
     )
@@ -157,6 +169,93 @@ def test_run_with_directory_opstions(runner, tmp_path, opt_dir, opt_list, log_ca
     assert result.exit_code == 0
 
 
+@pytest.mark.parametrize("option", ["--concurrency", "-n"])
+def test_run_with_concurrency_option(runner, option):
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.fetch_all") as mock_fetch_all,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(run, [option, "8"])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH, FETCH_CONCURRENCY=8)
+    mock_fetch_all.assert_called_once_with(stale_only=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+def test_run_with_concurrency_option_invalid(runner):
+    result = runner.invoke(run, ["--concurrency", "0"])
+
+    output = strip_ansi(result.output)
+    assert result.exit_code != 0
+    assert "Invalid value for '--concurrency' / '-n'" in output
+
+
+def test_run_with_async_engine(runner):
+    with (
+        patch("weko_group_cache_db.cli.setup_config"),
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.fetch_all") as mock_fetch_all,
+        patch("weko_group_cache_db.cli.aio.fetch_all") as mock_fetch_all_async,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(run, ["--engine", "async"])
+
+    mock_fetch_all.assert_not_called()
+    mock_fetch_all_async.assert_called_once_with(stale_only=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+@pytest.mark.parametrize("option", ["--stale-only", "-s"])
+def test_run_with_stale_only_option(runner, option):
+    with (
+        patch("weko_group_cache_db.cli.setup_config"),
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.fetch_all") as mock_fetch_all,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(run, [option])
+
+    mock_fetch_all.assert_called_once_with(stale_only=True, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+def test_run_with_shard_options(runner):
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.fetch_all") as mock_fetch_all,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(run, ["--shard-index", "2", "--shard-count", "4"])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH, SHARD_INDEX=2, SHARD_COUNT=4)
+    mock_fetch_all.assert_called_once_with(stale_only=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        (["--shard-index", "1"], "Both --shard-index and --shard-count must be specified."),
+        (["--shard-index", "-1", "--shard-count", "4"], "Invalid value for '--shard-index'"),
+        (["--shard-index", "0", "--shard-count", "0"], "Invalid value for '--shard-count'"),
+    ],
+)
+def test_run_with_shard_options_invalid(runner, options, message):
+    with (
+        patch("weko_group_cache_db.cli.setup_config"),
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.fetch_all") as mock_fetch_all,
+    ):
+        result = runner.invoke(run, options)
+
+    mock_fetch_all.assert_not_called()
+    assert result.exit_code != 0
+    assert message in strip_ansi(result.output)
+
+
 def test_run_fetch_raises_error(runner, tmp_path, log_capture):
     test_file_path = tmp_path / "test_institutions.toml"
     test_file_path.write_text("[institutions]\nfqdn = example.ac.jp\n")
@@ -173,7 +272,7 @@ def test_run_fetch_raises_error(runner, tmp_path, log_capture):
     mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
     mock_setup_logger.assert_called_once()
     mock_validate_source_options.assert_called_once_with(str(test_file_path), None, None)
-    mock_fetch_all.assert_called_once_with(toml_path=str(test_file_path))
+    mock_fetch_all.assert_called_once_with(stale_only=False, toml_path=str(test_file_path))
     assert log_capture.records[0].getMessage() == f"Loading from file source: {test_file_path!s}"
     assert result.exit_code != 0
 
@@ -192,11 +291,24 @@ def test_one_no_options(runner, log_capture):
     mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
     mock_setup_logger.assert_called_once()
     mock_validate_source_options.assert_called_once_with(None, None, None)
-    mock_fetch_one.assert_called_once_with("example.ac.jp", toml_path=DEFAULT_INSTITUTIONS_PATH)
+    mock_fetch_one.assert_called_once_with("example.ac.jp", load_all=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
     assert log_capture.records[0].getMessage() == f"Loading from file source: {DEFAULT_INSTITUTIONS_PATH}"
     assert result.exit_code == 0
 
 
+def test_one_with_load_all_option(runner):
+    with (
+        patch("weko_group_cache_db.cli.setup_config"),
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.fetch_one") as mock_fetch_one,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(one, ["example.ac.jp", "--load-all"])
+
+    mock_fetch_one.assert_called_once_with("example.ac.jp", load_all=True, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
 @pytest.mark.parametrize(
     "option",
     [
@@ -220,7 +332,7 @@ def test_one_with_config_path_option(runner, tmp_path, option, log_capture):
     mock_setup_config.assert_called_once_with(str(test_config_path))
     mock_setup_logger.assert_called_once()
     mock_validate_source_options.assert_called_once_with(None, None, None)
-    mock_fetch_one.assert_called_once_with("example.ac.jp", toml_path=DEFAULT_INSTITUTIONS_PATH)
+    mock_fetch_one.assert_called_once_with("example.ac.jp", load_all=False, toml_path=DEFAULT_INSTITUTIONS_PATH)
     assert log_capture.records[0].getMessage() == f"Loading from file source: {DEFAULT_INSTITUTIONS_PATH}"
     assert result.exit_code == 0
 
@@ -257,6 +369,7 @@ def test_one_with_file_path_option(runner, tmp_path, option, log_capture):
     )
     mock_fetch_one.assert_called_once_with(
         "example.ac.jp",
+        load_all=False,
         toml_path=str(test_file_path),
     )
     assert log_capture.records[0].getMessage() == f"Loading from file source: {test_file_path!s}"
@@ -304,6 +417,7 @@ def test_one_with_directory_path_option(runner, tmp_path, opt_dir, opt_list, log
     )
     mock_fetch_one.assert_called_once_with(
         "example.ac.jp",
+        load_all=False,
         directory_path=str(test_directory_path),
         fqdn_list_file=str(test_fqdn_list_file),
     )
@@ -346,12 +460,122 @@ def test_one_fetch_raises_error(runner, tmp_path, error_instance, log_capture):
     )
     mock_fetch_one.assert_called_once_with(
         "example.ac.jp",
+        load_all=False,
         toml_path=str(test_file_path),
     )
     assert log_capture.records[0].getMessage() == f"Loading from file source: {test_file_path!s}"
     assert result.exit_code != 0
 
 
+def test_serve_no_options(runner, log_capture):
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.serve_forever") as mock_serve_forever,
+        patch("weko_group_cache_db.cli.validate_source_options") as mock_validate_source_options,
+    ):
+        result = runner.invoke(serve, [])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
+    mock_validate_source_options.assert_called_once_with(None, None, None)
+    mock_serve_forever.assert_called_once_with(toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert log_capture.records[0].getMessage() == f"Loading from file source: {DEFAULT_INSTITUTIONS_PATH}"
+    assert result.exit_code == 0
+
+
+def test_serve_with_directory_path_option(runner, tmp_path):
+    test_directory_path = tmp_path / "test_institutions"
+    test_directory_path.mkdir()
+    test_fqdn_list_file = tmp_path / "fqdn_list.txt"
+    test_fqdn_list_file.write_text("example.ac.jp\n")
+
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.serve_forever") as mock_serve_forever,
+    ):
+        result = runner.invoke(serve, ["-d", str(test_directory_path), "-l", str(test_fqdn_list_file), "-n", "4"])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH, FETCH_CONCURRENCY=4)
+    mock_serve_forever.assert_called_once_with(
+        directory_path=str(test_directory_path), fqdn_list_file=str(test_fqdn_list_file)
+    )
+    assert result.exit_code == 0
+
+
+def test_expiry_no_options(runner):
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.report_expiry") as mock_report_expiry,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(expiry, [])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
+    mock_report_expiry.assert_called_once_with(bucket=3600, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+@pytest.mark.parametrize("option", ["--bucket", "-b"])
+def test_expiry_with_bucket_option(runner, option):
+    with (
+        patch("weko_group_cache_db.cli.setup_config"),
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.report_expiry") as mock_report_expiry,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(expiry, [option, "600"])
+
+    mock_report_expiry.assert_called_once_with(bucket=600, toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+def test_touch_no_options(runner):
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.extend_all") as mock_extend_all,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(touch, [])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
+    mock_extend_all.assert_called_once_with(toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+def test_certs_no_options(runner):
+    with (
+        patch("weko_group_cache_db.cli.setup_config") as mock_setup_config,
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.report_certificates") as mock_report_certificates,
+        patch("weko_group_cache_db.cli.validate_source_options"),
+    ):
+        result = runner.invoke(certs, [])
+
+    mock_setup_config.assert_called_once_with(DEFAULT_CONFIG_PATH)
+    mock_report_certificates.assert_called_once_with(toml_path=DEFAULT_INSTITUTIONS_PATH)
+    assert result.exit_code == 0
+
+
+def test_certs_with_directory_path_option(runner, tmp_path):
+    test_fqdn_list_file = tmp_path / "fqdn_list.txt"
+    test_fqdn_list_file.write_text("example.ac.jp\n")
+
+    with (
+        patch("weko_group_cache_db.cli.setup_config"),
+        patch("weko_group_cache_db.cli.setup_logger"),
+        patch("weko_group_cache_db.cli.report_certificates") as mock_report_certificates,
+    ):
+        result = runner.invoke(certs, ["-d", str(tmp_path), "-l", str(test_fqdn_list_file)])
+
+    mock_report_certificates.assert_called_once_with(
+        directory_path=str(tmp_path), fqdn_list_file=str(test_fqdn_list_file)
+    )
+    assert result.exit_code == 0
+
+
 @pytest.mark.parametrize(
     ("file_path", "directory_path", "fqdn_list_file"),
     [
@@ -394,3 +618,26 @@ def test_validate_source_options_fail(file_path, directory_path, fqdn_list_file,
     )
 
     assert exc_info.value.message == message
+
+
+@pytest.mark.parametrize(
+    ("shard_index", "shard_count"),
+    [(None, None), (0, 1), (3, 4)],
+)
+def test_validate_shard_options_pass(shard_index, shard_count):
+    # Should not raise any exception
+    validate_shard_options(shard_index, shard_count)
+
+
+@pytest.mark.parametrize(
+    ("shard_index", "shard_count", "message"),
+    [
+        (0, None, "Both --shard-index and --shard-count must be specified."),
+        (None, 2, "Both --shard-index and --shard-count must be specified."),
+    ],
+)
+def test_validate_shard_options_fail(shard_index, shard_count, message):
+    with pytest.raises(click.UsageError) as exc_info:
+        validate_shard_options(shard_index, shard_count)
+
+    assert exc_info.value.message == message
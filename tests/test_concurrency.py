@@ -0,0 +1,154 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import pytest
+
+from weko_group_cache_db.concurrency import (
+    MIN_ROUND_SAMPLES,
+    AdaptiveConcurrency,
+    _current_fetch_concurrency,
+    concurrency_bounds,
+    fetch_concurrency,
+    setup_fetch_concurrency,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _round(controller, latency=0.1, failures=0):
+    samples = max(controller.limit, MIN_ROUND_SAMPLES)
+    for index in range(samples):
+        controller.observe(latency, failed=index < failures)
+
+
+def test_adaptive_concurrency_bounds():
+    assert AdaptiveConcurrency(0, 0, 0).limit == 1
+    controller = AdaptiveConcurrency(10, 2, 4)
+
+    assert (controller.limit, controller.minimum, controller.maximum) == (4, 2, 4)
+    assert AdaptiveConcurrency(1, 2, 4).limit == 2  # noqa: PLR2004
+
+
+def test_adaptive_concurrency_increases_additively():
+    controller = AdaptiveConcurrency(1, 1, 3)
+
+    for _ in range(MIN_ROUND_SAMPLES - 1):
+        controller.observe(0.1)
+    assert controller.limit == 1
+
+    controller.observe(0.1)
+    assert controller.limit == 2  # noqa: PLR2004
+    _round(controller)
+    _round(controller)
+    assert controller.limit == 3  # noqa: PLR2004
+
+
+def test_adaptive_concurrency_decreases_on_errors(log_capture):
+    controller = AdaptiveConcurrency(16, 1, 16)
+
+    _round(controller, failures=2)
+
+    assert controller.limit == 8  # noqa: PLR2004
+    assert log_capture.records[-1].getMessage() == "Reduced fetch concurrency to 8, since 12% of requests failed."
+
+    _round(controller, failures=0)
+    assert controller.limit == 9  # noqa: PLR2004
+
+
+def test_adaptive_concurrency_decreases_on_rising_latency(log_capture):
+    controller = AdaptiveConcurrency(8, 2, 16)
+    _round(controller, latency=0.2)
+    assert controller.limit == 9  # noqa: PLR2004
+
+    _round(controller, latency=0.3)
+    assert controller.limit == 10  # noqa: PLR2004
+    _round(controller, latency=0.5)
+    assert controller.limit == 5  # noqa: PLR2004
+    assert log_capture.records[-1].getMessage() == "Reduced fetch concurrency to 5, since latency rose to 0.50 seconds."
+
+
+def test_adaptive_concurrency_follows_lasting_latency():
+    controller = AdaptiveConcurrency(4, 1, 32)
+    _round(controller, latency=0.1)
+
+    limits = []
+    for _ in range(10):
+        _round(controller, latency=0.3)
+        limits.append(controller.limit)
+
+    # the baseline catches up with the latency, so the cut does not last
+    assert limits[0] == 2  # noqa: PLR2004
+    assert limits[-1] > limits[-2] > limits[-3]
+
+
+def test_adaptive_concurrency_overloaded():
+    clock = FakeClock()
+    controller = AdaptiveConcurrency(8, 1, 8, clock=clock)
+
+    controller.overloaded(30)
+    controller.overloaded()
+    controller.overloaded(10)
+
+    assert controller.limit == 4  # noqa: PLR2004
+    assert controller.pause() == 30  # noqa: PLR2004
+    clock.now = 25
+    assert controller.pause() == 5  # noqa: PLR2004
+    clock.now = 31
+    assert controller.pause() == 0
+
+    for _ in range(2):
+        controller.observe(0.1)
+    controller.overloaded()
+    assert controller.limit == 2  # noqa: PLR2004
+
+
+def test_adaptive_concurrency_minimum():
+    controller = AdaptiveConcurrency(2, 2, 8)
+
+    controller.overloaded()
+    _round(controller, failures=MIN_ROUND_SAMPLES)
+
+    assert controller.limit == 2  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("settings", "expected"),
+    [
+        ({}, (1, 1, 1)),
+        ({"FETCH_CONCURRENCY": 4}, (4, 1, 4)),
+        ({"FETCH_CONCURRENCY": 4, "FETCH_CONCURRENCY_MAX": 16}, (4, 1, 16)),
+        ({"FETCH_CONCURRENCY": 4, "FETCH_CONCURRENCY_MIN": 8, "FETCH_CONCURRENCY_MAX": 16}, (8, 8, 16)),
+        ({"FETCH_CONCURRENCY": 32, "FETCH_CONCURRENCY_MAX": 16}, (16, 1, 16)),
+        ({"FETCH_CONCURRENCY": 0, "FETCH_CONCURRENCY_MIN": 0}, (1, 1, 1)),
+    ],
+)
+def test_concurrency_bounds(set_test_config, settings, expected):
+    set_test_config(**settings)
+
+    assert concurrency_bounds() == expected
+
+
+def test_setup_fetch_concurrency(set_test_config):
+    set_test_config(FETCH_CONCURRENCY=3, FETCH_CONCURRENCY_MIN=2, FETCH_CONCURRENCY_MAX=6)
+
+    controller = setup_fetch_concurrency()
+
+    assert (controller.limit, controller.minimum, controller.maximum) == (3, 2, 6)
+    assert _current_fetch_concurrency.get() is controller
+
+
+def test_fetch_concurrency_proxy(set_test_config):
+    set_test_config(FETCH_CONCURRENCY=5)
+    controller = setup_fetch_concurrency()
+
+    assert fetch_concurrency.limit == controller.limit
+    _current_fetch_concurrency.set(None)  # pyright: ignore[reportArgumentType]
+    assert fetch_concurrency.limit == controller.limit
+    assert _current_fetch_concurrency.get() is not controller
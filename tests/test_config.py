@@ -12,14 +12,28 @@ from werkzeug.local import LocalProxy
 from weko_group_cache_db.config import Settings, _current_config, config, setup_config
 
 
-def test_settings_default_values():
+def test_settings_default_values():  # noqa: PLR0914, PLR0915
     default_cache_ttl = 86400
+    default_stale_after = 43200
+    default_stale_ttl_margin = 3600
+    default_touch_stale_after = 43200
+    default_refresh_interval = 43200
+    default_refresh_jitter = 0.1
+    default_page_concurrency = 4
     default_request_timeout = 20
     default_request_interval = 3
+    default_request_burst = 1
     default_request_retries = 3
     default_request_retry_base = 4
     default_request_retry_factor = 5
     default_request_retry_max = 90
+    default_circuit_breaker_threshold = 10
+    default_circuit_breaker_reset_timeout = 60
+    default_session_pool_size = 8
+    default_session_idle_timeout = 60
+    default_fetch_concurrency = 1
+    default_cert_check_workers = 4
+    default_cert_expiry_warning = 2592000
 
     settings = Settings(MAP_GROUPS_API_ENDPOINT="https://example.com/api/groups/")
     assert settings.DEVELOPMENT is False
@@ -27,16 +41,73 @@ def test_settings_default_values():
     assert settings.SP_CONNECTOR_ID_PREFIX == "jc_"
     assert settings.CACHE_KEY_SUFFIX == "_gakunin_groups"
     assert settings.CACHE_TTL == default_cache_ttl
+    assert settings.CACHE_TTL_SPREAD == 0
+    assert settings.STALE_WHILE_REVALIDATE is False
+    assert settings.STALE_AFTER == default_stale_after
+    assert settings.STALE_TTL_MARGIN == default_stale_ttl_margin
+    assert settings.TOUCH_STALE_AFTER == default_touch_stale_after
+    assert settings.REFRESH_INTERVAL == default_refresh_interval
+    assert settings.REFRESH_JITTER == default_refresh_jitter
+    assert settings.MANIFEST_CACHE_PATH is None
+    assert settings.DIRECTORY_SCAN_WORKERS == 1
+    assert settings.CERT_CHECK_WORKERS == default_cert_check_workers
+    assert settings.CERT_EXPIRY_WARNING == default_cert_expiry_warning
     assert settings.MAP_GROUPS_API_ENDPOINT == "https://example.com/api/groups/"
+    assert settings.JSON_DECODER == "auto"
+    assert settings.STREAM_RESPONSES is False
+    assert settings.PAGE_SIZE == 0
+    assert settings.PAGE_CONCURRENCY == default_page_concurrency
     assert settings.REQUEST_TIMEOUT == default_request_timeout
     assert settings.REQUEST_INTERVAL == default_request_interval
+    assert settings.REQUEST_RATE is None
+    assert settings.REQUEST_BURST == default_request_burst
     assert settings.REQUEST_RETRIES == default_request_retries
     assert settings.REQUEST_RETRY_BASE == default_request_retry_base
     assert settings.REQUEST_RETRY_FACTOR == default_request_retry_factor
     assert settings.REQUEST_RETRY_MAX == default_request_retry_max
+    assert settings.CIRCUIT_BREAKER_THRESHOLD == default_circuit_breaker_threshold
+    assert settings.CIRCUIT_BREAKER_RESET_TIMEOUT == default_circuit_breaker_reset_timeout
+    assert settings.SESSION_POOL_SIZE == default_session_pool_size
+    assert settings.SESSION_IDLE_TIMEOUT == default_session_idle_timeout
+    assert settings.FETCH_CONCURRENCY == default_fetch_concurrency
+    assert settings.FETCH_CONCURRENCY_MIN == 1
+    assert settings.FETCH_CONCURRENCY_MAX is None
+    assert settings.SHARD_COUNT == 1
+    assert settings.SHARD_INDEX == 0
+    assert settings.REDIS_FLUSH_SIZE == 1
+    assert settings.REDIS_FLUSH_INTERVAL == 1
     assert settings.REDIS_URL == "redis://localhost:6379/4"
 
 
+@pytest.mark.parametrize(("shard_index", "shard_count"), [(0, 0), (0, 1), (3, 4)])
+def test_settings_shard(shard_index, shard_count):
+    settings = Settings(
+        MAP_GROUPS_API_ENDPOINT="https://example.com/api/groups/",
+        SHARD_INDEX=shard_index,
+        SHARD_COUNT=shard_count,
+    )
+
+    assert settings.SHARD_INDEX == shard_index
+
+
+@pytest.mark.parametrize(
+    ("shard_index", "shard_count", "message"),
+    [
+        (4, 4, "SHARD_INDEX must be less than SHARD_COUNT."),
+        (1, 1, "SHARD_INDEX must be less than SHARD_COUNT."),
+        (-1, 4, "SHARD_COUNT and SHARD_INDEX must not be negative."),
+        (0, -1, "SHARD_COUNT and SHARD_INDEX must not be negative."),
+    ],
+)
+def test_settings_shard_invalid(shard_index, shard_count, message):
+    with pytest.raises(ValidationError, match=message):
+        Settings(
+            MAP_GROUPS_API_ENDPOINT="https://example.com/api/groups/",
+            SHARD_INDEX=shard_index,
+            SHARD_COUNT=shard_count,
+        )
+
+
 def test_settings_missing_required_field():
     with pytest.raises(ValidationError) as excinfo:
         Settings()  # pyright: ignore[reportCallIssue]
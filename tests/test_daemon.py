@@ -0,0 +1,295 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import signal
+import ssl
+import threading
+import time
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+import requests
+
+from weko_group_cache_db.cache import CacheResult, Freshness
+from weko_group_cache_db.concurrency import _current_fetch_concurrency
+from weko_group_cache_db.daemon import initial_delay, next_refresh_delay, refresh_interval, serve
+from weko_group_cache_db.exc import CircuitOpenError
+from weko_group_cache_db.groups import AttemptPool
+from weko_group_cache_db.loader import Institution
+from weko_group_cache_db.session import session_pool
+
+
+def test_refresh_interval(set_test_config):
+    set_test_config(REFRESH_INTERVAL=100, REFRESH_JITTER=0.1)
+
+    intervals = [refresh_interval() for _ in range(100)]
+
+    assert all(90 <= interval <= 110 for interval in intervals)  # noqa: PLR2004
+    assert len(set(intervals)) > 1
+
+
+@pytest.mark.parametrize(("jitter", "expected"), [(0, 100), (-1, 100)])
+def test_refresh_interval_without_jitter(set_test_config, jitter, expected):
+    set_test_config(REFRESH_INTERVAL=100, REFRESH_JITTER=jitter)
+
+    assert refresh_interval() == expected
+
+
+@pytest.mark.parametrize(
+    ("age", "ttl", "expected"),
+    [
+        (None, -2, 0),
+        (0, -2, 0),
+        (100, -1, 900),
+        (100, 500, 400),
+        (100, 50, 0),
+        (2000, -1, 0),
+    ],
+)
+def test_initial_delay(set_test_config, age, ttl, expected):
+    set_test_config(REFRESH_INTERVAL=1000, STALE_TTL_MARGIN=100)
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+    updated_at = None if age is None else now - timedelta(seconds=age)
+
+    with patch("weko_group_cache_db.daemon.random.uniform", side_effect=lambda _, upper: upper):
+        assert initial_delay(Freshness(updated_at, ttl), now) == expected
+
+
+def test_serve(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(REFRESH_INTERVAL=0.01, REFRESH_JITTER=0)
+    now = datetime.now(UTC)
+    freshness = [Freshness(None, -2), Freshness(now - timedelta(seconds=60), 80000)]
+    stop = threading.Event()
+    calls = []
+
+    def _retrieve(institution, _store):
+        calls.append(institution.fqdn)
+        if len(calls) >= 5:  # noqa: PLR2004
+            stop.set()
+        return CacheResult(1, changed=False)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.daemon.connection", return_value=mock_store),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=institutions) as mock_load,
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=freshness) as mock_get_freshness,
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve),
+    ):
+        serve(stop=stop, toml_path="institutions.toml")
+
+    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_get_freshness.assert_called_once_with(mock_store, [institution.fqdn for institution in institutions])
+    assert calls[:2] == [institution.fqdn for institution in institutions]
+    assert len(calls) == 5  # noqa: PLR2004
+    messages = [record.getMessage() for record in log_capture.records]
+    assert messages[0] == "Serving 2 institution(s), refreshing each every 0 seconds."
+    assert messages[-1] == "Stopped serving."
+
+
+def test_serve_retries(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REFRESH_INTERVAL=0.01, REQUEST_RETRIES=1)
+    stop = threading.Event()
+    results = [requests.ConnectionError("Request failed"), requests.ConnectionError("Request failed")]
+
+    def _retrieve(_institution, _store):
+        if results:
+            raise results.pop()
+        stop.set()
+        return CacheResult(2, changed=True)
+
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=[institution]),
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=[Freshness(None, -2)]),
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.groups.retry_delay", return_value=0),
+        patch("weko_group_cache_db.groups.traceback.print_exc"),
+        patch("weko_group_cache_db.daemon.keep_stale") as mock_keep_stale,
+    ):
+        serve(stop=stop, toml_path="institutions.toml")
+
+    mock_keep_stale.assert_called_once_with(ANY, [institution.fqdn])
+    messages = [record.getMessage() for record in log_capture.records]
+    assert f"Retrying institution {institution.fqdn} in 0.0 seconds." in messages
+    assert (
+        f"Despite retries 1 times, failed to cache groups to Redis for institution: {institution.fqdn}."
+    ) in messages
+    assert f"Successfully cached 2 groups for {institution.fqdn}." in messages
+
+
+def test_serve_unexpected_error(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(REFRESH_INTERVAL=0.01, REFRESH_JITTER=0)
+    stop = threading.Event()
+    calls = []
+
+    def _retrieve(institution, _store):
+        calls.append(institution.fqdn)
+        if len(calls) >= 6:  # noqa: PLR2004
+            stop.set()
+        if institution is institutions[0]:
+            error_message = "certificate changed while it was loaded"
+            raise ssl.SSLError(error_message)
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=institutions),
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=[Freshness(None, -2)] * 2),
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.daemon.keep_stale") as mock_keep_stale,
+    ):
+        serve(stop=stop, toml_path="institutions.toml")
+
+    # the failed institution does not stop the daemon, and is refreshed again
+    assert calls.count(institutions[0].fqdn) >= 2  # noqa: PLR2004
+    assert calls.count(institutions[1].fqdn) >= 2  # noqa: PLR2004
+    mock_keep_stale.assert_any_call(ANY, [institutions[0].fqdn])
+    messages = [record.getMessage() for record in log_capture.records]
+    assert (f"Failed to cache groups for institution {institutions[0].fqdn} due to an unexpected error.") in messages
+    assert messages[-1] == "Stopped serving."
+
+
+def test_serve_reuses_sessions(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REFRESH_INTERVAL=0.01, REFRESH_JITTER=0)
+    stop = threading.Event()
+    sessions = []
+
+    def _retrieve(institution, _store):
+        sessions.append(session_pool.get(institution.client_cert_path, institution.client_key_path))
+        if len(sessions) >= 3:  # noqa: PLR2004
+            stop.set()
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=[institution]),
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=[Freshness(None, -2)]),
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.session.create_session") as mock_create_session,
+        patch("weko_group_cache_db.session.load_ssl_context"),
+        patch.object(requests.Session, "close", autospec=True) as mock_close,
+    ):
+        serve(stop=stop, toml_path="institutions.toml")
+
+    assert len(sessions) == 3  # noqa: PLR2004
+    assert all(session is sessions[0] for session in sessions)
+    mock_create_session.assert_called_once_with(institution.client_cert_path, institution.client_key_path)
+    mock_close.assert_called_once_with(sessions[0])
+
+
+def test_serve_waits_for_worker_when_due(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(REFRESH_INTERVAL=3600, FETCH_CONCURRENCY=1, FETCH_CONCURRENCY_MAX=1)
+    stop = threading.Event()
+    controllers = []
+
+    def _retrieve(_institution, _store):
+        controllers.append(_current_fetch_concurrency.get(None))
+        time.sleep(0.1)
+        if len(controllers) == len(institutions):
+            stop.set()
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=institutions),
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=[Freshness(None, -2)] * 3),
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve),
+        patch.object(AttemptPool, "wait", autospec=True, side_effect=AttemptPool.wait) as mock_wait,
+    ):
+        serve(stop=stop, toml_path="institutions.toml")
+
+    # institutions due at startup wait for the worker instead of polling it
+    assert mock_wait.call_count == len(institutions)
+    assert controllers[0] is not None
+    assert all(controller is controllers[0] for controller in controllers)
+
+
+def test_serve_circuit_open(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REFRESH_INTERVAL=3600)
+    stop = threading.Event()
+    results = [CacheResult(1, changed=False), CircuitOpenError("https://sample.gakunin.jp/api/groups/", 0.01)]
+
+    def _retrieve(_institution, _store):
+        result = results.pop()
+        if isinstance(result, Exception):
+            raise result
+        stop.set()
+        return result
+
+    timer = threading.Timer(5, stop.set)
+    timer.start()
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=[institution]),
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=[Freshness(None, -2)]),
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.daemon.keep_stale"),
+    ):
+        serve(stop=stop, toml_path="institutions.toml")
+    timer.cancel()
+
+    # refreshed again once the circuit lets a request probe, not after an interval
+    assert not results
+    messages = [record.getMessage() for record in log_capture.records]
+    assert f"Successfully cached 1 groups for {institution.fqdn}." in messages
+
+
+@pytest.mark.parametrize(
+    ("outcome", "expected"),
+    [
+        (CircuitOpenError("https://sample.gakunin.jp/api/groups/", 12.5), 12.5),
+        (CircuitOpenError("https://sample.gakunin.jp/api/groups/", 0), 60),
+        (CacheResult(1, changed=True), 3600),
+        (requests.ConnectionError(), 3600),
+        (None, 3600),
+    ],
+)
+def test_next_refresh_delay(set_test_config, outcome, expected):
+    set_test_config(REFRESH_INTERVAL=3600, REFRESH_JITTER=0, CIRCUIT_BREAKER_RESET_TIMEOUT=60)
+
+    assert next_refresh_delay(outcome) == expected
+
+
+def test_serve_stops_on_signal(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    handlers = {}
+
+    def _retrieve(_institution, _store):
+        handlers[signal.SIGTERM](signal.SIGTERM, None)
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=[institution]),
+        patch("weko_group_cache_db.daemon.get_freshness", return_value=[Freshness(None, -2)]),
+        patch("weko_group_cache_db.daemon.fetch_and_cache", return_value=_retrieve) as mock_fetch_and_cache,
+        patch("weko_group_cache_db.daemon.signal.signal", side_effect=handlers.__setitem__),
+    ):
+        serve(toml_path="institutions.toml")
+
+    assert set(handlers) == {signal.SIGTERM, signal.SIGINT}
+    mock_fetch_and_cache.assert_called_once_with(retry=False)
+
+
+def test_serve_no_institutions(set_test_config, log_capture):
+    set_test_config()
+
+    with (
+        patch("weko_group_cache_db.daemon.connection"),
+        patch("weko_group_cache_db.daemon.load_institutions", return_value=[]),
+        patch("weko_group_cache_db.daemon.get_freshness") as mock_get_freshness,
+    ):
+        serve(stop=threading.Event(), toml_path="institutions.toml")
+
+    mock_get_freshness.assert_not_called()
+    assert log_capture.records[0].getMessage() == "No institutions found to fetch and cache groups for."
@@ -0,0 +1,211 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import importlib.util
+import json
+import re
+
+from unittest.mock import patch
+
+import pytest
+
+from weko_group_cache_db.decoder import (
+    STREAM_CHUNK_SIZE,
+    GroupPage,
+    GroupPageParser,
+    decode_group_page,
+    extract_group_ids,
+    extract_group_page,
+    get_decoder,
+    parse_group_page,
+)
+from weko_group_cache_db.exc import ConfigurationError
+
+
+def _installed(name):
+    return pytest.param(
+        name,
+        marks=pytest.mark.skipif(importlib.util.find_spec(name) is None, reason=f"{name} is not installed"),
+    )
+
+
+DECODER_NAMES = ["json", _installed("orjson"), _installed("msgspec")]
+
+BODY = {
+    "totalResults": 3,
+    "entry": [
+        {"id": "https://sample.gakunin.jp/api/groups/jc_group1", "displayName": "Group 1", "members": [{"value": "a"}]},
+        {"displayName": "Group without ID"},
+        {"id": "jc_group2", "displayName": "Group 2", "members": []},
+    ],
+}
+
+
+def test_extract_group_ids():
+    assert extract_group_ids(BODY) == ["jc_group1", "jc_group2"]
+    assert extract_group_ids({"totalResults": 0}) == []
+
+
+def test_extract_group_page():
+    assert extract_group_page(BODY) == GroupPage(["jc_group1", "jc_group2"], 3)
+    assert extract_group_page({**BODY, "startIndex": 1, "itemsPerPage": 1.5e3}) == GroupPage(
+        ["jc_group1", "jc_group2"], 3, 1
+    )
+
+
+@pytest.mark.parametrize("name", DECODER_NAMES)
+def test_decoder(name):
+    decode = get_decoder(name)
+
+    assert decode(json.dumps(BODY).encode()) == GroupPage(["jc_group1", "jc_group2"], 3)
+    assert decode(b'{"totalResults": 0}') == GroupPage([], 0)
+    assert decode(b'{"totalResults": 5, "startIndex": 3, "itemsPerPage": 2, "entry": [{"id": "a"}]}') == GroupPage(
+        ["a"], 5, 3, 2
+    )
+    assert decode(b'{"totalResults": "5", "itemsPerPage": true}') == GroupPage([])
+
+
+@pytest.mark.parametrize("name", DECODER_NAMES)
+def test_decoder_invalid_body(name):
+    decode = get_decoder(name)
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        decode(b'{"entry": [')
+
+
+def test_decode_group_page(set_test_config):
+    set_test_config(JSON_DECODER="json")
+
+    assert decode_group_page(json.dumps(BODY).encode()) == GroupPage(["jc_group1", "jc_group2"], 3)
+
+
+def test_get_decoder_auto():
+    expected = next(
+        name for name in ("msgspec", "orjson", "json") if name == "json" or importlib.util.find_spec(name) is not None
+    )
+
+    assert get_decoder("auto") is get_decoder(expected)
+
+
+def test_get_decoder_auto_without_optional_decoders():
+    get_decoder.cache_clear()
+    try:
+        with patch.dict("sys.modules", {"msgspec": None, "orjson": None}):
+            assert get_decoder("auto") is get_decoder("json")
+            with pytest.raises(ConfigurationError, match=r"JSON decoder 'msgspec' is not installed\."):
+                get_decoder("msgspec")
+    finally:
+        get_decoder.cache_clear()
+
+
+def test_get_decoder_unknown():
+    with pytest.raises(ConfigurationError, match="Unknown JSON decoder: yaml"):
+        get_decoder("yaml")
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 100000])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_parse_group_page(size, indent):
+    content = json.dumps(
+        {**BODY, "schemas": ["グループ"], "startIndex": 1, "itemsPerPage": 1.5e3}, indent=indent, ensure_ascii=False
+    )
+    data = content.encode()
+
+    assert parse_group_page(data[start : start + size] for start in range(0, len(data), size)) == GroupPage(
+        ["jc_group1", "jc_group2"], 3, 1
+    )
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (b"{}", GroupPage([])),
+        (b'{"entry": []}', GroupPage([])),
+        (b' {"totalResults": 0, "entry": [] } \n', GroupPage([], 0)),
+    ],
+)
+def test_parse_group_page_empty(content, expected):
+    assert parse_group_page([content]) == expected
+
+
+@pytest.mark.parametrize("size", [1, 3])
+def test_parse_group_page_pagination(size):
+    data = b'{"entry": [{"id": "a"}], "itemsPerPage": 100, "totalResults": 1234, "startIndex": 101}'
+
+    assert parse_group_page(data[start : start + size] for start in range(0, len(data), size)) == GroupPage(
+        ["a"], 1234, 101, 100
+    )
+
+
+def test_group_page_parser_drops_parsed_entries():
+    entry = json.dumps({"id": "jc_group1", "members": [{"value": "x" * 1000}]}).encode()
+    parser = GroupPageParser()
+
+    parser.feed(b'{"entry": [' + entry)
+    parser.feed(b"," + entry[:10])
+
+    assert parser.group_ids == ["jc_group1"]
+    assert len(parser._buffer) < len(entry)
+
+    parser.feed(entry[10:] + b"]}")
+    assert parser.close() == GroupPage(["jc_group1", "jc_group1"])
+
+
+LARGE_GROUP = {
+    "id": "https://sample.gakunin.jp/api/groups/jc_large",
+    "members": [{"value": f"user{index}@sample.ac.jp", "display": f'User "{index}" \\ {{['} for index in range(20000)],
+}
+
+
+@pytest.mark.parametrize(
+    ("body", "expected"),
+    [
+        ({"totalResults": 1, "entry": [LARGE_GROUP]}, ["jc_large"]),
+        ({"totalResults": 1, "schemas": [LARGE_GROUP], "entry": [{"id": "jc_group1"}]}, ["jc_group1"]),
+    ],
+)
+def test_group_page_parser_large_value(body, expected):
+    data = json.dumps(body).encode()
+    parser = GroupPageParser()
+
+    for start in range(0, len(data), STREAM_CHUNK_SIZE):
+        parser.feed(data[start : start + STREAM_CHUNK_SIZE])
+        # the value is skipped as it is received instead of being kept until it ends
+        assert len(parser._buffer) < 1000  # noqa: PLR2004
+
+    assert len(data) > 10 * STREAM_CHUNK_SIZE
+    assert parser.close() == GroupPage(expected, 1)
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (b'{"entry": [{"id": null}, {"id": 1}, {"members": [{"id": "a"}]}, "b", 2, null, [{"id": "c"}]]}', []),
+        (b'{"entry": [{"id": "a", "id": "b"}, {"id": "c\\/d\\u00e9"}]}', ["b", "d\u00e9"]),
+        (b'{"meta": {"id": "a"}, "entry": [{"meta": {"id": "b"}, "id": "c"}]}', ["c"]),
+    ],
+)
+def test_parse_group_page_only_ids_of_entries(content, expected):
+    assert parse_group_page(content[start : start + 3] for start in range(0, len(content), 3)).group_ids == expected
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        (b"", "Response body ended unexpectedly."),
+        (b'{"schemas": [{"a": 1]}', "Unbalanced ']' in response body."),
+        (b'{"schemas": "unterminated}', "Response body ended unexpectedly."),
+        (b'{"entry": [{"id": "jc_group1"}', "Response body ended unexpectedly."),
+        (b'{"totalResults": 12', "Response body ended unexpectedly."),
+        (b"[]", "Expecting one of '{' but got '['."),
+        (b'{"entry": null}', "Expecting one of '[' but got 'n'."),
+        (b'{"totalResults" 1}', "Expecting one of ':' but got '1'."),
+        (b'{"entry": [{"id": "a"} {"id": "b"}]}', "Expecting one of ',]' but got '{'."),
+        (b'{"totalResults": tru}', "Expecting value"),
+        (b"{} {}", "Extra data after response body."),
+    ],
+)
+def test_parse_group_page_invalid(content, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        parse_group_page([content[:5], content[5:]])
@@ -2,15 +2,43 @@
 # Copyright (C) 2025 National Institute of Informatics.
 #
 
-from datetime import UTC, datetime
-from unittest.mock import MagicMock, patch
+import contextlib
+import itertools
+import json
+import threading
+import time
+import typing as t
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import ANY, MagicMock, call, patch
 
 import pytest
 import redis
 import requests
 
-from weko_group_cache_db.exc import UpdateError
-from weko_group_cache_db.groups import fetch_all, fetch_and_cache, fetch_map_groups, fetch_one, set_groups_to_redis
+from weko_group_cache_db.breaker import setup_circuit_breaker
+from weko_group_cache_db.cache import WRITE_SCRIPT, CacheResult, Freshness, groups_digest
+from weko_group_cache_db.concurrency import fetch_concurrency, setup_fetch_concurrency
+from weko_group_cache_db.decoder import GroupPage
+from weko_group_cache_db.exc import CertificateError, CircuitOpenError, UpdateError
+from weko_group_cache_db.groups import (
+    AttemptPool,
+    MapGroups,
+    error_retry_after,
+    extend_all,
+    fetch_all,
+    fetch_and_cache,
+    fetch_map_groups,
+    fetch_one,
+    merge_pages,
+    prefetch_validators,
+    remaining_page_starts,
+    select_shard,
+    select_stale,
+    set_groups_to_redis,
+    shard_of,
+    touch_groups,
+)
 from weko_group_cache_db.loader import Institution
 
 
@@ -23,12 +51,12 @@ def test_fetch_all_success_toml(institutions_data, set_test_config, log_capture)
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions") as mock_load,
+        patch("weko_group_cache_db.groups.iter_institutions") as mock_load,
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
-        patch("weko_group_cache_db.groups.time") as mock_time,
+        patch("weko_group_cache_db.groups.setup_rate_limiter") as mock_setup_rate_limiter,
     ):
         mock_load.return_value = institutions
-        mock_func = MagicMock(side_effect=[2, 3])
+        mock_func = MagicMock(side_effect=[CacheResult(2, changed=True), CacheResult(3, changed=False)])
         mock_fetch_and_cache.return_value = mock_func
 
         fetch_all(toml_path="institutions.toml")
@@ -39,7 +67,27 @@ def test_fetch_all_success_toml(institutions_data, set_test_config, log_capture)
     assert mock_func.call_args_list[1][0] == (institutions[1], mock_store)
     assert log_capture.records[0].getMessage() == f"Successfully cached 2 groups for {data[0]['fqdn']}."
     assert log_capture.records[1].getMessage() == f"Successfully cached 3 groups for {data[1]['fqdn']}."
-    mock_time.sleep.assert_called_once()
+    assert log_capture.records[2].getMessage() == "Cached groups for 2 institution(s): 1 changed, 1 unchanged."
+    mock_setup_rate_limiter.assert_called_once_with()
+
+
+def test_fetch_all_sharded(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(5)]
+    set_test_config(SHARD_COUNT=2, SHARD_INDEX=1)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+    ):
+        mock_func = MagicMock(return_value=CacheResult(1, changed=True))
+        mock_fetch_and_cache.return_value = mock_func
+
+        fetch_all(toml_path="institutions.toml")
+
+    assert [args[0][0] for args in mock_func.call_args_list] == [institutions[2], institutions[4]]
+    assert log_capture.records[0].getMessage() == "Processing shard 1 of 2 shards."
+    assert log_capture.records[-1].getMessage() == "Cached groups for 2 institution(s): 2 changed, 0 unchanged."
 
 
 def test_fetch_all_success_directory(institutions_data, set_test_config, log_capture):
@@ -51,12 +99,12 @@ def test_fetch_all_success_directory(institutions_data, set_test_config, log_cap
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions") as mock_load,
+        patch("weko_group_cache_db.groups.iter_institutions") as mock_load,
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
-        patch("weko_group_cache_db.groups.time") as mock_time,
+        patch("weko_group_cache_db.groups.setup_rate_limiter") as mock_setup_rate_limiter,
     ):
         mock_load.return_value = institutions
-        mock_func = MagicMock(side_effect=[2, 3])
+        mock_func = MagicMock(side_effect=[CacheResult(2, changed=True), CacheResult(3, changed=False)])
         mock_fetch_and_cache.return_value = mock_func
 
         fetch_all(directory_path="institutions", fqdn_list_file="fqdn_list.txt")
@@ -67,15 +115,16 @@ def test_fetch_all_success_directory(institutions_data, set_test_config, log_cap
     assert mock_func.call_args_list[1][0] == (institutions[1], mock_store)
     assert log_capture.records[0].getMessage() == f"Successfully cached 2 groups for {data[0]['fqdn']}."
     assert log_capture.records[1].getMessage() == f"Successfully cached 3 groups for {data[1]['fqdn']}."
-    mock_time.sleep.assert_called_once()
+    assert log_capture.records[2].getMessage() == "Cached groups for 2 institution(s): 1 changed, 1 unchanged."
+    mock_setup_rate_limiter.assert_called_once_with()
 
 
 def test_fetch_all_no_institutions(set_test_config, log_capture):
     set_test_config()
     with (
         patch("weko_group_cache_db.groups.connection"),
-        patch("weko_group_cache_db.groups.load_institutions", return_value=[]),
-        patch("weko_group_cache_db.groups.time"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=[]),
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
     ):
         fetch_all(toml_path="empty_institutions.toml")
         assert log_capture.records[0].getMessage() == "No institutions found to fetch and cache groups for."
@@ -85,16 +134,18 @@ def test_fetch_all_request_error(institutions_data, set_test_config, log_capture
     data = institutions_data(2)
     institutions = [Institution(**data[0]), Institution(**data[1])]
 
-    test_config = set_test_config()
+    test_config = set_test_config(REQUEST_RETRIES=0)
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
-        patch("weko_group_cache_db.groups.time"),
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
     ):
         num_groups = 2
-        mock_func = MagicMock(side_effect=[num_groups, requests.RequestException("Request failed")])
+        mock_func = MagicMock(
+            side_effect=[CacheResult(num_groups, changed=True), requests.RequestException("Request failed")]
+        )
         mock_fetch_and_cache.return_value = mock_func
 
         with pytest.raises(ExceptionGroup, match=r"Failed to update information from [1-9]+ institution\(s\)\.") as eg:
@@ -113,17 +164,76 @@ def test_fetch_all_request_error(institutions_data, set_test_config, log_capture
     assert str(error_instance) == f"FQDN: {data[1]['fqdn']}, Request failed"
 
 
+def test_fetch_all_keeps_stale_caches(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(REQUEST_RETRIES=0, STALE_WHILE_REVALIDATE=True)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch(
+            "weko_group_cache_db.groups.fetch_and_cache",
+            return_value=MagicMock(
+                side_effect=[CacheResult(2, changed=True), requests.RequestException("Request failed")]
+            ),
+        ),
+        patch("weko_group_cache_db.cache.extend_caches", return_value=[institutions[1].fqdn]) as mock_extend,
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
+        patch("weko_group_cache_db.groups.traceback.print_exc"),
+        pytest.raises(ExceptionGroup),
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    mock_extend.assert_called_once_with(mock_store, [institutions[1].fqdn])
+    messages = [record.getMessage() for record in log_capture.records]
+    assert "Kept stale group caches of 1 of 1 failed institution(s)." in messages
+
+
+def test_extend_all(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(TOUCH_STALE_AFTER=3600)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.load_institutions", return_value=institutions) as mock_load,
+        patch("weko_group_cache_db.groups.extend_caches", return_value=[institutions[0].fqdn]) as mock_extend,
+    ):
+        extend_all(toml_path="institutions.toml")
+
+    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_extend.assert_called_once_with(
+        mock_store, [institution.fqdn for institution in institutions], stale_after=3600
+    )
+    assert log_capture.records[-1].getMessage() == "Extended group caches of 1 of 3 institution(s)."
+
+
+def test_extend_all_no_institutions(set_test_config, log_capture):
+    set_test_config()
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.load_institutions", return_value=[]),
+        patch("weko_group_cache_db.groups.extend_caches") as mock_extend,
+    ):
+        extend_all(toml_path="institutions.toml")
+
+    mock_extend.assert_not_called()
+    assert log_capture.records[0].getMessage() == "No institutions found to extend group caches for."
+
+
 def test_fetch_all_redis_error(institutions_data, set_test_config, log_capture):
     data = institutions_data(1)
     institutions = [Institution(**data[0])]
-    test_config = set_test_config()
+    test_config = set_test_config(REQUEST_RETRY_FACTOR=0)
 
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
-        patch("weko_group_cache_db.groups.time"),
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
     ):
         mock_func = MagicMock(side_effect=redis.RedisError("Cache error"))
         mock_fetch_and_cache.return_value = mock_func
@@ -132,7 +242,8 @@ def test_fetch_all_redis_error(institutions_data, set_test_config, log_capture):
             fetch_all(toml_path="institutions.toml")
 
     assert mock_func.call_args_list[0][0] == (institutions[0], mock_store)
-    assert log_capture.records[0].getMessage() == (
+    assert mock_func.call_count == test_config.REQUEST_RETRIES + 1
+    assert log_capture.records[test_config.REQUEST_RETRIES].getMessage() == (
         f"Despite retries {test_config.REQUEST_RETRIES} times, failed to cache groups "
         f"to Redis for institution: {data[0]['fqdn']}."
     )
@@ -142,6 +253,514 @@ def test_fetch_all_redis_error(institutions_data, set_test_config, log_capture):
     assert str(error_instance) == f"FQDN: {data[0]['fqdn']}, Cache error"
 
 
+def test_fetch_all_certificate_error(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REQUEST_RETRIES=3)
+    error = CertificateError(institution.fqdn, "expired at 2000-01-01T00:00:00+00:00")
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=[institution]),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=MagicMock(side_effect=error)) as mock_fetch,
+        pytest.raises(ExceptionGroup) as eg,
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    mock_fetch.return_value.assert_called_once()
+    assert t.cast(UpdateError, eg.value.exceptions[0]).origin is error
+    messages = [record.getMessage() for record in log_capture.records]
+    assert (
+        f"TLS client certificate of {institution.fqdn} cannot be used: expired at 2000-01-01T00:00:00+00:00"
+    ) in messages
+    assert not any(message.startswith("Retrying") for message in messages)
+
+
+def test_fetch_all_unexpected_error(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(REQUEST_RETRIES=3)
+    error = TypeError("expected string or bytes-like object")
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch(
+            "weko_group_cache_db.groups.fetch_and_cache",
+            return_value=MagicMock(side_effect=[error, CacheResult(1, changed=True)]),
+        ) as mock_fetch_and_cache,
+        pytest.raises(ExceptionGroup) as eg,
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    assert mock_fetch_and_cache.return_value.call_count == len(institutions)
+    assert len(eg.value.exceptions) == 1
+    assert t.cast(UpdateError, eg.value.exceptions[0]).origin is error
+    messages = [record.getMessage() for record in log_capture.records]
+    assert (f"Failed to cache groups for institution {institutions[0].fqdn} due to an unexpected error.") in messages
+    assert f"Successfully cached 1 groups for {institutions[1].fqdn}." in messages
+
+
+def test_fetch_all_circuit_open(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(REQUEST_RETRIES=2, CIRCUIT_BREAKER_THRESHOLD=1)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.check_certificate"),
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
+        patch("weko_group_cache_db.groups.keep_stale") as mock_keep_stale,
+        patch("weko_group_cache_db.groups.retry_delay", return_value=0),
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+    ):
+        mock_session_pool.checkout.return_value.__enter__.return_value.get.side_effect = requests.ConnectionError(
+            "Connection refused"
+        )
+
+        with pytest.raises(ExceptionGroup) as eg:
+            fetch_all(toml_path="institutions.toml")
+
+    errors = [t.cast(UpdateError, error) for error in eg.value.exceptions]
+    mock_session_pool.checkout.return_value.__enter__.return_value.get.assert_called_once()
+    mock_rate_limiter.acquire.assert_called_once_with()
+    assert [error.fqdn for error in errors] == [institution.fqdn for institution in institutions]
+    assert all(isinstance(error.origin, CircuitOpenError) for error in errors)
+    mock_keep_stale.assert_called_once_with(ANY, [institution.fqdn for institution in institutions])
+    messages = [record.getMessage() for record in log_capture.records]
+    assert sum(message.startswith("Retrying") for message in messages) == 1
+    assert f"Skipped institution {institutions[1].fqdn}: {errors[1].origin}" in messages
+
+
+def test_fetch_all_deferred_retry(institutions_data, set_test_config, log_capture):
+    data = institutions_data(3)
+    institutions = [Institution(**item) for item in data]
+    set_test_config(REQUEST_RETRIES=2)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
+        patch("weko_group_cache_db.groups.retry_delay", return_value=0.05) as mock_retry_delay,
+    ):
+        mock_func = MagicMock(
+            side_effect=[
+                requests.RequestException("Request failed"),
+                CacheResult(2, changed=True),
+                CacheResult(3, changed=True),
+                requests.RequestException("Request failed"),
+                CacheResult(1, changed=False),
+            ]
+        )
+        mock_fetch_and_cache.return_value = mock_func
+
+        fetch_all(toml_path="institutions.toml")
+
+    mock_fetch_and_cache.assert_called_once_with(None, retry=False, validators={})
+    called = [args[0][0].fqdn for args in mock_func.call_args_list]
+    assert called == [data[0]["fqdn"], data[1]["fqdn"], data[2]["fqdn"], data[0]["fqdn"], data[0]["fqdn"]]
+    assert mock_retry_delay.call_args_list == [call(0), call(1)]
+    messages = [record.getMessage() for record in log_capture.records]
+    assert messages[:2] == [
+        f"Retrying institution {data[0]['fqdn']} in 0.1 seconds.",
+        f"Successfully cached 2 groups for {data[1]['fqdn']}.",
+    ]
+    assert f"Successfully cached 1 groups for {data[0]['fqdn']}." in messages
+    assert messages[-1] == "Cached groups for 3 institution(s): 2 changed, 1 unchanged."
+
+
+def test_fetch_all_retry_after(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REQUEST_RETRIES=1)
+    response = MagicMock(status_code=429, headers={"Retry-After": "1"})
+    error = requests.HTTPError("429 Too Many Requests", response=response)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=[institution]),
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+        patch("weko_group_cache_db.groups.retry_delay", return_value=0.01),
+        patch("weko_group_cache_db.groups.parse_retry_after", return_value=0.2) as mock_parse,
+    ):
+        mock_fetch_and_cache.return_value = MagicMock(side_effect=[error, CacheResult(1, changed=True)])
+
+        fetch_all(toml_path="institutions.toml")
+
+    mock_parse.assert_called_once_with("1")
+    assert f"Retrying institution {institution.fqdn} in 0.2 seconds." in [
+        record.getMessage() for record in log_capture.records
+    ]
+
+
+def test_fetch_all_waits_for_worker_when_retry_due(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(FETCH_CONCURRENCY=2, FETCH_CONCURRENCY_MAX=2)
+    failed = []
+
+    def _retrieve(institution, _store):
+        if institution is institutions[0] and not failed:
+            failed.append(institution)
+            raise requests.RequestException
+        time.sleep(0.3)
+        return CacheResult(1, changed=True)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=_retrieve),
+        patch("weko_group_cache_db.groups.retry_delay", return_value=0.01),
+        patch.object(AttemptPool, "wait", autospec=True, side_effect=AttemptPool.wait) as mock_wait,
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    # the due retry waits for a worker instead of polling the full pool
+    assert mock_wait.call_count <= 5  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(("initial", "expected"), [(1, 1), (3, 3)])
+def test_fetch_all_adaptive_concurrency_limit(institutions_data, set_test_config, initial, expected):
+    institutions = [Institution(**item) for item in institutions_data(6)]
+    set_test_config(FETCH_CONCURRENCY=initial, FETCH_CONCURRENCY_MAX=6)
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def _retrieve(institution, _store):
+        with lock:
+            active.append(institution)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(institution)
+        return CacheResult(1, changed=True)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=_retrieve),
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    assert max(peak) == expected
+    assert fetch_concurrency.maximum == 6  # noqa: PLR2004
+
+
+def test_fetch_all_pauses_for_retry_after(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config(FETCH_CONCURRENCY=1)
+    pause = 0.2
+    started = []
+
+    def _retrieve(_institution, _store):
+        started.append(time.monotonic())
+        if len(started) == 1:
+            fetch_concurrency.overloaded(pause)
+        return CacheResult(1, changed=True)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=_retrieve),
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    assert started[1] - started[0] >= pause
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (requests.HTTPError(response=MagicMock(headers={"Retry-After": "30"})), 30.0),
+        (requests.HTTPError(response=MagicMock(headers={})), None),
+        (requests.HTTPError(), None),
+        (redis.RedisError(), None),
+    ],
+)
+def test_error_retry_after(error, expected):
+    assert error_retry_after(error) == expected
+
+
+def test_fetch_all_concurrent(institutions_data, set_test_config, log_capture):
+    num_institutions = 3
+    data = institutions_data(num_institutions)
+    institutions = [Institution(**item) for item in data]
+    test_config = set_test_config(FETCH_CONCURRENCY=2, REQUEST_RETRY_FACTOR=0)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+        patch("weko_group_cache_db.groups.setup_rate_limiter") as mock_setup_rate_limiter,
+    ):
+        results = {
+            data[0]["fqdn"]: CacheResult(2, changed=True),
+            data[1]["fqdn"]: redis.RedisError("Cache error"),
+            data[2]["fqdn"]: CacheResult(4, changed=True),
+        }
+
+        def _fetch(institution, _store):
+            result = results[institution.fqdn]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        mock_fetch_and_cache.return_value = MagicMock(side_effect=_fetch)
+
+        with pytest.raises(ExceptionGroup, match=r"Failed to update information from 1 institution\(s\)\.") as eg:
+            fetch_all(toml_path="institutions.toml")
+
+    called = {call[0][0].fqdn for call in mock_fetch_and_cache.return_value.call_args_list}
+    assert called == {item["fqdn"] for item in data}
+    assert all(call[0][1] is mock_store for call in mock_fetch_and_cache.return_value.call_args_list)
+    mock_setup_rate_limiter.assert_called_once_with()
+    messages = {record.getMessage() for record in log_capture.records}
+    assert f"Successfully cached 2 groups for {data[0]['fqdn']}." in messages
+    assert f"Successfully cached 4 groups for {data[2]['fqdn']}." in messages
+    assert (
+        f"Despite retries {test_config.REQUEST_RETRIES} times, failed to cache groups "
+        f"to Redis for institution: {data[1]['fqdn']}."
+    ) in messages
+    assert "Cached groups for 2 institution(s): 2 changed, 0 unchanged." in messages
+    assert len(eg.value.exceptions) == 1
+    error_instance = eg.value.exceptions[0]
+    assert isinstance(error_instance, UpdateError)
+    assert error_instance.fqdn == data[1]["fqdn"]
+    assert isinstance(error_instance.origin, redis.RedisError)
+
+
+def test_fetch_all_streams_institutions(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(FETCH_CONCURRENCY=1)
+    fetched = []
+    fetched_before_loaded = []
+
+    def _load(**_kwargs):
+        for institution in institutions:
+            fetched_before_loaded.append(list(fetched))
+            yield institution
+
+    def _retrieve(institution, _store):
+        fetched.append(institution.fqdn)
+        return CacheResult(1, changed=False)
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", side_effect=_load),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=_retrieve),
+    ):
+        fetch_all(toml_path="institutions.toml")
+
+    assert fetched == [institution.fqdn for institution in institutions]
+    assert fetched_before_loaded == [[], [institutions[0].fqdn], [institutions[0].fqdn, institutions[1].fqdn]]
+
+
+def test_fetch_all_buffered(institutions_data, set_test_config, log_capture):
+    data = institutions_data(3)
+    institutions = [Institution(**item) for item in data]
+    set_test_config(REDIS_FLUSH_SIZE=2, REDIS_FLUSH_INTERVAL=60)
+    error = redis.ResponseError("WRONGTYPE")
+    validators = {data[0]["fqdn"]: {"etag": '"v1"'}, data[1]["fqdn"]: {}, data[2]["fqdn"]: {"etag": '"v3"'}}
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
+        patch(
+            "weko_group_cache_db.groups.get_all_validators",
+            side_effect=lambda _store, fqdns: [validators[fqdn] for fqdn in fqdns],
+        ) as mock_get_all,
+        patch("weko_group_cache_db.groups.get_validators") as mock_get,
+        patch(
+            "weko_group_cache_db.groups.fetch_map_groups",
+            side_effect=[MapGroups(["jc_a"], {}), MapGroups(["jc_a", "jc_b"], {}), MapGroups(["jc_c"], {})],
+        ) as mock_fetch,
+        patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
+        patch("weko_group_cache_db.cache._execute_with_retries") as mock_execute,
+    ):
+        mock_execute.return_value.side_effect = [([1, error], [1, 1]), ([0], [1])]
+
+        with pytest.raises(ExceptionGroup, match=r"Failed to update information from 1 institution\(s\)\.") as eg:
+            fetch_all(toml_path="institutions.toml")
+
+    # validators are read in one pipeline for each batch of the flush size
+    assert mock_get_all.call_args_list == [
+        call(mock_store, [data[0]["fqdn"], data[1]["fqdn"]]),
+        call(mock_store, [data[2]["fqdn"]]),
+    ]
+    mock_get.assert_not_called()
+    assert sorted((args[0].fqdn, args[1]) for args, _ in mock_fetch.call_args_list) == sorted(validators.items())
+    mock_set.assert_not_called()
+    assert mock_execute.return_value.call_args_list[0][0] == (
+        mock_store,
+        [(data[0]["fqdn"], ["jc_a"], {}), (data[1]["fqdn"], ["jc_a", "jc_b"], {})],
+    )
+    assert mock_execute.return_value.call_args_list[1][0] == (mock_store, [(data[2]["fqdn"], ["jc_c"], {})])
+    messages = [record.getMessage() for record in log_capture.records]
+    assert f"Successfully cached 1 groups for {data[0]['fqdn']}." in messages
+    assert f"Failed to cache groups to Redis for institution: {data[1]['fqdn']}." in messages
+    assert f"Successfully cached 1 groups for {data[2]['fqdn']}." in messages
+    assert "Cached groups for 2 institution(s): 1 changed, 1 unchanged." in messages
+    assert len(eg.value.exceptions) == 1
+    update_error = t.cast(UpdateError, eg.value.exceptions[0])
+    assert update_error.fqdn == data[1]["fqdn"]
+    assert update_error.origin is error
+
+
+def test_fetch_all_buffered_expired(institutions_data, set_test_config, log_capture):
+    data = institutions_data(2)
+    institutions = [Institution(**item) for item in data]
+    set_test_config(REDIS_FLUSH_SIZE=2, REDIS_FLUSH_INTERVAL=60)
+    responses = {
+        data[0]["fqdn"]: iter([MapGroups(None, {}), MapGroups(["jc_a"], {"etag": '"v2"'})]),
+        data[1]["fqdn"]: iter([MapGroups(["jc_b"], {})]),
+    }
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
+        patch("weko_group_cache_db.groups.get_all_validators", side_effect=lambda _store, fqdns: [{}] * len(fqdns)),
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
+        patch(
+            "weko_group_cache_db.groups.fetch_map_groups",
+            side_effect=lambda institution, *_: next(responses[institution.fqdn]),
+        ),
+        patch("weko_group_cache_db.groups.set_groups_to_redis", return_value=True) as mock_set,
+        patch("weko_group_cache_db.cache._execute_with_retries") as mock_execute,
+    ):
+        # the touch script returns -1 if the cache has expired
+        mock_execute.return_value.side_effect = lambda _store, pending: (
+            [-1 if group_ids is None else 1 for _, group_ids, _ in pending],
+            [1] * len(pending),
+        )
+
+        fetch_all(toml_path="institutions.toml")
+
+    mock_set.assert_called_once_with(data[0]["fqdn"], ["jc_a"], validators={"etag": '"v2"'}, store=mock_store)
+    messages = [record.getMessage() for record in log_capture.records]
+    assert f"Successfully cached 1 groups for {data[0]['fqdn']}." in messages
+    assert f"Successfully cached 1 groups for {data[1]['fqdn']}." in messages
+    assert "Cached groups for 2 institution(s): 2 changed, 0 unchanged." in messages
+
+
+def test_fetch_all_stale_only(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(STALE_AFTER=3600)
+    now = datetime.now(UTC)
+    freshness = [Freshness(now - timedelta(seconds=7200), 80000), Freshness(now, 80000), Freshness(None, -2)]
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.get_freshness", return_value=freshness) as mock_get_freshness,
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
+    ):
+        mock_func = MagicMock(return_value=CacheResult(1, changed=False))
+        mock_fetch_and_cache.return_value = mock_func
+
+        fetch_all(stale_only=True, toml_path="institutions.toml")
+
+    mock_get_freshness.assert_called_once_with(mock_store, [institution.fqdn for institution in institutions])
+    assert [args[0] for args, _ in mock_func.call_args_list] == [institutions[2], institutions[0]]
+    assert log_capture.records[0].getMessage() == "Refreshing 2 of 3 institution(s) with stale caches."
+
+
+def test_fetch_all_stale_only_none_stale(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config()
+    freshness = [Freshness(datetime.now(UTC), 80000)] * 2
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.iter_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.get_freshness", return_value=freshness),
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+        patch("weko_group_cache_db.groups.setup_rate_limiter"),
+    ):
+        fetch_all(stale_only=True, toml_path="institutions.toml")
+
+    mock_fetch_and_cache.assert_not_called()
+    assert log_capture.records[-1].getMessage() == "Refreshing 0 of 2 institution(s) with stale caches."
+
+
+def test_prefetch_validators_redis_error(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(REDIS_FLUSH_SIZE=2)
+    validators: dict[str, dict[str, str]] = {}
+
+    mock_store = MagicMock()
+    with patch(
+        "weko_group_cache_db.groups.get_all_validators",
+        side_effect=[redis.ConnectionError("Connection refused"), [{"etag": '"v3"'}]],
+    ):
+        assert list(prefetch_validators(institutions, mock_store, validators)) == institutions
+
+    # the failed batch is left to be read for each institution
+    assert validators == {institutions[2].fqdn: {"etag": '"v3"'}}
+    messages = [record.getMessage() for record in log_capture.records]
+    assert "Failed to read validators from Redis for 2 institution(s)." in messages
+
+
+def test_select_stale_oldest_first(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(5)]
+    set_test_config(STALE_AFTER=3600, STALE_TTL_MARGIN=600)
+    now = datetime.now(UTC)
+    freshness = [
+        Freshness(now - timedelta(seconds=4000), 80000),
+        Freshness(None, -2),
+        Freshness(now - timedelta(seconds=60), 300),
+        Freshness(now - timedelta(seconds=60), 80000),
+        Freshness(now - timedelta(seconds=90000), -1),
+    ]
+
+    stale = select_stale(institutions, freshness)
+
+    assert stale == [institutions[1], institutions[4], institutions[0], institutions[2]]
+
+
+def test_shard_of():
+    fqdns = [f"example{i}.ac.jp" for i in range(1, 9)]
+
+    assert [shard_of(fqdn, 2) for fqdn in fqdns] == [0, 0, 1, 0, 1, 0, 0, 1]
+    assert [shard_of(fqdn, 4) for fqdn in fqdns] == [0, 0, 3, 2, 3, 0, 0, 3]
+    assert all(shard_of(fqdn, 1) == 0 for fqdn in fqdns)
+
+
+def test_select_shard(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(8)]
+    set_test_config(SHARD_COUNT=2, SHARD_INDEX=1)
+
+    selected = list(select_shard(institutions))
+
+    assert [institution.fqdn for institution in selected] == ["example3.ac.jp", "example5.ac.jp", "example8.ac.jp"]
+    assert list(select_shard(reversed(institutions))) == selected[::-1]
+    assert log_capture.records[0].getMessage() == "Processing shard 1 of 2 shards."
+
+
+def test_select_shard_partitions_institutions(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(20)]
+    shards = []
+    for index in range(3):
+        set_test_config(SHARD_COUNT=3, SHARD_INDEX=index)
+        shards.append(list(select_shard(institutions)))
+
+    assert sorted(itertools.chain(*shards), key=institutions.index) == institutions
+
+
+def test_select_shard_disabled(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(3)]
+    set_test_config(SHARD_COUNT=1, SHARD_INDEX=0)
+
+    assert list(select_shard(institutions)) == institutions
+    assert not log_capture.records
+
+
 def test_fetch_one_success_toml(institutions_data, set_test_config, log_capture):
     data = institutions_data(2)
     institutions = [Institution(**data[0]), Institution(**data[1])]
@@ -150,17 +769,16 @@ def test_fetch_one_success_toml(institutions_data, set_test_config, log_capture)
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions") as mock_load,
+        patch("weko_group_cache_db.groups.find_institution", return_value=institutions[0]) as mock_find,
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
     ):
-        mock_load.return_value = institutions
         num_groups = 2
-        mock_func = MagicMock(return_value=num_groups)
+        mock_func = MagicMock(return_value=CacheResult(num_groups, changed=True))
         mock_fetch_and_cache.return_value = mock_func
 
         fetch_one(institutions[0].fqdn, toml_path="institutions.toml")
 
-    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_find.assert_called_once_with(institutions[0].fqdn, toml_path="institutions.toml")
     mock_func.assert_called_once_with(institutions[0], mock_store)
     assert log_capture.records[0].getMessage() == f"Successfully cached {num_groups} groups for {data[0]['fqdn']}."
 
@@ -173,17 +791,18 @@ def test_fetch_one_success_directory(institutions_data, set_test_config, log_cap
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions") as mock_load,
+        patch("weko_group_cache_db.groups.find_institution", return_value=institutions[1]) as mock_find,
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
     ):
-        mock_load.return_value = institutions
         num_groups = 3
-        mock_func = MagicMock(return_value=num_groups)
+        mock_func = MagicMock(return_value=CacheResult(num_groups, changed=True))
         mock_fetch_and_cache.return_value = mock_func
 
         fetch_one(institutions[1].fqdn, directory_path="institutions", fqdn_list_file="fqdn_list.txt")
 
-    mock_load.assert_called_once_with(directory_path="institutions", fqdn_list_file="fqdn_list.txt")
+    mock_find.assert_called_once_with(
+        institutions[1].fqdn, directory_path="institutions", fqdn_list_file="fqdn_list.txt"
+    )
     mock_func.assert_called_once_with(institutions[1], mock_store)
     assert log_capture.records[0].getMessage() == f"Successfully cached {num_groups} groups for {data[1]['fqdn']}."
 
@@ -194,13 +813,35 @@ def test_fetch_one_institution_not_found(set_test_config, log_capture):
     fqdn = "notfound.example.com"
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions", return_value=[]),
+        patch("weko_group_cache_db.groups.find_institution", return_value=None),
         pytest.raises(ValueError, match=r"Institution with FQDN [\w\.]+ not found."),
     ):
         fetch_one(fqdn, toml_path="institutions.toml")
     assert log_capture.records[0].getMessage() == f"Institution with FQDN {fqdn} not found."
 
 
+def test_fetch_one_load_all(institutions_data, set_test_config):
+    data = institutions_data(2)
+    institutions = [Institution(**data[0]), Institution(**data[1])]
+    set_test_config()
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.load_institutions", return_value=institutions) as mock_load,
+        patch("weko_group_cache_db.groups.find_institution") as mock_find,
+        patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
+    ):
+        mock_func = MagicMock(return_value=CacheResult(1, changed=True))
+        mock_fetch_and_cache.return_value = mock_func
+
+        fetch_one(institutions[1].fqdn, load_all=True, toml_path="institutions.toml")
+
+    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_find.assert_not_called()
+    mock_func.assert_called_once_with(institutions[1], mock_store)
+
+
 def test_fetch_one_request_error(institutions_data, set_test_config, log_capture):
     data = institutions_data(1)
     institutions = [Institution(**data[0])]
@@ -209,7 +850,7 @@ def test_fetch_one_request_error(institutions_data, set_test_config, log_capture
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.find_institution", return_value=institutions[0]),
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
     ):
         mock_func = MagicMock(side_effect=requests.RequestException("Request failed"))
@@ -225,6 +866,67 @@ def test_fetch_one_request_error(institutions_data, set_test_config, log_capture
     )
 
 
+def test_fetch_one_keeps_stale_cache(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(REQUEST_RETRIES=0, STALE_WHILE_REVALIDATE=True)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.find_institution", return_value=institution),
+        patch(
+            "weko_group_cache_db.groups.fetch_and_cache",
+            return_value=MagicMock(side_effect=requests.RequestException("Request failed")),
+        ),
+        patch("weko_group_cache_db.cache.extend_caches", return_value=[institution.fqdn]) as mock_extend,
+        pytest.raises(UpdateError),
+    ):
+        fetch_one(institution.fqdn, toml_path="institutions.toml")
+
+    mock_extend.assert_called_once_with(mock_store, [institution.fqdn])
+
+
+def test_fetch_one_certificate_error(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    error = CertificateError(institution.fqdn, "certificate and key do not match")
+
+    with (
+        patch("weko_group_cache_db.groups.connection"),
+        patch("weko_group_cache_db.groups.find_institution", return_value=institution),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=MagicMock(side_effect=error)),
+        pytest.raises(UpdateError) as excinfo,
+    ):
+        fetch_one(institution.fqdn, toml_path="institutions.toml")
+
+    assert excinfo.value.origin is error
+    assert log_capture.records[0].getMessage() == str(error)
+
+
+def test_fetch_one_circuit_open(institutions_data, set_test_config, log_capture):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    error = CircuitOpenError("https://sample.gakunin.jp/api/groups/", 30)
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.connection", return_value=mock_store),
+        patch("weko_group_cache_db.groups.find_institution", return_value=institution),
+        patch("weko_group_cache_db.groups.fetch_and_cache", return_value=MagicMock(side_effect=error)) as mock_fetch,
+        patch("weko_group_cache_db.groups.keep_stale") as mock_keep_stale,
+        pytest.raises(UpdateError) as excinfo,
+    ):
+        fetch_one(institution.fqdn, toml_path="institutions.toml")
+
+    mock_fetch.return_value.assert_called_once()
+    assert excinfo.value.origin is error
+    mock_keep_stale.assert_called_once_with(mock_store, [institution.fqdn])
+    assert log_capture.records[0].getMessage() == (
+        f"Skipped institution {institution.fqdn}: "
+        "Circuit breaker of https://sample.gakunin.jp/api/groups/ is open for 30.0 more seconds."
+    )
+
+
 def test_fetch_one_redis_error(institutions_data, set_test_config, log_capture):
     data = institutions_data(1)
     institutions = [Institution(**data[0])]
@@ -233,7 +935,7 @@ def test_fetch_one_redis_error(institutions_data, set_test_config, log_capture):
     mock_store = MagicMock()
     with (
         patch("weko_group_cache_db.groups.connection", return_value=mock_store),
-        patch("weko_group_cache_db.groups.load_institutions", return_value=institutions),
+        patch("weko_group_cache_db.groups.find_institution", return_value=institutions[0]),
         patch("weko_group_cache_db.groups.fetch_and_cache") as mock_fetch_and_cache,
     ):
         mock_func = MagicMock(side_effect=redis.RedisError("Cache error"))
@@ -257,17 +959,98 @@ def test_fetch_and_cache_success(institutions_data, set_test_config):
 
     mock_store = MagicMock()
     with (
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
         patch("weko_group_cache_db.groups.fetch_map_groups") as mock_fetch,
         patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
     ):
-        mock_fetch.return_value = groups
+        mock_fetch.return_value = MapGroups(groups, {})
+        mock_set.return_value = True
 
         func = fetch_and_cache()
-        count = func(institution, mock_store)
+        result = func(institution, mock_store)
+
+    assert result == CacheResult(len(groups), changed=True)
+    mock_fetch.assert_called_once_with(institution, {})
+    mock_set.assert_called_once_with(institution.fqdn, groups, validators={}, store=mock_store)
+
+
+def test_fetch_and_cache_buffered(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    groups = ["jc_group1", "jc_group2"]
+
+    mock_buffer = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
+        patch("weko_group_cache_db.groups.fetch_map_groups", return_value=MapGroups(groups, {"etag": '"v1"'})),
+        patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
+    ):
+        result = fetch_and_cache(mock_buffer)(institution, MagicMock())
+
+    assert result is None
+    mock_set.assert_not_called()
+    mock_buffer.add.assert_called_once_with(institution.fqdn, groups, {"etag": '"v1"'})
+
+
+def test_fetch_and_cache_not_modified(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    validators = {"etag": '"v1"'}
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.get_validators", return_value=validators),
+        patch("weko_group_cache_db.groups.fetch_map_groups", return_value=MapGroups(None, validators)) as mock_fetch,
+        patch("weko_group_cache_db.groups.touch_groups", return_value=3) as mock_touch,
+        patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
+    ):
+        result = fetch_and_cache()(institution, mock_store)
 
-    assert count == len(groups)
-    mock_fetch.assert_called_once_with(institution)
-    mock_set.assert_called_once_with(institution.fqdn, groups, store=mock_store)
+    assert result == CacheResult(3, changed=False)
+    mock_fetch.assert_called_once_with(institution, validators)
+    mock_touch.assert_called_once_with(institution.fqdn, store=mock_store)
+    mock_set.assert_not_called()
+
+
+def test_fetch_and_cache_not_modified_expired(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    validators = {"etag": '"v1"'}
+    groups = ["jc_group1", "jc_group2"]
+
+    mock_store = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.get_validators", return_value=validators),
+        patch(
+            "weko_group_cache_db.groups.fetch_map_groups",
+            side_effect=[MapGroups(None, validators), MapGroups(groups, {"etag": '"v2"'})],
+        ) as mock_fetch,
+        patch("weko_group_cache_db.groups.touch_groups", return_value=-1),
+        patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
+    ):
+        mock_set.return_value = True
+        result = fetch_and_cache()(institution, mock_store)
+
+    assert result == CacheResult(len(groups), changed=True)
+    assert mock_fetch.call_args_list[1] == call(institution)
+    mock_set.assert_called_once_with(institution.fqdn, groups, validators={"etag": '"v2"'}, store=mock_store)
+
+
+def test_fetch_and_cache_not_modified_buffered(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+
+    mock_buffer = MagicMock()
+    with (
+        patch("weko_group_cache_db.groups.get_validators", return_value={"etag": '"v1"'}),
+        patch("weko_group_cache_db.groups.fetch_map_groups", return_value=MapGroups(None, {"etag": '"v1"'})),
+        patch("weko_group_cache_db.groups.touch_groups") as mock_touch,
+    ):
+        fetch_and_cache(mock_buffer)(institution, MagicMock())
+
+    mock_touch.assert_not_called()
+    mock_buffer.touch.assert_called_once_with(institution.fqdn)
+    mock_buffer.add.assert_not_called()
 
 
 def test_fetch_and_cache_all_request_exception(institutions_data, set_test_config, log_capture):
@@ -277,6 +1060,7 @@ def test_fetch_and_cache_all_request_exception(institutions_data, set_test_confi
 
     mock_store = MagicMock()
     with (
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
         patch("weko_group_cache_db.groups.fetch_map_groups") as mock_fetch,
         patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
     ):
@@ -294,6 +1078,22 @@ def test_fetch_and_cache_all_request_exception(institutions_data, set_test_confi
     )
 
 
+def test_fetch_and_cache_certificate_error(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    error = CertificateError(institution.fqdn, "certificate and key do not match")
+
+    with (
+        patch("weko_group_cache_db.groups.check_certificate", side_effect=error) as mock_check,
+        patch("weko_group_cache_db.groups.fetch_map_groups") as mock_fetch,
+        pytest.raises(CertificateError),
+    ):
+        fetch_and_cache()(institution, MagicMock())
+
+    mock_check.assert_called_once_with(institution)
+    mock_fetch.assert_not_called()
+
+
 def test_fetch_and_cache_all_redis_error(institutions_data, set_test_config, log_capture):
     data = institutions_data(1)
     institution = Institution(**data[0])
@@ -302,10 +1102,11 @@ def test_fetch_and_cache_all_redis_error(institutions_data, set_test_config, log
 
     mock_store = MagicMock()
     with (
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
         patch("weko_group_cache_db.groups.fetch_map_groups") as mock_fetch,
         patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
     ):
-        mock_fetch.return_value = groups
+        mock_fetch.return_value = MapGroups(groups, {})
         mock_set.side_effect = redis.RedisError("Cache error")
 
         func = fetch_and_cache()
@@ -328,18 +1129,23 @@ def test_fetch_and_cache_success_after_retries(institutions_data, set_test_confi
 
     mock_store = MagicMock()
     with (
+        patch("weko_group_cache_db.groups.get_validators", return_value={}),
         patch("weko_group_cache_db.groups.fetch_map_groups") as mock_fetch,
         patch("weko_group_cache_db.groups.set_groups_to_redis") as mock_set,
     ):
         retries_fetch = 2
-        mock_fetch.side_effect = [requests.RequestException("Request failed"), groups, groups]
+        mock_fetch.side_effect = [
+            requests.RequestException("Request failed"),
+            MapGroups(groups, {}),
+            MapGroups(groups, {}),
+        ]
         retries_set = 1
-        mock_set.side_effect = [redis.RedisError("Cache error"), None]
+        mock_set.side_effect = [redis.RedisError("Cache error"), False]
 
         func = fetch_and_cache()
-        count = func(institution, mock_store)
+        result = func(institution, mock_store)
 
-    assert count == len(groups)
+    assert result == CacheResult(len(groups), changed=False)
     assert mock_fetch.call_count == retries_fetch + 1
     assert mock_set.call_count == retries_set + 1
     assert any(
@@ -361,80 +1167,330 @@ def test_fetch_map_groups(institutions_data, set_test_config):
         ],
     }
 
-    with patch("weko_group_cache_db.groups.requests.get") as mock_get:
-        mock_get.return_value.json.return_value = response
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.return_value.content = json.dumps(response).encode()
+
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {"ETag": '"v1"'}
 
         result = fetch_map_groups(institution)
-        assert result == ["jc_group1", "jc_group2"]
+        assert result == MapGroups(["jc_group1", "jc_group2"], {"etag": '"v1"'})
+
+    mock_rate_limiter.acquire.assert_called_once_with()
+    mock_session_pool.checkout.assert_called_once_with(institution.client_cert_path, institution.client_key_path)
+    mock_get.assert_called_once_with(
+        f"https://sample.gakunin.jp/api/groups/{institution.sp_connector_id}",
+        params=None,
+        headers={},
+        timeout=20,
+        stream=False,
+    )
+    mock_get.return_value.close.assert_called_once_with()
 
 
-def test_set_groups_to_redis(institutions_data, set_test_config):
-    data = institutions_data(1)
-    institution = Institution(**data[0])
-    test_config = set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=100)
-    timestamp = datetime.now(UTC).isoformat(timespec="seconds")
-    groups = ["jc_group1", "jc_group2"]
-    transformed_fqdn = institution.fqdn.replace(".", "_").replace("-", "_")
-    redis_key = transformed_fqdn + "_suffix"
+def test_fetch_map_groups_stream(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(STREAM_RESPONSES=True)
+    content = b'{"totalResults": 2, "entry": [{"id": "jc_group1"}, {"id": "jc_group2"}]}'
 
-    mock_store = MagicMock()
     with (
-        patch("weko_group_cache_db.groups.connection") as mock_conn,
-        patch("weko_group_cache_db.groups.datetime") as mock_datetime,
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
     ):
-        mock_datetime.now.return_value.isoformat.return_value = timestamp
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.iter_content.return_value = [content[:20], content[20:50], content[50:]]
+
+        result = fetch_map_groups(institution)
 
-        set_groups_to_redis(institution.fqdn, groups, store=mock_store)
+    assert result == MapGroups(["jc_group1", "jc_group2"], {})
+    assert mock_get.call_args.kwargs["stream"] is True
+    mock_get.return_value.iter_content.assert_called_once_with(65536)
+    mock_get.return_value.close.assert_called_once_with()
 
-    mock_conn.assert_not_called()
-    mock_store.hset.assert_called_once_with(redis_key, mapping={"updated_at": timestamp, "groups": ",".join(groups)})
-    mock_store.persist.assert_called_once_with(redis_key)
-    mock_store.expire.assert_called_once_with(redis_key, test_config.CACHE_TTL)
 
+@pytest.mark.parametrize("stream", [False, True])
+def test_fetch_map_groups_invalid_body(institutions_data, set_test_config, stream):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(STREAM_RESPONSES=stream, JSON_DECODER="json")
 
-def test_set_groups_to_redis_no_store(institutions_data, set_test_config):
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = b"<html>Service Unavailable</html>"
+        mock_get.return_value.iter_content.return_value = [b"<html>Service Unavailable</html>"]
+
+        with pytest.raises(requests.exceptions.InvalidJSONError):
+            fetch_map_groups(institution)
+
+
+def test_fetch_map_groups_circuit_open(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(CIRCUIT_BREAKER_THRESHOLD=2)
+    failed = MagicMock(status_code=503)
+    failed.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error", response=failed)
+    breaker = setup_circuit_breaker()
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.return_value = failed
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.HTTPError):
+                fetch_map_groups(institution)
+
+        with pytest.raises(CircuitOpenError):
+            fetch_map_groups(institution)
+
+    assert breaker.state == "open"
+    assert mock_get.call_count == 2  # noqa: PLR2004
+
+
+def test_fetch_map_groups_overloaded(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(FETCH_CONCURRENCY=4)
+    controller = setup_fetch_concurrency()
+    overloaded = MagicMock(status_code=429, headers={"Retry-After": "30"})
+    overloaded.raise_for_status.side_effect = requests.exceptions.HTTPError("429", response=overloaded)
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+    ):
+        mock_session_pool.checkout.return_value.__enter__.return_value.get.return_value = overloaded
+        with pytest.raises(requests.exceptions.HTTPError):
+            fetch_map_groups(institution)
+
+    assert controller.limit == 2  # noqa: PLR2004
+    assert 29 < controller.pause() <= 30  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("outcome", "expected"),
+    [
+        (MagicMock(status_code=200, headers={}, content=b"{}"), call(ANY, failed=False)),
+        (MagicMock(status_code=500, headers={}), call(ANY, failed=True)),
+        (requests.ConnectionError("Connection refused"), call(ANY, failed=True)),
+        (requests.exceptions.SSLError("certificate required"), None),
+    ],
+)
+def test_fetch_map_groups_observes_latency(institutions_data, set_test_config, outcome, expected):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(JSON_DECODER="json")
+    if isinstance(outcome, MagicMock) and outcome.status_code >= 500:  # noqa: PLR2004
+        outcome.raise_for_status.side_effect = requests.exceptions.HTTPError("500", response=outcome)
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+        patch("weko_group_cache_db.groups.fetch_concurrency", new_callable=MagicMock) as mock_concurrency,
+        contextlib.suppress(requests.RequestException),
+    ):
+        mock_session_pool.checkout.return_value.__enter__.return_value.get.side_effect = [outcome]
+        fetch_map_groups(institution)
+
+    assert mock_concurrency.observe.call_args_list == ([expected] if expected else [])
+    mock_concurrency.overloaded.assert_not_called()
+
+
+def test_fetch_map_groups_not_modified(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config()
+    validators = {"etag": '"v1"', "last_modified": "Mon, 17 Nov 2025 00:00:00 GMT"}
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.return_value.status_code = 304
+
+        result = fetch_map_groups(institution, validators)
+
+    assert result == MapGroups(None, validators)
+    assert mock_get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 17 Nov 2025 00:00:00 GMT",
+    }
+    mock_get.return_value.raise_for_status.assert_not_called()
+
+
+def _page_response(total, start, count):
+    response = MagicMock(status_code=200, headers={"ETag": f'"p{start}"'})
+    response.content = json.dumps(
+        {
+            "totalResults": total,
+            "startIndex": start,
+            "itemsPerPage": count,
+            "entry": [{"id": f"jc_group{index}"} for index in range(start, min(start + count, total + 1))],
+        }
+    ).encode()
+    return response
+
+
+def test_fetch_map_groups_paginated(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(PAGE_SIZE=2, PAGE_CONCURRENCY=2)
+
+    def _get(_endpoint, *, params, **_kwargs):
+        return _page_response(5, params["startIndex"], params["count"])
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock) as mock_rate_limiter,
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.side_effect = _get
+
+        result = fetch_map_groups(institution, {"etag": '"v1"'})
+
+    assert result == MapGroups([f"jc_group{index}" for index in range(1, 6)], {})
+    assert mock_rate_limiter.acquire.call_count == mock_get.call_count
+    mock_session_pool.checkout.assert_called_once_with(institution.client_cert_path, institution.client_key_path)
+    assert sorted(c.kwargs["params"]["startIndex"] for c in mock_get.call_args_list) == [1, 3, 5]
+    assert mock_get.call_args_list[0].kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert all(c.kwargs["headers"] == {} for c in mock_get.call_args_list[1:])
+
+
+def test_fetch_map_groups_single_page(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(PAGE_SIZE=10)
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.return_value = _page_response(3, 1, 10)
+
+        result = fetch_map_groups(institution)
+
+    assert result == MapGroups(["jc_group1", "jc_group2", "jc_group3"], {"etag": '"p1"'})
+    mock_get.assert_called_once()
+    assert mock_get.call_args.kwargs["params"] == {"startIndex": 1, "count": 10}
+
+
+def test_fetch_map_groups_page_failed(institutions_data, set_test_config):
+    institution = Institution(**institutions_data(1)[0])
+    set_test_config(PAGE_SIZE=2, PAGE_CONCURRENCY=1)
+    failed = MagicMock(status_code=503)
+    failed.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error")
+
+    with (
+        patch("weko_group_cache_db.groups.session_pool", new_callable=MagicMock) as mock_session_pool,
+        patch("weko_group_cache_db.groups.rate_limiter", new_callable=MagicMock),
+    ):
+        mock_get = mock_session_pool.checkout.return_value.__enter__.return_value.get
+        mock_get.side_effect = [_page_response(5, 1, 2), failed, _page_response(5, 5, 2)]
+
+        with pytest.raises(requests.exceptions.HTTPError, match="503"):
+            fetch_map_groups(institution)
+
+
+@pytest.mark.parametrize(
+    ("page_size", "page", "expected"),
+    [
+        (0, GroupPage(["a"], 10, 1, 1), []),
+        (2, GroupPage(["a", "b"]), []),
+        (2, GroupPage(["a", "b"], 2, 1, 2), []),
+        (2, GroupPage(["a", "b"], 7, 1, 2), [3, 5, 7]),
+        (100, GroupPage(["a", "b"], 5, 1, 2), [3, 5]),
+        (2, GroupPage(["a", "b"], 6), [3, 5]),
+        (2, GroupPage([], 6, 1, 0), []),
+    ],
+)
+def test_remaining_page_starts(set_test_config, page_size, page, expected):
+    set_test_config(PAGE_SIZE=page_size)
+
+    assert remaining_page_starts(page) == expected
+
+
+def test_merge_pages():
+    pages = [GroupPage(["c", "d"]), None, GroupPage(["e"])]
+
+    assert merge_pages(GroupPage(["a", "b"]), pages) == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.parametrize("changed", [1, 0])
+def test_set_groups_to_redis(institutions_data, set_test_config, changed):
     data = institutions_data(1)
     institution = Institution(**data[0])
     test_config = set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=100)
     timestamp = datetime.now(UTC).isoformat(timespec="seconds")
-    groups = ["jc_group1", "jc_group2"]
+    groups = ["jc_group2", "jc_group1"]
     transformed_fqdn = institution.fqdn.replace(".", "_").replace("-", "_")
     redis_key = transformed_fqdn + "_suffix"
 
     mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [changed]
     with (
-        patch("weko_group_cache_db.groups.connection", return_value=mock_store) as mock_conn,
-        patch("weko_group_cache_db.groups.datetime") as mock_datetime,
+        patch("weko_group_cache_db.groups.connection") as mock_conn,
+        patch("weko_group_cache_db.cache.datetime") as mock_datetime,
     ):
         mock_datetime.now.return_value.isoformat.return_value = timestamp
 
-        set_groups_to_redis(institution.fqdn, groups)
+        result = set_groups_to_redis(institution.fqdn, groups, validators={"etag": '"v1"'}, store=mock_store)
 
-    mock_conn.assert_called_once()
-    mock_store.hset.assert_called_once_with(redis_key, mapping={"updated_at": timestamp, "groups": ",".join(groups)})
-    mock_store.persist.assert_called_once_with(redis_key)
-    mock_store.expire.assert_called_once_with(redis_key, test_config.CACHE_TTL)
+    assert result is bool(changed)
+    mock_conn.assert_not_called()
+    mock_store.pipeline.assert_called_once_with(transaction=True)
+    mock_pipe.eval.assert_called_once_with(
+        WRITE_SCRIPT,
+        1,
+        redis_key,
+        timestamp,
+        test_config.CACHE_TTL,
+        groups_digest(["jc_group1", "jc_group2"]),
+        "jc_group2,jc_group1",
+        '"v1"',
+        "",
+    )
+    mock_pipe.execute.assert_called_once_with()
+    mock_store.hset.assert_not_called()
 
 
-def test_set_groups_to_redis_no_expire(institutions_data, set_test_config):
+def test_set_groups_to_redis_no_store(institutions_data, set_test_config):
     data = institutions_data(1)
     institution = Institution(**data[0])
     set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=-1)
-    timestamp = datetime.now(UTC).isoformat(timespec="seconds")
     groups = ["jc_group1", "jc_group2"]
     transformed_fqdn = institution.fqdn.replace(".", "_").replace("-", "_")
     redis_key = transformed_fqdn + "_suffix"
 
     mock_store = MagicMock()
-    with (
-        patch("weko_group_cache_db.groups.connection") as mock_conn,
-        patch("weko_group_cache_db.groups.datetime") as mock_datetime,
-    ):
-        mock_datetime.now.return_value.isoformat.return_value = timestamp
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [1]
+    with patch("weko_group_cache_db.groups.connection", return_value=mock_store) as mock_conn:
+        set_groups_to_redis(institution.fqdn, groups)
 
-        set_groups_to_redis(institution.fqdn, groups, store=mock_store)
+    mock_conn.assert_called_once()
+    args = mock_pipe.eval.call_args[0]
+    assert args[2] == redis_key
+    assert args[4] == -1
+    assert args[7:] == ("", "")
+    mock_pipe.execute.assert_called_once_with()
 
-    mock_conn.assert_not_called()
-    mock_store.hset.assert_called_once_with(redis_key, mapping={"updated_at": timestamp, "groups": ",".join(groups)})
-    mock_store.persist.assert_called_once_with(redis_key)
-    mock_store.expire.assert_not_called()
+
+def test_touch_groups(set_test_config):
+    set_test_config(CACHE_KEY_SUFFIX="_suffix", CACHE_TTL=100)
+
+    mock_store = MagicMock()
+    mock_pipe = mock_store.pipeline.return_value.__enter__.return_value
+    mock_pipe.execute.return_value = [2]
+    with patch("weko_group_cache_db.groups.connection", return_value=mock_store) as mock_conn:
+        assert touch_groups("example-1.ac.jp") == 2  # noqa: PLR2004
+
+    mock_conn.assert_called_once_with()
+    mock_store.pipeline.assert_called_once_with(transaction=False)
+    assert mock_pipe.eval.call_args[0][1:3] == (1, "example_1_ac_jp_suffix")
@@ -2,6 +2,11 @@
 # Copyright (C) 2025 National Institute of Informatics.
 #
 
+import os
+import subprocess  # noqa: S404
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
 from tomllib import TOMLDecodeError
 from unittest.mock import patch
 
@@ -10,32 +15,52 @@ import pytest
 from pydantic_core import ValidationError
 
 from weko_group_cache_db import loader
-from weko_group_cache_db.exc import ConfigurationError
+from weko_group_cache_db.exc import CertificateError, ConfigurationError
 from weko_group_cache_db.loader import (
+    CertificateStatus,
     Institution,
+    certificate_not_after,
+    check_certificate,
     check_existence_file,
+    find_institution,
+    find_institution_in_directory,
+    find_institution_in_toml,
+    index_directory,
+    inspect_certificate,
+    iter_institutions,
+    iter_institutions_from_directory,
+    iter_institutions_from_toml,
     load_institutions,
     load_institutions_from_directory,
     load_institutions_from_toml,
+    manifest_key,
+    preflight_certificates,
+    read_fqdn_list,
+    read_manifest,
+    write_manifest,
 )
+from weko_group_cache_db.session import load_ssl_context
 
 
 # def load_institutions(**kwargs: t.Unpack[InstitutionSource]) -> list[Institution]:
-def test_load_institutions_toml():
+def test_load_institutions_toml(set_test_config):
+    set_test_config()
     with patch("weko_group_cache_db.loader.load_institutions_from_toml") as mock_load:
         load_institutions(toml_path="institutions.toml")
 
-    mock_load.assert_called_once_with("institutions.toml")
+    mock_load.assert_called_once_with("institutions.toml", skipped=[])
 
 
-def test_load_institutions_directory():
+def test_load_institutions_directory(set_test_config):
+    set_test_config()
     with patch("weko_group_cache_db.loader.load_institutions_from_directory") as mock_load:
         load_institutions(directory_path="institutions", fqdn_list_file="fqdn_list.txt")
 
-    mock_load.assert_called_once_with("institutions", "fqdn_list.txt")
+    mock_load.assert_called_once_with("institutions", "fqdn_list.txt", skipped=[])
 
 
-def test_load_institutions_invalid(log_capture):
+def test_load_institutions_invalid(set_test_config, log_capture):
+    set_test_config(MANIFEST_CACHE_PATH="manifest.pickle")
     with (
         patch("weko_group_cache_db.loader.load_institutions_from_toml") as mock_load_toml,
         patch("weko_group_cache_db.loader.load_institutions_from_directory") as mock_load_directory,
@@ -47,6 +72,211 @@ def test_load_institutions_invalid(log_capture):
     assert log_capture.records[0].getMessage() == "Invalid institution source configuration."
 
 
+def institutions_with_files(tmp_path, data):
+    for item in data:
+        for field in ("client_cert_path", "client_key_path"):
+            path = tmp_path / Path(item[field]).name
+            path.write_text(field)
+            item[field] = str(path)
+    return [Institution(**item) for item in data]
+
+
+def test_load_institutions_manifest_cache(tmp_path, institutions_data, set_test_config, log_capture):
+    manifest_path = tmp_path / "institutions.manifest"
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    set_test_config(MANIFEST_CACHE_PATH=str(manifest_path))
+    institutions = institutions_with_files(tmp_path, institutions_data(2))
+
+    with patch("weko_group_cache_db.loader.load_institutions_from_toml", return_value=institutions) as mock_load:
+        first = load_institutions(toml_path=str(toml_path))
+        second = load_institutions(toml_path=str(toml_path))
+
+    mock_load.assert_called_once_with(str(toml_path), skipped=[])
+    assert manifest_path.exists()
+    assert first == institutions
+    assert second == institutions
+    assert log_capture.records[-1].getMessage() == "2 institutions loaded from manifest cache."
+
+
+def test_load_institutions_manifest_cache_invalidated(tmp_path, institutions_data, set_test_config):
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    set_test_config(MANIFEST_CACHE_PATH=str(tmp_path / "institutions.manifest"))
+    institutions = institutions_with_files(tmp_path, institutions_data(2))
+
+    with patch(
+        "weko_group_cache_db.loader.load_institutions_from_toml", side_effect=[institutions, institutions[:1]]
+    ) as mock_load:
+        load_institutions(toml_path=str(toml_path))
+        toml_path.write_text("[[institutions]]\n# changed\n")
+        reloaded = load_institutions(toml_path=str(toml_path))
+
+    assert mock_load.call_count == 2  # noqa: PLR2004
+    assert reloaded == institutions[:1]
+
+
+def test_load_institutions_manifest_cache_tls_files_changed(tmp_path, institutions_data, set_test_config):
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    set_test_config(MANIFEST_CACHE_PATH=str(tmp_path / "institutions.manifest"))
+    institutions = institutions_with_files(tmp_path, institutions_data(2))
+
+    with patch(
+        "weko_group_cache_db.loader.load_institutions_from_toml", side_effect=[institutions, institutions, []]
+    ) as mock_load:
+        load_institutions(toml_path=str(toml_path))
+        Path(institutions[0].client_cert_path).write_text("renewed certificate", encoding="ascii")
+        load_institutions(toml_path=str(toml_path))
+        Path(institutions[1].client_key_path).unlink()
+        reloaded = load_institutions(toml_path=str(toml_path))
+
+    assert mock_load.call_count == 3  # noqa: PLR2004
+    assert reloaded == []
+
+
+def test_load_institutions_manifest_cache_skipped_files_provisioned(tmp_path, set_test_config):
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text(
+        "".join(
+            f'[[institutions]]\nname = "{fqdn}"\nfqdn = "{fqdn}"\nsp_connector_id = "jc_{fqdn[0]}"\n'
+            f'client_cert_path = "{tmp_path / fqdn}.crt"\nclient_key_path = "{tmp_path / fqdn}.key"\n'
+            for fqdn in ("a.jp", "b.jp")
+        )
+    )
+    set_test_config(MANIFEST_CACHE_PATH=str(tmp_path / "institutions.manifest"))
+    for suffix in (".crt", ".key"):
+        (tmp_path / f"a.jp{suffix}").write_text(suffix)
+
+    assert [institution.fqdn for institution in load_institutions(toml_path=str(toml_path))] == ["a.jp"]
+    assert [institution.fqdn for institution in load_institutions(toml_path=str(toml_path))] == ["a.jp"]
+    (tmp_path / "b.jp.crt").write_text(".crt")
+    assert [institution.fqdn for institution in load_institutions(toml_path=str(toml_path))] == ["a.jp"]
+    (tmp_path / "b.jp.key").write_text(".key")
+    reloaded = load_institutions(toml_path=str(toml_path))
+
+    assert [institution.fqdn for institution in reloaded] == ["a.jp", "b.jp"]
+
+
+def test_iter_institutions_manifest_cache_skipped_files_provisioned(tmp_path, set_test_config):
+    directory_path = tmp_path / "certs"
+    for fqdn in ("a.jp", "b.jp"):
+        (directory_path / fqdn).mkdir(parents=True)
+    for name in ("server.crt", "server.key"):
+        (directory_path / "a.jp" / name).write_text(name)
+    fqdn_list_file = tmp_path / "fqdn_list.txt"
+    fqdn_list_file.write_text("a.jp\nb.jp\n")
+    set_test_config(MANIFEST_CACHE_PATH=str(tmp_path / "institutions.manifest"))
+    source = {"directory_path": str(directory_path), "fqdn_list_file": str(fqdn_list_file)}
+
+    assert [institution.fqdn for institution in iter_institutions(**source)] == ["a.jp"]
+    # adding files to a subdirectory does not change the top-level directory
+    for name in ("server.crt", "server.key"):
+        (directory_path / "b.jp" / name).write_text(name)
+    reloaded = list(iter_institutions(**source))
+
+    assert [institution.fqdn for institution in reloaded] == ["a.jp", "b.jp"]
+
+
+# def iter_institutions(**kwargs: t.Unpack[InstitutionSource]) -> t.Iterator[Institution]:
+def test_iter_institutions_toml(set_test_config):
+    set_test_config()
+    with patch("weko_group_cache_db.loader.iter_institutions_from_toml", return_value=iter([])) as mock_iter:
+        assert list(iter_institutions(toml_path="institutions.toml")) == []
+
+    mock_iter.assert_called_once_with("institutions.toml", skipped=[])
+
+
+def test_iter_institutions_directory(set_test_config):
+    set_test_config()
+    with patch("weko_group_cache_db.loader.iter_institutions_from_directory", return_value=iter([])) as mock_iter:
+        assert list(iter_institutions(directory_path="institutions", fqdn_list_file="fqdn_list.txt")) == []
+
+    mock_iter.assert_called_once_with("institutions", "fqdn_list.txt", skipped=[])
+
+
+def test_iter_institutions_invalid(set_test_config, log_capture):
+    set_test_config()
+
+    assert list(iter_institutions()) == []
+    assert log_capture.records[0].getMessage() == "Invalid institution source configuration."
+
+
+def test_iter_institutions_manifest_cache(tmp_path, institutions_data, set_test_config):
+    manifest_path = tmp_path / "institutions.manifest"
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    set_test_config(MANIFEST_CACHE_PATH=str(manifest_path))
+    institutions = institutions_with_files(tmp_path, institutions_data(2))
+
+    with patch("weko_group_cache_db.loader.iter_institutions_from_toml", return_value=iter(institutions)) as mock_iter:
+        streamed = iter_institutions(toml_path=str(toml_path))
+        assert next(streamed) == institutions[0]
+        assert not manifest_path.exists()
+        assert list(streamed) == institutions[1:]
+        cached = list(iter_institutions(toml_path=str(toml_path)))
+
+    mock_iter.assert_called_once_with(str(toml_path), skipped=[])
+    assert manifest_path.exists()
+    assert cached == institutions
+
+
+def test_manifest_key(tmp_path, set_test_config):
+    set_test_config(SP_CONNECTOR_ID_PREFIX="jc_")
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    directory_path = tmp_path / "certs"
+    directory_path.mkdir()
+    fqdn_list_file = tmp_path / "fqdn_list.txt"
+    fqdn_list_file.write_text("example.ac.jp\n")
+
+    toml_key = manifest_key(toml_path=str(toml_path))
+    directory_key = manifest_key(directory_path=directory_path, fqdn_list_file=fqdn_list_file)
+
+    stat = toml_path.stat()
+    assert toml_key == (loader.MANIFEST_VERSION, "jc_", (str(toml_path.resolve()), stat.st_mtime_ns, stat.st_size))
+    assert directory_key is not None
+    assert [item[0] for item in directory_key[2:]] == [str(directory_path.resolve()), str(fqdn_list_file.resolve())]
+    set_test_config(SP_CONNECTOR_ID_PREFIX="sp_")
+    assert manifest_key(directory_path=directory_path, fqdn_list_file=fqdn_list_file) != directory_key
+
+
+def test_manifest_key_invalid(tmp_path, set_test_config):
+    set_test_config()
+
+    assert manifest_key() is None
+    assert manifest_key(toml_path=tmp_path / "missing.toml") is None
+
+
+def test_read_manifest_other_key(tmp_path, institutions_data, set_test_config):
+    set_test_config(MANIFEST_CACHE_PATH=str(tmp_path / "institutions.manifest"))
+    institutions = institutions_with_files(tmp_path, institutions_data(1))
+
+    assert read_manifest(("key",)) is None
+    write_manifest(("key",), institutions)
+    assert read_manifest(("key",)) == institutions
+    assert read_manifest(("other",)) is None
+
+
+def test_read_manifest_broken(tmp_path, set_test_config, log_capture):
+    manifest_path = tmp_path / "institutions.manifest"
+    manifest_path.write_bytes(b"broken")
+    set_test_config(MANIFEST_CACHE_PATH=str(manifest_path))
+
+    assert read_manifest(("key",)) is None
+    assert log_capture.records[0].getMessage() == f"Ignored unreadable manifest cache: {manifest_path}"
+
+
+def test_write_manifest_error(tmp_path, set_test_config, log_capture):
+    manifest_path = tmp_path / "missing" / "institutions.manifest"
+    set_test_config(MANIFEST_CACHE_PATH=str(manifest_path))
+
+    write_manifest(("key",), [])
+
+    assert not manifest_path.exists()
+    assert log_capture.records[0].getMessage() == f"Failed to write manifest cache: {manifest_path}"
+
+
 # def load_institutions_from_toml(toml_path: str | Path) -> list[Institution]:
 def test_load_institutions_from_toml(tmp_path, institutions_data, log_capture):
     num_institutions = 2
@@ -200,21 +430,54 @@ def test_load_institutions_from_toml_no_crt(log_capture, tmp_path, institutions_
     assert log_capture.records[1].getMessage() == "1 institutions loaded successfully."
 
 
+# def iter_institutions_from_toml(toml_path: str | Path) -> t.Iterator[Institution]:
+def test_iter_institutions_from_toml(tmp_path, institutions_data, log_capture):
+    toml_path = tmp_path / "test_institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    data = institutions_data(2)
+
+    with (
+        patch("weko_group_cache_db.loader.tomllib.load", return_value={"institutions": data}),
+        patch("weko_group_cache_db.loader.check_existence_file", side_effect=[False, True]),
+    ):
+        result = list(iter_institutions_from_toml(toml_path))
+
+    assert [inst.model_dump() for inst in result] == data[1:]
+    assert (
+        log_capture.records[0].getMessage()
+        == 'Skip 1st institution "example1.ac.jp" due to missing TLS client cert/key files.'
+    )
+    assert log_capture.records[1].getMessage() == "1 institutions loaded successfully."
+
+
+# def iter_institutions_from_directory(
+#     directory_path: str | Path, fqdn_list_file: str | Path
+# ) -> t.Iterator[Institution]:
+def test_iter_institutions_from_directory(tmp_path, set_test_config):
+    directory_path = tmp_path / "institutions"
+    fqdn_list_file = tmp_path / "fqdn_list.txt"
+    fqdn_list_file.write_text("example1.ac.jp\n# example2.ac.jp\nexample3.ac.jp\n")
+    make_tls_files(directory_path, "example1.ac.jp", "example2.ac.jp", "example3.ac.jp")
+    set_test_config()
+
+    result = list(iter_institutions_from_directory(str(directory_path), str(fqdn_list_file)))
+
+    assert [inst.fqdn for inst in result] == ["example1.ac.jp", "example3.ac.jp"]
+    assert result[1].client_cert_path == str(directory_path / "example3.ac.jp" / loader.CRT_FILE_NAME)
+
+
 def test_load_institutions_from_directory(tmp_path, institutions_data, log_capture, set_test_config):
     directory_path = tmp_path / "institutions"
-    directory_path.mkdir()
     fqdn_list_file = tmp_path / "fqdn_list.txt"
     num_institutions = 2
     data = institutions_data(num_institutions)
 
     fqdn_list_file.write_text("\n".join([inst["fqdn"] for inst in data]))
+    make_tls_files(directory_path, *(inst["fqdn"] for inst in data))
 
     set_test_config(SP_CONNECTOR_ID_PREFIX="test_jc_")
 
-    with patch("weko_group_cache_db.loader.check_existence_file") as mock_check:
-        mock_check.return_value = True
-
-        result = load_institutions_from_directory(directory_path, fqdn_list_file)
+    result = load_institutions_from_directory(directory_path, fqdn_list_file)
 
     assert len(result) == num_institutions
     assert all(isinstance(inst, Institution) for inst in result)
@@ -255,19 +518,19 @@ def test_load_institutions_from_directory_validation_error(tmp_path, institution
     assert log_capture.records[2].getMessage() == "0 institutions loaded successfully."
 
 
-def test_load_institutions_from_directory_no_cert(tmp_path, institutions_data, log_capture):
+def test_load_institutions_from_directory_no_cert(tmp_path, institutions_data, log_capture, set_test_config):
     directory_path = tmp_path / "institutions"
-    directory_path.mkdir()
     fqdn_list_file = tmp_path / "fqdn_list.txt"
     num_institutions = 2
     data = institutions_data(num_institutions)
 
     fqdn_list_file.write_text("\n".join([inst["fqdn"] for inst in data]))
+    make_tls_files(directory_path, data[0]["fqdn"])
+    (directory_path / data[1]["fqdn"]).mkdir()
+    (directory_path / data[1]["fqdn"] / loader.CRT_FILE_NAME).touch()
+    set_test_config()
 
-    with patch("weko_group_cache_db.loader.check_existence_file") as mock_check:
-        mock_check.side_effect = [True, False]
-
-        result = load_institutions_from_directory(directory_path, str(fqdn_list_file))
+    result = load_institutions_from_directory(directory_path, str(fqdn_list_file))
 
     assert len(result) == 1
     assert (
@@ -277,6 +540,195 @@ def test_load_institutions_from_directory_no_cert(tmp_path, institutions_data, l
     assert log_capture.records[1].getMessage() == "1 institutions loaded successfully."
 
 
+# def index_directory(directory_path: Path) -> dict[str, frozenset[str]]:
+@pytest.mark.parametrize("workers", [1, 4])
+def test_index_directory(tmp_path, set_test_config, workers):
+    make_tls_files(tmp_path, "example1.ac.jp", "example2.ac.jp")
+    (tmp_path / "example3.ac.jp").mkdir()
+    (tmp_path / "example3.ac.jp" / loader.KEY_FILE_NAME).mkdir()
+    (tmp_path / "fqdn_list.txt").touch()
+    set_test_config(DIRECTORY_SCAN_WORKERS=workers)
+
+    index = index_directory(tmp_path)
+
+    assert index == {
+        "example1.ac.jp": loader.TLS_FILE_NAMES,
+        "example2.ac.jp": loader.TLS_FILE_NAMES,
+        "example3.ac.jp": frozenset(),
+    }
+
+
+def test_index_directory_not_found(tmp_path, set_test_config, log_capture):
+    set_test_config()
+
+    assert index_directory(tmp_path / "missing") == {}
+    assert log_capture.records[0].getMessage() == f"Failed to read institution directory: {tmp_path / 'missing'}"
+
+
+def make_tls_files(directory_path, *fqdns):
+    for fqdn in fqdns:
+        (directory_path / fqdn).mkdir(parents=True)
+        (directory_path / fqdn / loader.CRT_FILE_NAME).touch()
+        (directory_path / fqdn / loader.KEY_FILE_NAME).touch()
+
+
+# def read_fqdn_list(lines: t.Iterable[str]) -> t.Iterator[str]:
+def test_read_fqdn_list():
+    lines = ["example1.ac.jp\n", "\n", "# comment\n", "  example2.ac.jp  Example 2\n"]
+
+    assert list(read_fqdn_list(lines)) == ["example1.ac.jp", "example2.ac.jp"]
+
+
+# def find_institution(fqdn: str, **kwargs: t.Unpack[InstitutionSource]) -> Institution | None:
+def test_find_institution_toml(set_test_config):
+    set_test_config()
+    with patch("weko_group_cache_db.loader.find_institution_in_toml") as mock_find:
+        find_institution("example1.ac.jp", toml_path="institutions.toml")
+
+    mock_find.assert_called_once_with("institutions.toml", "example1.ac.jp")
+
+
+def test_find_institution_directory(set_test_config):
+    set_test_config()
+    with patch("weko_group_cache_db.loader.find_institution_in_directory") as mock_find:
+        find_institution("example1.ac.jp", directory_path="institutions", fqdn_list_file="fqdn_list.txt")
+
+    mock_find.assert_called_once_with("institutions", "fqdn_list.txt", "example1.ac.jp")
+
+
+def test_find_institution_invalid(set_test_config, log_capture):
+    set_test_config()
+
+    assert find_institution("example1.ac.jp") is None
+    assert log_capture.records[0].getMessage() == "Invalid institution source configuration."
+
+
+def test_find_institution_manifest_cache(tmp_path, institutions_data, set_test_config):
+    toml_path = tmp_path / "institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    set_test_config(MANIFEST_CACHE_PATH=str(tmp_path / "institutions.manifest"))
+    institutions = institutions_with_files(tmp_path, institutions_data(2))
+    key = manifest_key(toml_path=str(toml_path))
+    assert key is not None
+    write_manifest(key, institutions)
+
+    with patch("weko_group_cache_db.loader.find_institution_in_toml") as mock_find:
+        found = find_institution("example2.ac.jp", toml_path=str(toml_path))
+        missing = find_institution("example3.ac.jp", toml_path=str(toml_path))
+
+    mock_find.assert_not_called()
+    assert found == institutions[1]
+    assert missing is None
+
+
+# def find_institution_in_toml(toml_path: str | Path, fqdn: str) -> Institution | None:
+def test_find_institution_in_toml(tmp_path, institutions_data):
+    toml_path = tmp_path / "test_institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    data = institutions_data(3)
+    data[0] = {"fqdn": 1}
+
+    with (
+        patch("weko_group_cache_db.loader.tomllib.load", return_value={"institutions": [*data, data[1]]}),
+        patch("weko_group_cache_db.loader.check_existence_file", return_value=True) as mock_check,
+    ):
+        result = find_institution_in_toml(toml_path, "example2.ac.jp")
+
+    assert result is not None
+    assert result.model_dump() == data[1]
+    mock_check.assert_called_once_with(result)
+
+
+def test_find_institution_in_toml_not_found(tmp_path, institutions_data):
+    toml_path = tmp_path / "test_institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+
+    with (
+        patch("weko_group_cache_db.loader.tomllib.load", return_value={"institutions": institutions_data(2)}),
+        patch("weko_group_cache_db.loader.check_existence_file") as mock_check,
+    ):
+        result = find_institution_in_toml(toml_path, "example3.ac.jp")
+
+    assert result is None
+    mock_check.assert_not_called()
+
+
+def test_find_institution_in_toml_validation_error(tmp_path, institutions_data, log_capture):
+    toml_path = tmp_path / "test_institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+    data = institutions_data(1)
+    del data[0]["sp_connector_id"]
+
+    with patch("weko_group_cache_db.loader.tomllib.load", return_value={"institutions": data}):
+        result = find_institution_in_toml(toml_path, "example1.ac.jp")
+
+    assert result is None
+    assert log_capture.records[0].getMessage() == 'Failed to load institution "example1.ac.jp".'
+
+
+def test_find_institution_in_toml_no_crt(tmp_path, institutions_data, log_capture):
+    toml_path = tmp_path / "test_institutions.toml"
+    toml_path.write_text("[[institutions]]\n")
+
+    with (
+        patch("weko_group_cache_db.loader.tomllib.load", return_value={"institutions": institutions_data(1)}),
+        patch("weko_group_cache_db.loader.check_existence_file", return_value=False),
+    ):
+        result = find_institution_in_toml(toml_path, "example1.ac.jp")
+
+    assert result is None
+    assert (
+        log_capture.records[0].getMessage()
+        == 'Skip institution "example1.ac.jp" due to missing TLS client cert/key files.'
+    )
+
+
+# def find_institution_in_directory(
+#     directory_path: str | Path, fqdn_list_file: str | Path, fqdn: str
+# ) -> Institution | None:
+def test_find_institution_in_directory(tmp_path, set_test_config):
+    directory_path = tmp_path / "institutions"
+    fqdn_list_file = tmp_path / "fqdn_list.txt"
+    fqdn_list_file.write_text("# comment\nexample1.ac.jp\nexample2.ac.jp Example 2\n")
+    set_test_config(SP_CONNECTOR_ID_PREFIX="test_jc_")
+
+    with patch("weko_group_cache_db.loader.check_existence_file", return_value=True):
+        result = find_institution_in_directory(str(directory_path), str(fqdn_list_file), "example2.ac.jp")
+
+    assert result is not None
+    assert result.fqdn == "example2.ac.jp"
+    assert result.sp_connector_id == "test_jc_example2_ac_jp"
+    assert result.client_cert_path == str(directory_path / "example2.ac.jp" / loader.CRT_FILE_NAME)
+    assert result.client_key_path == str(directory_path / "example2.ac.jp" / loader.KEY_FILE_NAME)
+
+
+def test_find_institution_in_directory_not_listed(tmp_path, set_test_config):
+    fqdn_list_file = tmp_path / "fqdn_list.txt"
+    fqdn_list_file.write_text("example1.ac.jp\n# example2.ac.jp\n")
+    set_test_config()
+
+    with patch("weko_group_cache_db.loader.check_existence_file") as mock_check:
+        result = find_institution_in_directory(tmp_path, fqdn_list_file, "example2.ac.jp")
+
+    assert result is None
+    mock_check.assert_not_called()
+
+
+def test_find_institution_in_directory_no_cert(tmp_path, set_test_config, log_capture):
+    fqdn_list_file = tmp_path / "fqdn_list.txt"
+    fqdn_list_file.write_text("example1.ac.jp\n")
+    set_test_config()
+
+    with patch("weko_group_cache_db.loader.check_existence_file", return_value=False):
+        result = find_institution_in_directory(tmp_path, fqdn_list_file, "example1.ac.jp")
+
+    assert result is None
+    assert (
+        log_capture.records[0].getMessage()
+        == 'Skip institution "example1.ac.jp" due to missing TLS client cert/key files.'
+    )
+
+
 # def check_existence_file(institution: Institution) -> bool:
 def test_check_existence_file(tmp_path):
     cert_path = tmp_path / "client_cert.pem"
@@ -339,3 +791,143 @@ def test_check_existence_files_not_exist(tmp_path):
         client_key_path=str(key_path),
     )
     assert check_existence_file(institution) is False
+
+
+def make_institution(cert_path, key_path, fqdn="example1.ac.jp"):
+    return Institution(
+        name=None,
+        fqdn=fqdn,
+        sp_connector_id="jc_example1_ac_jp",
+        client_cert_path=str(cert_path),
+        client_key_path=str(key_path),
+    )
+
+
+# def certificate_not_after(cert_path: str) -> datetime:
+def test_certificate_not_after(tls_files):
+    cert_path, _ = tls_files()
+
+    assert certificate_not_after(cert_path) == datetime(2126, 9, 24, 9, 16, tzinfo=UTC)
+
+
+def test_certificate_not_after_no_certificate(tls_files):
+    _, key_path = tls_files()
+
+    with pytest.raises(subprocess.CalledProcessError):
+        certificate_not_after(key_path)
+
+
+def test_inspect_certificate_without_openssl(tls_files):
+    loader._inspect_certificate.cache_clear()
+    institution = make_institution(*tls_files())
+
+    with patch("weko_group_cache_db.loader.subprocess.run", side_effect=FileNotFoundError("openssl")):
+        status = inspect_certificate(institution)
+
+    assert status == CertificateStatus(None, "failed to read expiry of certificate")
+
+
+# def inspect_certificate(institution: Institution) -> CertificateStatus | None:
+def test_inspect_certificate(tls_files):
+    loader._inspect_certificate.cache_clear()
+    institution = make_institution(*tls_files())
+
+    status = inspect_certificate(institution)
+
+    assert status == CertificateStatus(datetime(2126, 9, 24, 9, 16, tzinfo=UTC), None)
+    assert inspect_certificate(institution) == status
+    assert loader._inspect_certificate.cache_info().hits == 1
+
+
+def test_inspect_certificate_shares_ssl_context(tls_files):
+    loader._inspect_certificate.cache_clear()
+    cert_path, key_path = tls_files()
+    institution = make_institution(cert_path, key_path)
+
+    with patch("weko_group_cache_db.session.ResumingSSLContext.load_cert_chain") as mock_load:
+        inspect_certificate(institution)
+        load_ssl_context(str(cert_path), str(key_path))
+
+    mock_load.assert_called_once()
+
+
+def test_inspect_certificate_key_mismatch(tls_files):
+    loader._inspect_certificate.cache_clear()
+    cert_path, key_path = tls_files()
+    institution = make_institution(cert_path, key_path)
+    status = inspect_certificate(institution)
+    assert status is not None
+    assert status.error is None
+
+    tls_files(matching=False)
+    # the keys are of the same size, so make sure the modification time changes
+    key_stat = Path(key_path).stat()
+    os.utime(key_path, ns=(key_stat.st_atime_ns, key_stat.st_mtime_ns + 1_000_000_000))
+    status = inspect_certificate(institution)
+
+    assert status is not None
+    assert status.not_after is None
+    assert status.error is not None
+    assert status.error.startswith("certificate and key do not match")
+
+
+def test_inspect_certificate_unreadable(tmp_path):
+    cert_path = tmp_path / "server.crt"
+    key_path = tmp_path / "server.key"
+    institution = make_institution(cert_path, key_path)
+    assert inspect_certificate(institution) is None
+
+    cert_path.write_text("broken")
+    key_path.write_text("broken")
+    status = inspect_certificate(institution)
+    assert status is not None
+    assert status.error is not None
+    assert status.error.startswith("certificate and key do not match")
+
+
+# def CertificateStatus.problem(self, now: datetime) -> str | None:
+def test_certificate_status_problem():
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+
+    assert CertificateStatus(now + timedelta(seconds=1), None).problem(now) is None
+    assert CertificateStatus(now, None).problem(now) == "expired at 2025-01-01T00:00:00+00:00"
+    assert CertificateStatus(None, "broken").problem(now) == "broken"
+
+
+# def check_certificate(institution: Institution) -> None:
+def test_check_certificate(tls_files):
+    cert_path, key_path = tls_files(matching=False)
+    institution = make_institution(cert_path, key_path)
+
+    with pytest.raises(CertificateError, match=r"certificate and key do not match") as excinfo:
+        check_certificate(institution)
+    assert excinfo.value.fqdn == institution.fqdn
+
+    tls_files()
+    check_certificate(institution)
+    check_certificate(make_institution("/path/to/missing.crt", "/path/to/missing.key"))
+
+
+def test_check_certificate_expired(tls_files):
+    institution = make_institution(*tls_files())
+    expired = CertificateStatus(datetime(2000, 1, 1, tzinfo=UTC), None)
+
+    with (
+        patch("weko_group_cache_db.loader.inspect_certificate", return_value=expired),
+        pytest.raises(CertificateError, match=r"expired at 2000-01-01T00:00:00\+00:00"),
+    ):
+        check_certificate(institution)
+
+
+# def preflight_certificates(institutions: list[Institution]) -> list[CertificateStatus | None]:
+@pytest.mark.parametrize("workers", [1, 4])
+def test_preflight_certificates(tls_files, set_test_config, workers):
+    set_test_config(CERT_CHECK_WORKERS=workers)
+    institutions = [
+        make_institution(*tls_files()),
+        make_institution("/path/to/missing.crt", "/path/to/missing.key", fqdn="example2.ac.jp"),
+    ]
+
+    statuses = preflight_certificates(institutions)
+
+    assert statuses == [CertificateStatus(datetime(2126, 9, 24, 9, 16, tzinfo=UTC), None), None]
@@ -0,0 +1,104 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import asyncio
+import math
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from weko_group_cache_db.ratelimit import TokenBucket, _current_rate_limiter, rate_limiter, setup_rate_limiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(2, 3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.0, 0.0, 0.0])
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_token_bucket_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(1, 2, clock=clock)
+
+    bucket.reserve()
+    bucket.reserve()
+    clock.now = 1.5
+    assert bucket.reserve() == pytest.approx(0.0)
+    assert bucket.reserve() == pytest.approx(0.5)
+
+    clock.now = 100.0
+    assert [bucket.reserve() for _ in range(2)] == pytest.approx([0.0, 0.0])
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_token_bucket_unlimited():
+    bucket = TokenBucket(math.inf, 1)
+
+    assert bucket.unlimited
+    assert [bucket.reserve() for _ in range(100)] == pytest.approx([0.0] * 100)
+
+
+def test_token_bucket_acquire():
+    clock = FakeClock()
+    bucket = TokenBucket(4, 1, clock=clock)
+
+    with patch("weko_group_cache_db.ratelimit.time.sleep") as mock_sleep:
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+        bucket.acquire()
+
+    mock_sleep.assert_called_once_with(pytest.approx(0.25))
+
+
+def test_token_bucket_acquire_async():
+    clock = FakeClock()
+    bucket = TokenBucket(2, 1, clock=clock)
+
+    with patch("weko_group_cache_db.ratelimit.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        asyncio.run(bucket.acquire_async())
+        mock_sleep.assert_not_awaited()
+        asyncio.run(bucket.acquire_async())
+
+    mock_sleep.assert_awaited_once_with(pytest.approx(0.5))
+
+
+@pytest.mark.parametrize(
+    ("settings", "expected_rate", "expected_burst"),
+    [
+        ({"REQUEST_INTERVAL": 4}, 0.25, 1),
+        ({"REQUEST_INTERVAL": 0}, math.inf, 1),
+        ({"REQUEST_RATE": 10, "REQUEST_BURST": 5}, 10, 5),
+        ({"REQUEST_RATE": 0}, math.inf, 1),
+    ],
+)
+def test_setup_rate_limiter(set_test_config, settings, expected_rate, expected_burst):
+    set_test_config(**settings)
+
+    limiter = setup_rate_limiter()
+
+    assert limiter.rate == expected_rate
+    assert limiter.burst == expected_burst
+    assert _current_rate_limiter.get() is limiter
+
+
+def test_rate_limiter_proxy(set_test_config):
+    set_test_config(REQUEST_RATE=7)
+    limiter = setup_rate_limiter()
+
+    assert rate_limiter.rate == limiter.rate
+    _current_rate_limiter.set(None)  # pyright: ignore[reportArgumentType]
+    assert rate_limiter.rate == limiter.rate
+    assert _current_rate_limiter.get() is not limiter
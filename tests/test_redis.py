@@ -1,9 +1,9 @@
 #
 # Copyright (C) 2025 National Institute of Informatics.
 #
+import asyncio
 
-
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import redis
@@ -11,7 +11,7 @@ import redis.sentinel
 
 from redis.exceptions import ConnectionError as RedisConnectionError
 
-from weko_group_cache_db.redis import _redis_connection, _sentinel_connection, connection
+from weko_group_cache_db.redis import _redis_connection, _sentinel_connection, async_connection, connection
 
 
 # def connection() -> Redis:
@@ -90,3 +90,67 @@ def test__sentinel_connection(set_test_config):
     )
     mock_sentinels.master_for.assert_called_once_with("test_master", db=4)
     assert store == mock_sentinels.master_for.return_value
+
+
+# async def async_connection() -> AsyncRedis:
+def test_async_connection_redis(set_test_config, log_capture: pytest.LogCaptureFixture):
+    set_test_config(REDIS_TYPE="redis", REDIS_HOST="localhost", REDIS_PORT=6379, REDIS_DB_INDEX=4)
+    with patch("weko_group_cache_db.redis.AsyncRedis.from_url") as mock_from_url:
+        mock_from_url.return_value = AsyncMock()
+        store = asyncio.run(async_connection())
+
+    mock_from_url.assert_called_once_with("redis://localhost:6379/4")
+    mock_from_url.return_value.ping.assert_awaited_once()
+    assert store == mock_from_url.return_value
+    assert log_capture.records[0].getMessage() == "Successfully connected to Redis."
+
+
+def test_async_connection_sentinel(set_test_config, log_capture: pytest.LogCaptureFixture):
+    set_test_config(
+        REDIS_TYPE="sentinel",
+        SENTINELS=[{"host": "localhost", "port": 26379}],
+        REDIS_SENTINEL_MASTER="test_master",
+        REDIS_DB_INDEX=4,
+    )
+    mock_store = AsyncMock()
+    with patch("weko_group_cache_db.redis.async_sentinel.Sentinel") as mock_sentinel:
+        mock_sentinel.return_value.master_for.return_value = mock_store
+        store = asyncio.run(async_connection())
+
+    mock_sentinel.assert_called_once_with([("localhost", "26379")], decode_responses=False)
+    mock_sentinel.return_value.master_for.assert_called_once_with("test_master", db=4)
+    assert store is mock_store
+    mock_store.ping.assert_awaited_once()
+    assert log_capture.records[0].getMessage() == "Successfully connected to Redis Sentinel."
+
+
+def test_async_connection_catch_value_error(set_test_config, log_capture: pytest.LogCaptureFixture):
+    set_test_config(REDIS_TYPE="redis")
+    with (
+        patch("weko_group_cache_db.redis.AsyncRedis.from_url", side_effect=ValueError("Test ValueError")),
+        pytest.raises(ValueError, match="Test ValueError"),
+    ):
+        asyncio.run(async_connection())
+
+    assert log_capture.records[0].getMessage() == "Failed to connect to Redis. Invalid configuration."
+
+
+def test_async_connection_sentinel_without_master(set_test_config, log_capture: pytest.LogCaptureFixture):
+    set_test_config(REDIS_TYPE="sentinel", SENTINELS=[{"host": "localhost", "port": 26379}])
+    with (
+        patch("weko_group_cache_db.redis.async_sentinel.Sentinel"),
+        pytest.raises(ValueError, match=r"REDIS_SENTINEL_MASTER is required for Redis Sentinel\."),
+    ):
+        asyncio.run(async_connection())
+
+    assert log_capture.records[0].getMessage() == "Failed to connect to Redis. Invalid configuration."
+
+
+def test_async_connection_catch_connection_error(set_test_config, log_capture: pytest.LogCaptureFixture):
+    set_test_config(REDIS_TYPE="redis")
+    with patch("weko_group_cache_db.redis.AsyncRedis.from_url") as mock_from_url:
+        mock_from_url.return_value.ping = AsyncMock(side_effect=RedisConnectionError("Test ConnectionError"))
+        with pytest.raises(RedisConnectionError, match="Test ConnectionError"):
+            asyncio.run(async_connection())
+
+    assert log_capture.records[0].getMessage() == "Failed to connect to Redis. Something went wrong on Redis."
@@ -0,0 +1,147 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from weko_group_cache_db.cache import Freshness
+from weko_group_cache_db.loader import CertificateStatus, Institution
+from weko_group_cache_db.report import (
+    EXPIRY_MISSING,
+    EXPIRY_NEVER,
+    certificates_table,
+    expiry_histogram,
+    histogram_table,
+    report_certificates,
+    report_expiry,
+)
+
+
+def test_expiry_histogram():
+    freshness = [
+        Freshness(None, -2),
+        Freshness(None, -1),
+        Freshness(None, 7300),
+        Freshness(None, 100),
+        Freshness(None, 3599),
+        Freshness(None, 3600),
+    ]
+
+    histogram = expiry_histogram(freshness, 1800)
+
+    assert histogram == {EXPIRY_MISSING: 1, EXPIRY_NEVER: 1, 0: 1, 1800: 1, 3600: 1, 5400: 0, 7200: 1}
+    assert list(histogram) == sorted(histogram)
+
+
+def test_expiry_histogram_without_expiring():
+    assert expiry_histogram([Freshness(None, -2), Freshness(None, -2)], 3600) == {EXPIRY_MISSING: 2}
+    assert expiry_histogram([], 3600) == {}
+
+
+def test_histogram_table():
+    table = histogram_table({EXPIRY_MISSING: 1, EXPIRY_NEVER: 0, 0: 2, 3600: 4}, 3600)
+
+    labels, counts, bars = (list(column.cells) for column in table.columns)
+    assert labels == ["missing", "never", "0:00:00 - 1:00:00", "1:00:00 - 2:00:00"]
+    assert counts == ["1", "0", "2", "4"]
+    assert [len(str(bar)) for bar in bars] == [10, 0, 20, 40]
+
+
+def test_report_expiry(institutions_data, set_test_config):
+    institutions = [Institution(**item) for item in institutions_data(2)]
+    set_test_config()
+    mock_store = MagicMock()
+
+    with (
+        patch("weko_group_cache_db.report.connection", return_value=mock_store),
+        patch("weko_group_cache_db.report.load_institutions", return_value=institutions) as mock_load,
+        patch(
+            "weko_group_cache_db.report.get_freshness", return_value=[Freshness(None, 100), Freshness(None, 4000)]
+        ) as mock_get_freshness,
+        patch("weko_group_cache_db.report.console") as mock_console,
+    ):
+        histogram = report_expiry(bucket=3600, toml_path="institutions.toml")
+
+    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_get_freshness.assert_called_once_with(mock_store, [institution.fqdn for institution in institutions])
+    assert histogram == {0: 1, 3600: 1}
+    mock_console.print.assert_called_once()
+
+
+def test_report_expiry_no_institutions(set_test_config, log_capture):
+    set_test_config()
+
+    with (
+        patch("weko_group_cache_db.report.connection"),
+        patch("weko_group_cache_db.report.load_institutions", return_value=[]),
+        patch("weko_group_cache_db.report.console") as mock_console,
+    ):
+        assert report_expiry(toml_path="institutions.toml") == {}
+
+    mock_console.print.assert_not_called()
+    assert log_capture.records[0].getMessage() == "No institutions found to report group caches for."
+
+
+def test_report_certificates(institutions_data, set_test_config, log_capture):
+    institutions = [Institution(**item) for item in institutions_data(5)]
+    set_test_config(CERT_EXPIRY_WARNING=86400)
+    now = datetime.now(UTC)
+    statuses = [
+        CertificateStatus(now + timedelta(days=30), None),
+        CertificateStatus(now + timedelta(hours=2), None),
+        CertificateStatus(None, "certificate and key do not match"),
+        None,
+        CertificateStatus(now - timedelta(days=1), None),
+    ]
+
+    with (
+        patch("weko_group_cache_db.report.load_institutions", return_value=institutions) as mock_load,
+        patch("weko_group_cache_db.report.preflight_certificates", return_value=statuses) as mock_preflight,
+        patch("weko_group_cache_db.report.console") as mock_console,
+    ):
+        reported = report_certificates(toml_path="institutions.toml")
+
+    mock_load.assert_called_once_with(toml_path="institutions.toml")
+    mock_preflight.assert_called_once_with(institutions)
+    assert reported == {
+        institutions[2].fqdn: statuses[2],
+        institutions[4].fqdn: statuses[4],
+        institutions[1].fqdn: statuses[1],
+    }
+    assert list(reported) == [institutions[2].fqdn, institutions[4].fqdn, institutions[1].fqdn]
+    mock_console.print.assert_called_once()
+    assert log_capture.records[0].getMessage() == (
+        "Checked certificates of 5 institution(s): 2 unusable, 1 expiring soon."
+    )
+
+
+def test_report_certificates_no_institutions(set_test_config, log_capture):
+    set_test_config()
+
+    with (
+        patch("weko_group_cache_db.report.load_institutions", return_value=[]),
+        patch("weko_group_cache_db.report.preflight_certificates") as mock_preflight,
+    ):
+        assert report_certificates(toml_path="institutions.toml") == {}
+
+    mock_preflight.assert_not_called()
+    assert log_capture.records[0].getMessage() == "No institutions found to report certificates for."
+
+
+def test_certificates_table():
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+    table = certificates_table(
+        [
+            ("example1.ac.jp", CertificateStatus(None, "broken")),
+            ("example2.ac.jp", CertificateStatus(now - timedelta(days=1), None)),
+            ("example3.ac.jp", CertificateStatus(now + timedelta(hours=1), None)),
+        ],
+        now,
+    )
+
+    fqdns, expires_at, remaining, problems = (list(column.cells) for column in table.columns)
+    assert fqdns == ["example1.ac.jp", "example2.ac.jp", "example3.ac.jp"]
+    assert expires_at == ["-", "2024-12-31T00:00:00+00:00", "2025-01-01T01:00:00+00:00"]
+    assert remaining == ["-", "0:00:00", "1:00:00"]
+    assert problems == ["broken", "expired at 2024-12-31T00:00:00+00:00", ""]
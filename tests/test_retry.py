@@ -0,0 +1,75 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+import pytest
+
+from weko_group_cache_db.retry import RETRY_AFTER_MAX, RetryQueue, parse_retry_after, retry_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize(("attempt", "expected"), [(0, 5), (1, 20), (2, 80), (3, 90)])
+def test_retry_delay(set_test_config, attempt, expected):
+    set_test_config(REQUEST_RETRY_BASE=4, REQUEST_RETRY_FACTOR=5, REQUEST_RETRY_MAX=90)
+
+    with patch("weko_group_cache_db.retry.backoff.full_jitter", side_effect=lambda value: value) as mock_jitter:
+        assert retry_delay(attempt) == expected
+
+    mock_jitter.assert_called_once_with(expected)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("120", 120.0),
+        (" 0 ", 0.0),
+        ("86400", RETRY_AFTER_MAX),
+        ("Mon, 17 Nov 2025 00:01:30 GMT", 90.0),
+        ("Mon, 17 Nov 2025 00:01:30", 90.0),
+        ("Sun, 16 Nov 2025 23:59:00 GMT", 0.0),
+        ("Tue, 18 Nov 2025 00:00:00 GMT", RETRY_AFTER_MAX),
+        ("-1", None),
+        ("soon", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    now = datetime(2025, 11, 17, tzinfo=UTC)
+
+    assert parse_retry_after(value, now) == expected
+
+
+def test_retry_queue_order():
+    clock = FakeClock()
+    queue = RetryQueue(clock=clock)
+
+    queue.push("late", 10)
+    queue.push("early", 2)
+    queue.push("tie", 2)
+
+    assert len(queue) == 3  # noqa: PLR2004
+    assert queue.pop_due() is None
+    assert queue.delay() == 2  # noqa: PLR2004
+
+    clock.now = 5.0
+    assert queue.pop_due() == "early"
+    assert queue.pop_due() == "tie"
+    assert queue.pop_due() is None
+    assert queue.delay() == 5  # noqa: PLR2004
+
+    clock.now = 20.0
+    assert queue.delay() == 0
+    assert queue.pop_due() == "late"
+    assert len(queue) == 0
+    assert queue.delay() is None
@@ -0,0 +1,333 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+import asyncio
+import contextvars
+import os
+import socket
+import ssl
+import threading
+
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+import requests
+
+from weko_group_cache_db.session import (
+    ClientCertAdapter,
+    ResumingSSLContext,
+    SessionPool,
+    _current_session_pool,
+    async_session_pool,
+    close_async_session_pool,
+    create_async_client,
+    create_session,
+    load_ssl_context,
+    session_pool,
+    setup_async_session_pool,
+    setup_session_pool,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _pool(size=2, idle_timeout=60, clock=None, revision=None):
+    close = MagicMock()
+    pool = SessionPool(
+        lambda cert, key: MagicMock(name=f"{cert}:{key}"),
+        close=close,
+        size=size,
+        idle_timeout=idle_timeout,
+        revision=revision,
+        clock=clock or FakeClock(),
+    )
+    return pool, close
+
+
+def test_session_pool_reuse():
+    pool, close = _pool()
+
+    session = pool.get("cert1.pem", "key1.pem")
+
+    assert pool.get("cert1.pem", "key1.pem") is session
+    assert pool.get("cert2.pem", "key2.pem") is not session
+    assert len(pool) == 2  # noqa: PLR2004
+    close.assert_not_called()
+
+
+def test_session_pool_evict_least_recently_used():
+    pool, close = _pool(size=2)
+
+    session1 = pool.get("cert1.pem", "key1.pem")
+    session2 = pool.get("cert2.pem", "key2.pem")
+    pool.get("cert1.pem", "key1.pem")
+    pool.get("cert3.pem", "key3.pem")
+
+    close.assert_called_once_with(session2)
+    assert pool.get("cert1.pem", "key1.pem") is session1
+    assert len(pool) == 2  # noqa: PLR2004
+
+
+def test_session_pool_evict_idle():
+    clock = FakeClock()
+    pool, close = _pool(size=4, idle_timeout=10, clock=clock)
+
+    session1 = pool.get("cert1.pem", "key1.pem")
+    clock.now = 5.0
+    session2 = pool.get("cert2.pem", "key2.pem")
+    clock.now = 12.0
+    assert pool.get("cert2.pem", "key2.pem") is session2
+
+    close.assert_called_once_with(session1)
+    assert len(pool) == 1
+
+
+def test_session_pool_close():
+    pool, close = _pool()
+
+    with pool:
+        session1 = pool.get("cert1.pem", "key1.pem")
+        session2 = pool.get("cert2.pem", "key2.pem")
+
+    assert len(pool) == 0
+    assert [args[0][0] for args in close.call_args_list] == [session1, session2]
+
+
+def test_session_pool_recreates_session_of_new_revision():
+    revisions = {"cert1.pem": object()}
+    pool, close = _pool(revision=lambda cert, _key: revisions[cert])
+
+    session1 = pool.get("cert1.pem", "key1.pem")
+    assert pool.get("cert1.pem", "key1.pem") is session1
+    close.assert_not_called()
+
+    revisions["cert1.pem"] = object()
+    session2 = pool.get("cert1.pem", "key1.pem")
+
+    assert session2 is not session1
+    assert len(pool) == 1
+    close.assert_called_once_with(session1)
+
+
+def test_session_pool_keeps_checked_out_session_open():
+    clock = FakeClock()
+    pool, close = _pool(size=1, idle_timeout=10, clock=clock)
+
+    with pool.checkout("cert1.pem", "key1.pem") as session1:
+        # a long request outlives the idle timeout and the pool size
+        clock.now = 30.0
+        session2 = pool.get("cert2.pem", "key2.pem")
+        close.assert_not_called()
+        assert len(pool) == 2  # noqa: PLR2004
+
+    # the idle time of the returned session starts when it is returned
+    clock.now = 35.0
+    assert pool.get("cert1.pem", "key1.pem") is session1
+    close.assert_called_once_with(session2)
+    assert len(pool) == 1
+
+
+def test_session_pool_closes_replaced_session_when_returned():
+    revisions = {"cert1.pem": object()}
+    pool, close = _pool(revision=lambda cert, _key: revisions[cert])
+
+    with pool.checkout("cert1.pem", "key1.pem") as session1:
+        revisions["cert1.pem"] = object()
+        session2 = pool.get("cert1.pem", "key1.pem")
+        assert session2 is not session1
+        close.assert_not_called()
+
+    close.assert_called_once_with(session1)
+    assert pool.get("cert1.pem", "key1.pem") is session2
+
+
+def test_load_ssl_context(tls_files):
+    cert_path, key_path = tls_files()
+
+    with patch("weko_group_cache_db.session.ResumingSSLContext.load_cert_chain") as mock_load:
+        context = load_ssl_context(cert_path, key_path)
+        assert load_ssl_context(cert_path, key_path) is context
+
+    assert isinstance(context, ResumingSSLContext)
+    assert context.verify_mode == ssl.CERT_REQUIRED
+    mock_load.assert_called_once_with(cert_path, key_path, password=b"")
+
+
+def test_load_ssl_context_reloads_renewed_certificate(tls_files):
+    cert_path, key_path = tls_files()
+    context = load_ssl_context(cert_path, key_path)
+
+    stat = Path(cert_path).stat()
+    os.utime(cert_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert load_ssl_context(cert_path, key_path) is not context
+
+
+def test_load_ssl_context_mismatched_key(tls_files):
+    cert_path, key_path = tls_files(matching=False)
+
+    with pytest.raises(ssl.SSLError):
+        load_ssl_context(cert_path, key_path)
+
+
+def test_resuming_ssl_context(tls_files):
+    cert_path, key_path = tls_files()
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert_path, key_path)
+    client_context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    client_context.check_hostname = False
+    client_context.verify_mode = ssl.CERT_NONE
+
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+        port = listener.getsockname()[1]
+
+        def _serve():
+            for _ in range(2):
+                conn, _ = listener.accept()
+                with server_context.wrap_socket(conn, server_side=True) as tls:
+                    tls.sendall(tls.recv(4))
+
+        server = threading.Thread(target=_serve)
+        server.start()
+        reused = []
+        for _ in range(2):
+            with client_context.wrap_socket(
+                socket.create_connection(("127.0.0.1", port)), server_hostname="localhost"
+            ) as tls:
+                tls.sendall(b"ping")
+                assert tls.recv(4) == b"ping"
+                reused.append(tls.session_reused)
+        server.join()
+
+    assert reused == [False, True]
+    assert client_context.last_session("localhost") is not None
+    assert client_context.last_session("other.example.jp") is None
+
+
+def test_client_cert_adapter(tls_files):
+    context = load_ssl_context(*tls_files())
+    adapter = ClientCertAdapter(context, pool_connections=1, pool_maxsize=2)
+    conn = MagicMock()
+
+    adapter.cert_verify(conn, "https://sample.gakunin.jp/", verify=True, cert=None)
+
+    assert adapter.poolmanager.connection_pool_kw["ssl_context"] is context
+    assert adapter.proxy_manager_for("http://proxy.example.jp:8080").connection_pool_kw["ssl_context"] is context
+    assert conn.cert_reqs == "CERT_REQUIRED"
+    assert conn.ca_certs is None
+    assert conn.ca_cert_dir is None
+
+
+def test_create_session(set_test_config, tls_files):
+    set_test_config(FETCH_CONCURRENCY=3)
+    cert_path, key_path = tls_files()
+
+    session = create_session(cert_path, key_path)
+
+    adapter = session.get_adapter("https://sample.gakunin.jp/")
+    assert isinstance(session, requests.Session)
+    assert session.cert is None
+    assert isinstance(adapter, ClientCertAdapter)
+    assert adapter.ssl_context is load_ssl_context(cert_path, key_path)
+    assert adapter._pool_maxsize == 3  # noqa: PLR2004
+
+
+def test_create_async_client(set_test_config):
+    set_test_config(FETCH_CONCURRENCY=3)
+
+    with (
+        patch("weko_group_cache_db.session.load_ssl_context") as mock_load_ssl_context,
+        patch("weko_group_cache_db.session.httpx.AsyncClient") as mock_client,
+    ):
+        client = create_async_client("cert.pem", "key.pem")
+
+    assert client is mock_client.return_value
+    mock_load_ssl_context.assert_called_once_with("cert.pem", "key.pem")
+    mock_client.assert_called_once_with(
+        verify=mock_load_ssl_context.return_value, timeout=20, limits=httpx.Limits(max_connections=3)
+    )
+
+
+def test_setup_session_pool(set_test_config):
+    set_test_config(SESSION_POOL_SIZE=3, SESSION_IDLE_TIMEOUT=5)
+
+    pool = setup_session_pool()
+
+    assert pool.size == 3  # noqa: PLR2004
+    assert pool.idle_timeout == 5  # noqa: PLR2004
+    assert _current_session_pool.get() is pool
+    assert session_pool.size == pool.size
+
+
+def test_session_pool_shared_by_copied_contexts(set_test_config, tls_files):
+    set_test_config()
+    cert_path, key_path = tls_files()
+
+    with (
+        patch.object(requests.Session, "close", autospec=True) as mock_close,
+        setup_session_pool() as pool,
+    ):
+        # workers run in copies of the context that set up the empty pool
+        sessions = [contextvars.copy_context().run(session_pool.get, cert_path, key_path) for _ in range(2)]
+
+        assert sessions[0] is sessions[1]
+        assert _current_session_pool.get() is pool
+        assert len(pool) == 1
+
+    mock_close.assert_called_once_with(sessions[0])
+
+
+def test_async_session_pool_shared_by_tasks(set_test_config):
+    set_test_config()
+
+    async def _get():
+        await asyncio.sleep(0)
+        return async_session_pool.get("cert.pem", "key.pem")
+
+    async def _run():
+        pool = setup_async_session_pool()
+        clients = await asyncio.gather(_get(), _get())
+        await close_async_session_pool(pool)
+        return clients
+
+    client = MagicMock(aclose=AsyncMock())
+    with (
+        patch("weko_group_cache_db.session.create_async_client", return_value=client) as mock_create,
+        patch("weko_group_cache_db.session.load_ssl_context"),
+    ):
+        clients = asyncio.run(_run())
+
+    assert clients == [client, client]
+    mock_create.assert_called_once_with("cert.pem", "key.pem")
+    client.aclose.assert_awaited_once_with()
+
+
+def test_async_session_pool(set_test_config):
+    set_test_config(SESSION_POOL_SIZE=1)
+    clients = [MagicMock(aclose=AsyncMock()) for _ in range(2)]
+
+    async def _run():
+        pool = setup_async_session_pool()
+        assert async_session_pool.size == 1
+        pool.get("cert1.pem", "key1.pem")
+        pool.get("cert2.pem", "key2.pem")
+        clients[0].aclose.assert_called_once_with()
+        await close_async_session_pool(pool)
+
+    with (
+        patch("weko_group_cache_db.session.create_async_client", side_effect=clients),
+        patch("weko_group_cache_db.session.load_ssl_context"),
+    ):
+        asyncio.run(_run())
+
+    clients[0].aclose.assert_awaited_once_with()
+    clients[1].aclose.assert_awaited_once_with()
@@ -0,0 +1,542 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Asyncio-based fetch engine for weko-group-cache-db.
+
+This engine issues mAP API requests and Redis writes as coroutines
+on a single event loop, which is cheaper than OS threads
+when many requests are waiting on a slow mAP API.
+"""
+
+import asyncio
+import itertools
+import ssl
+import typing as t
+
+from http import HTTPStatus
+from urllib.parse import urljoin
+
+import backoff
+import httpx
+import redis
+
+from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
+
+from .breaker import circuit_breaker, setup_circuit_breaker
+from .cache import (
+    VALIDATOR_FIELDS,
+    CacheResult,
+    Freshness,
+    cache_key,
+    keep_stale_async,
+    parse_freshness,
+    parse_validators,
+    queue_freshness,
+    queue_groups,
+    queue_touch,
+)
+from .config import config
+from .decoder import (
+    STREAM_CHUNK_SIZE,
+    GroupPage,
+    GroupPageParser,
+    decode_group_page,
+)
+from .exc import CertificateError, CircuitOpenError, UpdateError
+from .groups import (
+    MapGroups,
+    conditional_headers,
+    error_retry_after,
+    log_failure,
+    merge_pages,
+    page_params,
+    remaining_page_starts,
+    response_validators,
+    select_shard,
+    select_stale,
+    summarize,
+)
+from .loader import (
+    Institution,
+    InstitutionSource,
+    check_certificate,
+    iter_institutions,
+)
+from .logger import console, logger
+from .ratelimit import rate_limiter, setup_rate_limiter
+from .redis import async_connection
+from .retry import retry_delay
+from .session import (
+    async_session_pool,
+    close_async_session_pool,
+    setup_async_session_pool,
+)
+
+if t.TYPE_CHECKING:
+    from redis.asyncio import Redis  # pragma: no cover
+
+
+FETCH_ERRORS = (httpx.HTTPError, ssl.SSLError)
+"""Errors raised when fetching groups from mAP API."""
+
+RETRYABLE_ERRORS = (*FETCH_ERRORS, redis.RedisError)
+"""Errors that are retried and reported as update failures."""
+
+
+def fetch_all(*, stale_only: bool = False, **kwargs: t.Unpack[InstitutionSource]):
+    """Fetch and cache groups for all institutions on an event loop.
+
+    Only institutions in the shard of this worker are processed,
+    see `select_shard`.
+
+    Arguments:
+        stale_only (bool):
+            Whether to process only institutions whose caches are stale,
+            oldest first. See `select_stale`.
+        kwargs (InstitutionSource):
+            - toml_path (str | Path): Path to the TOML file.
+            - directory_path (str | Path): Path to the directory containing TOML files.
+            - fqdn_list_file (str | Path): Path to the file containing FQDN list.
+
+    Raises:
+        ExceptionGroup:
+            If there are failures in updating information from one or more institutions.
+
+    """
+    institutions = select_shard(iter_institutions(**kwargs))
+
+    # load the first institution before the progress bar is shown,
+    # so that an empty or unreadable source is reported on its own
+    first = next(institutions, None)
+    if first is None:
+        logger.warning("No institutions found to fetch and cache groups for.")
+        return
+
+    outcomes = asyncio.run(
+        fetch_all_async(itertools.chain([first], institutions), stale_only=stale_only)
+    )
+    exceptions = summarize(list(outcomes), outcomes)
+
+    if exceptions:
+        error_message = "Failed to update information from %d institution(s)."
+        logger.error(error_message, len(exceptions))
+        raise ExceptionGroup(error_message % len(exceptions), exceptions)
+
+
+async def fetch_all_async(
+    institutions: t.Iterable[Institution], *, stale_only: bool = False
+) -> dict[str, CacheResult | UpdateError]:
+    """Fetch and cache groups for institutions as concurrent coroutines.
+
+    At most `FETCH_CONCURRENCY` institutions are processed at the same time.
+    A coroutine is started for each institution as soon as it is taken from
+    the iterable, so a streaming loader overlaps with the requests in flight.
+
+    Arguments:
+        institutions (Iterable[Institution]): Institutions to process.
+        stale_only (bool):
+            Whether to process only institutions whose caches are stale.
+
+    Returns:
+        dict[str, CacheResult | UpdateError]:
+            Outcomes keyed by FQDN in the order of `institutions`.
+
+    Raises:
+        redis.RedisError: If failed to read the freshness of group caches.
+
+    """  # noqa: DOC502
+    store = await async_connection()
+    total = None
+    if stale_only:
+        institutions = await _select_stale(store, institutions)
+        if not institutions:
+            await store.aclose()
+            return {}
+        total = len(institutions)
+
+    setup_rate_limiter()
+    setup_circuit_breaker()
+    clients = setup_async_session_pool()
+    semaphore = asyncio.Semaphore(max(1, config.FETCH_CONCURRENCY))
+    retrieve = fetch_and_cache(retry=False)
+
+    with Progress(
+        SpinnerColumn(),
+        *Progress.get_default_columns(),
+        TimeElapsedColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task(
+            "Fetching and caching groups for all institutions",
+            total=total,
+        )
+
+        async def _attempt(institution: Institution) -> CacheResult:
+            # wait for retries outside the semaphore so others can use the slot
+            for attempt in range(config.REQUEST_RETRIES):
+                try:
+                    async with semaphore:
+                        return await retrieve(institution, store)
+                except RETRYABLE_ERRORS as ex:
+                    delay = max(retry_delay(attempt), error_retry_after(ex) or 0)
+                    logger.info(
+                        "Retrying institution %(fqdn)s in %(delay).1f seconds.",
+                        {"fqdn": institution.fqdn, "delay": delay},
+                    )
+                    await asyncio.sleep(delay)
+            async with semaphore:
+                return await retrieve(institution, store)
+
+        async def _fetch(institution: Institution) -> CacheResult | UpdateError:
+            try:
+                result = await _attempt(institution)
+                logger.info(
+                    "Successfully cached %(count)d groups for %(fqdn)s.",
+                    {"count": result.group_count, "fqdn": institution.fqdn},
+                )
+            except Exception as ex:  # noqa: BLE001
+                # do not let an institution cancel the others in gather
+                return failure(institution.fqdn, ex)
+            finally:
+                progress.update(task, advance=1)
+            return result
+
+        tasks: list[tuple[str, asyncio.Task[CacheResult | UpdateError]]] = []
+        try:
+            for institution in institutions:
+                tasks.append((
+                    institution.fqdn,
+                    asyncio.create_task(_fetch(institution)),
+                ))
+                # let the started tasks send requests before loading the next one
+                await asyncio.sleep(0)
+            progress.update(task, total=len(tasks))
+
+            await asyncio.gather(*(fetching for _, fetching in tasks))
+            await keep_stale_async(
+                store,
+                [
+                    fqdn
+                    for fqdn, fetching in tasks
+                    if isinstance(fetching.result(), UpdateError)
+                ],
+            )
+        finally:
+            for _, fetching in tasks:
+                fetching.cancel()
+            await close_async_session_pool(clients)
+            await store.aclose()
+
+    return {fqdn: fetching.result() for fqdn, fetching in tasks}
+
+
+def failure(fqdn: str, error: Exception) -> UpdateError:
+    """Report an institution that failed for good.
+
+    Arguments:
+        fqdn (str): FQDN of the institution.
+        error (Exception): Error of the last attempt.
+
+    Returns:
+        UpdateError: The error wrapped for the institution.
+
+    """
+    if isinstance(error, (*RETRYABLE_ERRORS, CertificateError, CircuitOpenError)):
+        log_failure(fqdn, error)
+    else:
+        logger.exception(
+            "Failed to cache groups for institution %s due to an unexpected error.",
+            fqdn,
+        )
+    return UpdateError(fqdn, origin=error)
+
+
+async def _select_stale(
+    store: Redis, institutions: t.Iterable[Institution]
+) -> list[Institution]:
+    """Select institutions whose group caches are stale, oldest first.
+
+    See `select_stale` for the selection. The store is closed if failed to
+    read the freshness of group caches.
+
+    Arguments:
+        store (Redis): Redis store object for asyncio.
+        institutions (Iterable[Institution]): Institutions to select from.
+
+    Returns:
+        list[Institution]: Institutions with stale caches.
+
+    Raises:
+        redis.RedisError: If failed to read the freshness of group caches.
+
+    """
+    loaded = list(institutions)
+    try:
+        freshness = await get_freshness(store, [inst.fqdn for inst in loaded])
+    except redis.RedisError:
+        await store.aclose()
+        raise
+    return select_stale(loaded, freshness)
+
+
+async def get_freshness(store: Redis, fqdns: list[str]) -> list[Freshness]:
+    """Get the freshness of group caches for many institutions in one pipeline.
+
+    Arguments:
+        store (Redis): Redis store object for asyncio.
+        fqdns (list[str]): FQDNs of the institutions.
+
+    Returns:
+        list[Freshness]: Freshness of each group cache in the order of `fqdns`.
+
+    """
+    async with store.pipeline(transaction=False) as pipe:
+        for fqdn in fqdns:
+            queue_freshness(pipe, fqdn)
+        results = await pipe.execute()
+    return [parse_freshness(*results[i : i + 2]) for i in range(0, len(results), 2)]
+
+
+def fetch_and_cache(*, retry: bool = True):
+    """Return a coroutine function that fetches and caches groups with retries.
+
+    Arguments:
+        retry (bool):
+            Whether to retry inline with backoff.
+            If False, the coroutine function makes a single attempt.
+
+    Returns:
+        Callable[[Institution,Redis],Awaitable[CacheResult]]:
+            A coroutine function that takes an Institution and Redis store,
+            fetches groups from the mAP API, and caches them in Redis with retries.
+            It raises `CertificateError` without any request or retry
+            if TLS client certificate of the institution cannot be used,
+            and `CircuitOpenError` if the circuit breaker is open.
+
+    """
+
+    async def _retrieve_fetch_and_cache(
+        institution: Institution, store: Redis
+    ) -> CacheResult:
+        # loading the certificate may block, but its result is cached
+        await asyncio.to_thread(check_certificate, institution)
+        try:
+            validators = parse_validators(
+                await store.hmget(cache_key(institution.fqdn), VALIDATOR_FIELDS)
+            )
+            result = await fetch_map_groups(institution, validators)
+            if result.group_ids is None:
+                group_count = await touch_groups(institution.fqdn, store=store)
+                if group_count >= 0:
+                    return CacheResult(group_count, changed=False)
+                # the cache expired after the validators were read
+                result = await fetch_map_groups(institution)
+
+            group_ids = result.group_ids or []
+            changed = await set_groups_to_redis(
+                institution.fqdn, group_ids, validators=result.validators, store=store
+            )
+            return CacheResult(len(group_ids), changed)
+        except FETCH_ERRORS:
+            logger.warning(
+                "Failed to fetch groups from mAP API for institution: %s",
+                institution.fqdn,
+            )
+            raise
+        except redis.RedisError:
+            logger.warning(
+                "Failed to cache groups to Redis for institution: %s",
+                institution.fqdn,
+            )
+            raise
+
+    if not retry:
+        return _retrieve_fetch_and_cache
+
+    return backoff.on_exception(
+        lambda: backoff.expo(
+            base=config.REQUEST_RETRY_BASE,
+            factor=config.REQUEST_RETRY_FACTOR,
+            max_value=config.REQUEST_RETRY_MAX,
+        ),
+        RETRYABLE_ERRORS,
+        max_tries=config.REQUEST_RETRIES + 1,
+        jitter=backoff.full_jitter,
+    )(_retrieve_fetch_and_cache)
+
+
+async def fetch_map_groups(
+    institution: Institution, validators: dict[str, str] | None = None
+) -> MapGroups:
+    """Fetch groups for the given institution without blocking the event loop.
+
+    Every request takes a token from the rate limiter before it is sent.
+    Requests are sent on the pooled client for the client certificate,
+    so their connections are reused by retries and other institutions.
+    If validators are given, the request is conditional
+    and the groups are not returned when they have not been modified.
+    If `PAGE_SIZE` is set, groups are requested in pages, and the pages
+    following the first one are fetched concurrently once it tells
+    the total number of groups.
+    Requests are guarded by the circuit breaker of mAP API.
+
+    Arguments:
+        institution (Institution): Institution object.
+        validators (dict[str, str] | None): Validators of the last response.
+
+    Returns:
+        MapGroups:
+            Group IDs and validators of the response.
+            Validators are empty if groups were returned in multiple pages.
+
+    Raises:
+        CircuitOpenError: If the circuit breaker does not let requests through.
+
+    """  # noqa: DOC502
+    with circuit_breaker.guard():
+        return await _fetch_map_groups(institution, validators)
+
+
+async def _fetch_map_groups(
+    institution: Institution, validators: dict[str, str] | None
+) -> MapGroups:
+    endpoint = urljoin(config.MAP_GROUPS_API_ENDPOINT, institution.sp_connector_id)
+    with async_session_pool.checkout(
+        institution.client_cert_path, institution.client_key_path
+    ) as client:
+        return await _fetch_pages(client, endpoint, validators)
+
+
+async def _fetch_pages(
+    client: httpx.AsyncClient, endpoint: str, validators: dict[str, str] | None
+) -> MapGroups:
+    first, first_validators = await fetch_group_page(client, endpoint, 1, validators)
+    if first is None:
+        return MapGroups(None, first_validators)
+    if not (starts := remaining_page_starts(first)):
+        return MapGroups(first.group_ids, first_validators)
+
+    semaphore = asyncio.Semaphore(max(1, config.PAGE_CONCURRENCY))
+
+    async def _fetch_page(start: int) -> GroupPage | None:
+        async with semaphore:
+            page, _ = await fetch_group_page(client, endpoint, start)
+            return page
+
+    tasks = [asyncio.ensure_future(_fetch_page(start)) for start in starts]
+    try:
+        pages = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return MapGroups(merge_pages(first, pages), {})
+
+
+async def fetch_group_page(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    start_index: int,
+    validators: dict[str, str] | None = None,
+) -> tuple[GroupPage | None, dict[str, str]]:
+    """Fetch a page of groups from mAP groups API without blocking the event loop.
+
+    If `STREAM_RESPONSES` is enabled, the body is parsed while it is received.
+
+    Arguments:
+        client (httpx.AsyncClient): Client that presents the client certificate.
+        endpoint (str): Endpoint of the institution.
+        start_index (int): 1-based index of the first group of the page.
+        validators (dict[str, str] | None): Validators of the last response.
+
+    Returns:
+        tuple[GroupPage | None, dict[str, str]]:
+            The page, or None if not modified since the given validators,
+            and validators of the response.
+
+    Raises:
+        httpx.DecodingError:
+            If the response body is not a valid response of mAP groups API.
+
+    """
+    await rate_limiter.acquire_async()
+    async with client.stream(
+        "GET",
+        endpoint,
+        params=page_params(start_index),
+        headers=conditional_headers(validators),
+    ) as response:
+        if response.status_code == HTTPStatus.NOT_MODIFIED and validators:
+            return None, validators
+        response.raise_for_status()
+
+        try:
+            page = await read_group_page(response)
+        except ValueError as ex:
+            raise httpx.DecodingError(str(ex), request=response.request) from ex
+        return page, response_validators(response.headers)
+
+
+async def read_group_page(response: httpx.Response) -> GroupPage:
+    """Read a page of groups from the body of a streamed response.
+
+    Arguments:
+        response (httpx.Response): Response of mAP groups API.
+
+    Returns:
+        GroupPage: Group IDs and pagination of the response.
+
+    """
+    if not config.STREAM_RESPONSES:
+        return decode_group_page(await response.aread())
+
+    parser = GroupPageParser()
+    async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+        parser.feed(chunk)
+    return parser.close()
+
+
+async def set_groups_to_redis(
+    fqdn: str,
+    group_ids: list[str],
+    *,
+    validators: dict[str, str] | None = None,
+    store: Redis,
+) -> bool:
+    """Set groups to redis in a single MULTI/EXEC transaction.
+
+    `groups` is rewritten only if the digest of the group IDs has changed.
+
+    Arguments:
+        fqdn(str): fqdn of the target sp
+        group_ids(list[str]): list of group ids
+        validators(dict[str, str] | None): validators of the mAP API response
+        store(Redis): Redis store object for asyncio.
+
+    Returns:
+        bool: Whether the cached groups were rewritten.
+
+    """
+    async with store.pipeline(transaction=True) as pipe:
+        queue_groups(pipe, fqdn, group_ids, validators)
+        (changed,) = await pipe.execute()
+    return bool(changed)
+
+
+async def touch_groups(fqdn: str, *, store: Redis) -> int:
+    """Refresh `updated_at` and TTL of groups that have not been modified.
+
+    Arguments:
+        fqdn(str): fqdn of the target sp
+        store(Redis): Redis store object for asyncio.
+
+    Returns:
+        int: Number of cached groups, or -1 if the cache has already expired.
+
+    """
+    async with store.pipeline(transaction=False) as pipe:
+        queue_touch(pipe, fqdn)
+        (group_count,) = await pipe.execute()
+    return group_count
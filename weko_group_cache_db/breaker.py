@@ -0,0 +1,220 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Circuit breaker module for weko-group-cache-db."""
+
+import contextlib
+import ssl
+import threading
+import time
+import typing as t
+
+from contextvars import ContextVar
+from http import HTTPStatus
+
+import httpx
+import requests
+
+from werkzeug.local import LocalProxy
+
+from .config import config
+from .exc import CircuitOpenError
+from .logger import logger
+
+type CircuitState = t.Literal["closed", "open", "half-open"]
+"""State of a circuit breaker."""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker of requests to an endpoint.
+
+    The circuit opens after `threshold` consecutive endpoint failures,
+    and requests fail fast with `CircuitOpenError` while it is open.
+    Once `reset_timeout` has passed, the circuit is half-open and lets
+    a single request probe the endpoint. It closes if the probe succeeds,
+    and opens again if the probe fails.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        threshold: int,
+        reset_timeout: float,
+        *,
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the circuit breaker.
+
+        Args:
+            endpoint (str): The endpoint guarded by the circuit breaker.
+            threshold (int):
+                Number of consecutive failures that open the circuit.
+                The circuit never opens if it is 0 or less.
+            reset_timeout (float):
+                Seconds the circuit stays open before it lets a request probe.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+
+        """
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state of the circuit."""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> CircuitState:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_request(self) -> bool:
+        """Check whether a request may be sent to the endpoint.
+
+        Returns:
+            bool: Whether the request is the probe of a half-open circuit.
+
+        Raises:
+            CircuitOpenError:
+                If the circuit is open, or half-open with a probe in flight.
+
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            retry_after = max(
+                0.0, t.cast(float, self._opened_at) + self.reset_timeout - self._clock()
+            )
+        raise CircuitOpenError(self.endpoint, retry_after)
+
+    def record_success(self) -> None:
+        """Record a request that reached the endpoint, closing the circuit."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit breaker of %s closed.", self.endpoint)
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Record an endpoint failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.threshold <= 0:
+                return
+            if self._opened_at is None and self._failures >= self.threshold:
+                logger.warning(
+                    "Circuit breaker of %(endpoint)s opened after "
+                    "%(count)d consecutive failures.",
+                    {"endpoint": self.endpoint, "count": self._failures},
+                )
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = self._clock()
+
+    def _cancel_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    @contextlib.contextmanager
+    def guard(self) -> t.Generator[None]:
+        """Guard requests to the endpoint made in the context.
+
+        Endpoint failures raised in the context are recorded as failures.
+        Other errors mean the endpoint responded, so they are recorded
+        as successes. A cancelled probe lets another request probe.
+
+        Yields:
+            None: Nothing.
+
+        Raises:
+            CircuitOpenError: If the circuit does not let requests through.
+
+        """  # noqa: DOC502
+        probe = self.before_request()
+        try:
+            yield
+        except Exception as ex:
+            if is_endpoint_failure(ex):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            if probe:
+                self._cancel_probe()
+            raise
+        else:
+            self.record_success()
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Return whether an error means that the endpoint itself is failing.
+
+    Connection errors, timeouts and 5xx responses are endpoint failures.
+    TLS errors are not, since they may be caused by the client certificate
+    of an institution rather than the endpoint.
+
+    Arguments:
+        error (BaseException): Error raised by a request.
+
+    Returns:
+        bool: Whether the error is an endpoint failure.
+
+    """
+    if isinstance(error, requests.HTTPError | httpx.HTTPStatusError):
+        return (
+            error.response is not None
+            and error.response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+
+    cause: BaseException | None = error
+    while cause is not None:
+        if isinstance(cause, ssl.SSLError | requests.exceptions.SSLError):
+            return False
+        cause = cause.__cause__ or cause.__context__
+
+    return isinstance(
+        error, requests.ConnectionError | requests.Timeout | httpx.TransportError
+    )
+
+
+_current_circuit_breaker: ContextVar[CircuitBreaker] = ContextVar(
+    "current_circuit_breaker"
+)
+
+
+def setup_circuit_breaker() -> CircuitBreaker:
+    """Initialize the circuit breaker for mAP API requests from the config.
+
+    Returns:
+        CircuitBreaker: The circuit breaker shared by every request in this context.
+
+    """
+    breaker = CircuitBreaker(
+        config.MAP_GROUPS_API_ENDPOINT,
+        config.CIRCUIT_BREAKER_THRESHOLD,
+        config.CIRCUIT_BREAKER_RESET_TIMEOUT,
+    )
+    _current_circuit_breaker.set(breaker)
+    return breaker
+
+
+circuit_breaker = t.cast(
+    CircuitBreaker,
+    LocalProxy(lambda: _current_circuit_breaker.get(None) or setup_circuit_breaker()),
+)
@@ -0,0 +1,662 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Redis cache writing module for weko-group-cache-db."""
+
+import hashlib
+import threading
+import time
+import traceback
+import typing as t
+
+from datetime import UTC, datetime, timedelta
+
+import backoff
+import redis
+
+from .config import config
+from .exc import CacheExpiredError
+from .logger import logger
+
+if t.TYPE_CHECKING:
+    from collections.abc import Sequence  # pragma: no cover
+
+    from redis import Redis  # pragma: no cover
+    from redis.asyncio import Redis as AsyncRedis  # pragma: no cover
+    from redis.asyncio.client import Pipeline as AsyncPipeline  # pragma: no cover
+    from redis.client import Pipeline  # pragma: no cover
+
+
+VALIDATOR_FIELDS = ("etag", "last_modified")
+"""Hash fields that keep the validators of the last mAP API response."""
+
+WRITE_SCRIPT = """
+local changed = redis.call("HGET", KEYS[1], "digest") ~= ARGV[3]
+if changed then
+    redis.call("HSET", KEYS[1], "groups", ARGV[4], "digest", ARGV[3])
+end
+redis.call(
+    "HSET", KEYS[1], "updated_at", ARGV[1], "etag", ARGV[5], "last_modified", ARGV[6]
+)
+redis.call("HDEL", KEYS[1], "stale_since")
+if tonumber(ARGV[2]) >= 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+else
+    redis.call("PERSIST", KEYS[1])
+end
+if changed then
+    return 1
+end
+return 0
+"""
+"""Lua script that writes groups only if their digest differs from the cached one.
+
+`updated_at`, validators and TTL are always refreshed, and `stale_since` is removed.
+It returns 1 if the groups were written, or 0 if they were unchanged.
+"""
+
+TOUCH_SCRIPT = """
+local groups = redis.call("HGET", KEYS[1], "groups")
+if not groups then
+    return -1
+end
+redis.call("HSET", KEYS[1], "updated_at", ARGV[1])
+redis.call("HDEL", KEYS[1], "stale_since")
+if tonumber(ARGV[2]) >= 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+else
+    redis.call("PERSIST", KEYS[1])
+end
+if groups == "" then
+    return 0
+end
+local _, separators = string.gsub(groups, ",", "")
+return separators + 1
+"""
+"""Lua script that refreshes `updated_at` and TTL of an existing group cache.
+
+`stale_since` is removed, since the groups have been revalidated.
+
+It returns the number of cached groups, or -1 if the cache does not exist.
+"""
+
+
+class CacheResult(t.NamedTuple):
+    """Result of caching groups of an institution."""
+
+    group_count: int
+    """Number of cached groups."""
+
+    changed: bool
+    """Whether the cached groups were rewritten."""
+
+
+EXTEND_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+local updated_at = redis.call("HGET", KEYS[1], "updated_at")
+if ARGV[3] == "" or not updated_at or updated_at < ARGV[3] then
+    redis.call("HSETNX", KEYS[1], "stale_since", ARGV[1])
+end
+if tonumber(ARGV[2]) >= 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+else
+    redis.call("PERSIST", KEYS[1])
+end
+return 1
+"""
+"""Lua script that extends TTL of an existing group cache without revalidating it.
+
+`stale_since` is set unless the cache is already stale or was updated
+after ARGV[3], which is compared with `updated_at` as an ISO 8601 string in UTC.
+An empty ARGV[3] marks every existing cache stale.
+`updated_at` is left as is.
+It returns 1 if the cache was extended, or 0 if it does not exist.
+"""
+
+
+class Freshness(t.NamedTuple):
+    """Freshness of the group cache of an institution."""
+
+    updated_at: datetime | None
+    """Time the groups were last cached, or None if the cache does not exist."""
+
+    ttl: int
+    """Remaining time-to-live in seconds.
+
+    -1 if the cache never expires, -2 if it does not exist.
+    """
+
+    def is_stale(self, now: datetime) -> bool:
+        """Whether the cache should be refreshed in a stale-only run.
+
+        Arguments:
+            now (datetime): Current time.
+
+        Returns:
+            bool:
+                True if the cache does not exist, is older than `STALE_AFTER`,
+                or expires within `STALE_TTL_MARGIN`.
+
+        """
+        if self.updated_at is None or self.ttl == -2:  # noqa: PLR2004
+            return True
+        if (now - self.updated_at).total_seconds() >= config.STALE_AFTER:
+            return True
+        return 0 <= self.ttl <= config.STALE_TTL_MARGIN
+
+
+def cache_key(fqdn: str) -> str:
+    """Return the Redis key of the group cache for the given FQDN.
+
+    Arguments:
+        fqdn (str): FQDN of the institution.
+
+    Returns:
+        str: Redis key.
+
+    """
+    return fqdn.replace(".", "_").replace("-", "_") + config.CACHE_KEY_SUFFIX
+
+
+def cache_ttl(fqdn: str) -> int:
+    """Return the time-to-live of the group cache for the given FQDN.
+
+    `CACHE_TTL` is extended by an offset up to `CACHE_TTL_SPREAD`
+    derived from a hash of the FQDN, so that caches written together
+    do not expire together. The offset of each FQDN is the same in every run.
+
+    Arguments:
+        fqdn (str): FQDN of the institution.
+
+    Returns:
+        int: Time-to-live in seconds, or a negative value for no expiration.
+
+    """
+    if config.CACHE_TTL < 0 or config.CACHE_TTL_SPREAD <= 0:
+        return config.CACHE_TTL
+
+    digest = hashlib.sha256(fqdn.encode()).digest()
+    offset = int.from_bytes(digest[:8]) % (config.CACHE_TTL_SPREAD + 1)
+    return config.CACHE_TTL + offset
+
+
+def groups_digest(group_ids: list[str]) -> str:
+    """Return a digest of group IDs that does not depend on their order.
+
+    Arguments:
+        group_ids (list[str]): List of group IDs.
+
+    Returns:
+        str: Hex digest of the sorted group IDs.
+
+    """
+    return hashlib.sha256(",".join(sorted(group_ids)).encode()).hexdigest()
+
+
+def parse_validators(values: Sequence[bytes | str | None]) -> dict[str, str]:
+    """Build validators from the values of `VALIDATOR_FIELDS` read from Redis.
+
+    Arguments:
+        values (Sequence[bytes | str | None]):
+            Values in the order of `VALIDATOR_FIELDS`, which are strings
+            if the client decodes responses.
+
+    Returns:
+        dict[str, str]: Validators that are stored and not empty.
+
+    """
+    return {
+        field: value if isinstance(value, str) else value.decode()
+        for field, value in zip(VALIDATOR_FIELDS, values, strict=True)
+        if value
+    }
+
+
+def get_validators(store: Redis, fqdn: str) -> dict[str, str]:
+    """Get the validators of the last mAP API response for the given FQDN.
+
+    Arguments:
+        store (Redis): Redis store object.
+        fqdn (str): FQDN of the institution.
+
+    Returns:
+        dict[str, str]: Validators keyed by their hash fields.
+
+    """
+    return parse_validators(store.hmget(cache_key(fqdn), VALIDATOR_FIELDS))
+
+
+def get_all_validators(store: Redis, fqdns: list[str]) -> list[dict[str, str]]:
+    """Get the validators of the last responses for many FQDNs in one pipeline.
+
+    Arguments:
+        store (Redis): Redis store object.
+        fqdns (list[str]): FQDNs of the institutions.
+
+    Returns:
+        list[dict[str, str]]: Validators of each institution in the order of `fqdns`.
+
+    """
+    with store.pipeline(transaction=False) as pipe:
+        for fqdn in fqdns:
+            pipe.hmget(cache_key(fqdn), VALIDATOR_FIELDS)
+        results = pipe.execute()
+    return [parse_validators(values) for values in results]
+
+
+def parse_freshness(updated_at: bytes | None, ttl: int) -> Freshness:
+    """Build freshness from `updated_at` and TTL of a group cache read from Redis.
+
+    `updated_at` that cannot be parsed is treated as missing,
+    and one without a time zone is treated as UTC.
+
+    Arguments:
+        updated_at (bytes | None): Value of the `updated_at` field.
+        ttl (int): Remaining time-to-live of the key.
+
+    Returns:
+        Freshness: Freshness of the group cache.
+
+    """
+    try:
+        timestamp = datetime.fromisoformat(updated_at.decode()) if updated_at else None
+    except ValueError:
+        timestamp = None
+    if timestamp is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return Freshness(timestamp, ttl)
+
+
+def get_freshness(store: Redis, fqdns: list[str]) -> list[Freshness]:
+    """Get the freshness of group caches for many institutions in one pipeline.
+
+    Arguments:
+        store (Redis): Redis store object.
+        fqdns (list[str]): FQDNs of the institutions.
+
+    Returns:
+        list[Freshness]: Freshness of each group cache in the order of `fqdns`.
+
+    """
+    with store.pipeline(transaction=False) as pipe:
+        for fqdn in fqdns:
+            queue_freshness(pipe, fqdn)
+        results = pipe.execute()
+    return [parse_freshness(*results[i : i + 2]) for i in range(0, len(results), 2)]
+
+
+def queue_freshness(pipe: Pipeline | AsyncPipeline, fqdn: str) -> int:
+    """Queue commands that read `updated_at` and TTL of a group cache.
+
+    Arguments:
+        pipe(Pipeline | AsyncPipeline): Redis pipeline to queue commands on.
+        fqdn(str): fqdn of the target sp
+
+    Returns:
+        int: Number of queued commands.
+
+    """
+    key = cache_key(fqdn)
+    pipe.hget(key, "updated_at")
+    pipe.ttl(key)
+    return 2
+
+
+def queue_groups(
+    pipe: Pipeline | AsyncPipeline,
+    fqdn: str,
+    group_ids: list[str],
+    validators: dict[str, str] | None = None,
+) -> int:
+    """Queue a command that sets groups to redis on the given pipeline.
+
+    The groups are written only if they differ from the cached ones.
+    The result of the command is 1 if they were written, otherwise 0.
+
+    Arguments:
+        pipe(Pipeline | AsyncPipeline): Redis pipeline to queue commands on.
+        fqdn(str): fqdn of the target sp
+        group_ids(list[str]): list of group ids
+        validators(dict[str, str] | None): validators of the mAP API response
+
+    Returns:
+        int: Number of queued commands.
+
+    """
+    updated_at = datetime.now(UTC).isoformat(timespec="seconds")
+    validators = validators or {}
+
+    pipe.eval(
+        WRITE_SCRIPT,
+        1,
+        cache_key(fqdn),
+        updated_at,
+        cache_ttl(fqdn),
+        groups_digest(group_ids),
+        ",".join(group_ids),
+        *(validators.get(field, "") for field in VALIDATOR_FIELDS),
+    )
+    return 1
+
+
+def queue_touch(pipe: Pipeline | AsyncPipeline, fqdn: str) -> int:
+    """Queue a command that refreshes `updated_at` and TTL of a group cache.
+
+    The result of the command is the number of cached groups,
+    or -1 if the cache has already expired.
+
+    Arguments:
+        pipe(Pipeline | AsyncPipeline): Redis pipeline to queue commands on.
+        fqdn(str): fqdn of the target sp
+
+    Returns:
+        int: Number of queued commands.
+
+    """
+    updated_at = datetime.now(UTC).isoformat(timespec="seconds")
+    pipe.eval(TOUCH_SCRIPT, 1, cache_key(fqdn), updated_at, cache_ttl(fqdn))
+    return 1
+
+
+def queue_extend(
+    pipe: Pipeline | AsyncPipeline, fqdn: str, *, stale_after: float | None = None
+) -> int:
+    """Queue a command that extends TTL of a group cache and marks it stale.
+
+    The result of the command is 1 if the cache was extended,
+    or 0 if it does not exist.
+
+    Arguments:
+        pipe(Pipeline | AsyncPipeline): Redis pipeline to queue commands on.
+        fqdn(str): fqdn of the target sp
+        stale_after(float | None):
+            Age in seconds after which the cache is marked stale,
+            or None to mark it stale regardless of its age.
+
+    Returns:
+        int: Number of queued commands.
+
+    """
+    now = datetime.now(UTC)
+    updated_before = (
+        ""
+        if stale_after is None
+        else (now - timedelta(seconds=stale_after)).isoformat(timespec="seconds")
+    )
+    pipe.eval(
+        EXTEND_SCRIPT,
+        1,
+        cache_key(fqdn),
+        now.isoformat(timespec="seconds"),
+        cache_ttl(fqdn),
+        updated_before,
+    )
+    return 1
+
+
+def extend_caches(
+    store: Redis, fqdns: list[str], *, stale_after: float | None = None
+) -> list[str]:
+    """Extend TTL of group caches for many institutions in one pipeline.
+
+    Arguments:
+        store (Redis): Redis store object.
+        fqdns (list[str]): FQDNs of the institutions.
+        stale_after (float | None):
+            Age in seconds after which a cache is marked stale,
+            or None to mark every extended cache stale.
+
+    Returns:
+        list[str]: FQDNs whose caches existed and were extended.
+
+    """
+    with store.pipeline(transaction=False) as pipe:
+        for fqdn in fqdns:
+            queue_extend(pipe, fqdn, stale_after=stale_after)
+        results = pipe.execute()
+    return [fqdn for fqdn, extended in zip(fqdns, results, strict=True) if extended]
+
+
+async def extend_caches_async(store: AsyncRedis, fqdns: list[str]) -> list[str]:
+    """Extend TTL of group caches for many institutions in one asyncio pipeline.
+
+    Arguments:
+        store (AsyncRedis): Redis store object for asyncio.
+        fqdns (list[str]): FQDNs of the institutions.
+
+    Returns:
+        list[str]: FQDNs whose caches existed and were extended.
+
+    """
+    async with store.pipeline(transaction=False) as pipe:
+        for fqdn in fqdns:
+            queue_extend(pipe, fqdn)
+        results = await pipe.execute()
+    return [fqdn for fqdn, extended in zip(fqdns, results, strict=True) if extended]
+
+
+def keep_stale(store: Redis, fqdns: list[str]) -> None:
+    """Extend TTL of group caches of institutions that failed to update.
+
+    Every extended cache is marked stale, however recently it was updated.
+    It does nothing unless `STALE_WHILE_REVALIDATE` is enabled.
+    Redis errors are logged but not raised, so as not to hide the update failures.
+
+    Arguments:
+        store (Redis): Redis store object.
+        fqdns (list[str]): FQDNs of the institutions that failed to update.
+
+    """
+    if not config.STALE_WHILE_REVALIDATE or not fqdns:
+        return
+
+    try:
+        extended = extend_caches(store, fqdns)
+    except redis.RedisError:
+        extended = None
+    _report_kept_stale(fqdns, extended)
+
+
+async def keep_stale_async(store: AsyncRedis, fqdns: list[str]) -> None:
+    """Extend TTL of group caches of institutions that failed to update on asyncio.
+
+    See `keep_stale`.
+
+    Arguments:
+        store (AsyncRedis): Redis store object for asyncio.
+        fqdns (list[str]): FQDNs of the institutions that failed to update.
+
+    """
+    if not config.STALE_WHILE_REVALIDATE or not fqdns:
+        return
+
+    try:
+        extended = await extend_caches_async(store, fqdns)
+    except redis.RedisError:
+        extended = None
+    _report_kept_stale(fqdns, extended)
+
+
+def _report_kept_stale(fqdns: list[str], extended: list[str] | None) -> None:
+    if extended is None:
+        logger.error("Failed to extend group caches of failed institutions.")
+        traceback.print_exc()
+        return
+
+    logger.warning(
+        "Kept stale group caches of %(count)d of %(total)d failed institution(s).",
+        {"count": len(extended), "total": len(fqdns)},
+    )
+
+
+type _Entry = tuple[str, list[str] | None, dict[str, str]]
+
+
+class WriteBuffer:
+    """Buffer that writes group caches of many institutions in one pipeline.
+
+    Buffered entries are flushed when `size` entries are pending,
+    or when an entry is added `interval` seconds after the last flush.
+    Remaining entries are flushed when the buffer is closed.
+    The result of each institution is reported through `on_flushed`.
+    """
+
+    def __init__(
+        self,
+        store: Redis,
+        *,
+        size: int,
+        interval: float,
+        on_flushed: t.Callable[[str, CacheResult, Exception | None], t.Any],
+    ) -> None:
+        """Initialize the write buffer.
+
+        Args:
+            store (Redis): Redis store object.
+            size (int): Number of institutions flushed in one pipeline.
+            interval (float): Maximum seconds between flushes.
+            on_flushed (Callable[[str, CacheResult, Exception | None], Any]):
+                Callback invoked with FQDN, result and error (None if succeeded)
+                for each flushed institution.
+
+        """
+        self.store = store
+        self.size = max(1, size)
+        self.interval = interval
+        self.on_flushed = on_flushed
+        self._pending: list[_Entry] = []
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> t.Self:  # noqa: D105
+        return self
+
+    def __exit__(self, *_: object) -> None:  # noqa: D105
+        self.flush()
+
+    def add(
+        self,
+        fqdn: str,
+        group_ids: list[str],
+        validators: dict[str, str] | None = None,
+    ) -> None:
+        """Buffer groups of an institution and flush if the buffer is due.
+
+        Arguments:
+            fqdn (str): FQDN of the institution.
+            group_ids (list[str]): List of group IDs.
+            validators (dict[str, str] | None): Validators of the mAP API response.
+
+        """
+        self._append((fqdn, group_ids, validators or {}))
+
+    def touch(self, fqdn: str) -> None:
+        """Buffer a refresh of `updated_at` and TTL of an unchanged institution.
+
+        If the cache has expired by the time it is flushed,
+        `CacheExpiredError` is reported for the institution.
+
+        Arguments:
+            fqdn (str): FQDN of the institution.
+
+        """
+        self._append((fqdn, None, {}))
+
+    def _append(self, entry: _Entry) -> None:
+        with self._lock:
+            self._pending.append(entry)
+            due = (
+                len(self._pending) >= self.size
+                or time.monotonic() - self._flushed_at >= self.interval
+            )
+
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered institutions in one transactional pipeline."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._flushed_at = time.monotonic()
+
+        if not pending:
+            return
+
+        try:
+            results, counts = _execute_with_retries()(self.store, pending)
+        except redis.RedisError as ex:
+            for fqdn, group_ids, _ in pending:
+                self.on_flushed(
+                    fqdn, CacheResult(len(group_ids or ()), changed=False), ex
+                )
+            return
+
+        index = 0
+        for (fqdn, group_ids, _), count in zip(pending, counts, strict=True):
+            entry_results = results[index : index + count]
+            index += count
+
+            error = next(
+                (
+                    result
+                    for result in entry_results
+                    if isinstance(result, redis.RedisError)
+                ),
+                None,
+            )
+            if error is not None:
+                self.on_flushed(
+                    fqdn, CacheResult(len(group_ids or ()), changed=False), error
+                )
+            elif group_ids is not None:
+                # the write script returns whether the groups were written
+                self.on_flushed(
+                    fqdn, CacheResult(len(group_ids), bool(entry_results[0])), None
+                )
+            elif entry_results[0] >= 0:
+                # the touch script returns the number of cached groups
+                self.on_flushed(
+                    fqdn, CacheResult(entry_results[0], changed=False), None
+                )
+            else:
+                self.on_flushed(
+                    fqdn, CacheResult(0, changed=False), CacheExpiredError(fqdn)
+                )
+
+
+def _execute_with_retries() -> t.Callable[
+    [Redis, list[_Entry]], tuple[list[t.Any], list[int]]
+]:
+    """Return a function that writes buffered entries with retries.
+
+    Returns:
+        Callable[[Redis,list[tuple[str,list[str]|None,dict[str,str]]]],tuple[list[Any],list[int]]]:
+            A function that takes a Redis store and buffered entries,
+            and returns results of the pipeline and command counts per entry.
+
+    """
+
+    @backoff.on_exception(
+        lambda: backoff.expo(
+            base=config.REQUEST_RETRY_BASE,
+            factor=config.REQUEST_RETRY_FACTOR,
+            max_value=config.REQUEST_RETRY_MAX,
+        ),
+        redis.RedisError,
+        max_tries=config.REQUEST_RETRIES + 1,
+        jitter=backoff.full_jitter,
+    )
+    def _execute(store: Redis, pending: list[_Entry]) -> tuple[list[t.Any], list[int]]:
+        with store.pipeline(transaction=True) as pipe:
+            counts = [
+                queue_touch(pipe, fqdn)
+                if group_ids is None
+                else queue_groups(pipe, fqdn, group_ids, validators)
+                for fqdn, group_ids, validators in pending
+            ]
+            return pipe.execute(raise_on_error=False), counts
+
+    return _execute
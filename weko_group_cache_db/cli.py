@@ -9,9 +9,12 @@ import operator
 import click as click_
 import rich_click as click
 
+from . import aio
 from .config import setup_config
-from .groups import fetch_all, fetch_one
+from .daemon import serve as serve_forever
+from .groups import extend_all, fetch_all, fetch_one
 from .logger import logger, setup_logger
+from .report import report_certificates, report_expiry
 
 click.rich_click.SHOW_ARGUMENTS = True
 
@@ -59,28 +62,95 @@ def main():
     default=DEFAULT_CONFIG_PATH,
     help="Specify the path to the configuration TOML file.",
 )
-def run(file_path: str, directory_path: str, fqdn_list_file: str, config_path: str):
+@click.option(
+    "--concurrency",
+    "-n",
+    type=click.IntRange(min=1),
+    required=False,
+    default=None,
+    help="Specify the number of institutions to process concurrently. "
+    "Overrides FETCH_CONCURRENCY setting.",
+)
+@click.option(
+    "--engine",
+    "-e",
+    type=click.Choice(["sync", "async"]),
+    required=False,
+    default="sync",
+    help="Specify the fetch engine. "
+    "`async` runs requests and Redis writes as coroutines on an event loop.",
+)
+@click.option(
+    "--stale-only",
+    "-s",
+    is_flag=True,
+    default=False,
+    help="Refresh only institutions whose caches are missing, "
+    "older than STALE_AFTER or near expiry.",
+)
+@click.option(
+    "--shard-index",
+    type=click.IntRange(min=0),
+    required=False,
+    default=None,
+    help="Specify the shard of institutions processed by this worker. "
+    "Overrides SHARD_INDEX setting.",
+)
+@click.option(
+    "--shard-count",
+    type=click.IntRange(min=1),
+    required=False,
+    default=None,
+    help="Specify the number of workers that share the institutions. "
+    "Overrides SHARD_COUNT setting.",
+)
+def run(  # noqa: PLR0913, PLR0917
+    file_path: str,
+    directory_path: str,
+    fqdn_list_file: str,
+    config_path: str,
+    concurrency: int | None,
+    engine: str,
+    stale_only: bool,  # noqa: FBT001
+    shard_index: int | None,
+    shard_count: int | None,
+):
     """Fetch and cache groups for all institutions.
 
     Cannot specify both --file-path and --directory-path/--fqdn-list-file.
+    Each worker given the same --shard-count and its own --shard-index
+    processes a disjoint part of the institutions.
 
     """
-    setup_config(config_path)
+    setup_config(
+        config_path,
+        **setting_overrides(
+            FETCH_CONCURRENCY=concurrency,
+            SHARD_INDEX=shard_index,
+            SHARD_COUNT=shard_count,
+        ),
+    )
     setup_logger(__package__)  # pyright: ignore[reportArgumentType]
 
     validate_source_options(file_path, directory_path, fqdn_list_file)
+    validate_shard_options(shard_index, shard_count)
+    fetch = aio.fetch_all if engine == "async" else fetch_all
 
     if directory_path and fqdn_list_file:
         logger.info(
             f"Loading from directory source: {directory_path} and {fqdn_list_file}"
         )
-        fetch_all(directory_path=directory_path, fqdn_list_file=fqdn_list_file)
+        fetch(
+            stale_only=stale_only,
+            directory_path=directory_path,
+            fqdn_list_file=fqdn_list_file,
+        )
     else:
         if file_path is None:
             file_path = DEFAULT_INSTITUTIONS_PATH
 
         logger.info(f"Loading from file source: {file_path}")
-        fetch_all(toml_path=file_path)
+        fetch(stale_only=stale_only, toml_path=file_path)
 
 
 @main.command(context_settings={"show_default": True})
@@ -124,12 +194,19 @@ def run(file_path: str, directory_path: str, fqdn_list_file: str, config_path: s
     default=DEFAULT_CONFIG_PATH,
     help="Specify the path to the configuration TOML file.",
 )
-def one(
+@click.option(
+    "--load-all",
+    is_flag=True,
+    default=False,
+    help="Load and validate all institutions before looking up the FQDN.",
+)
+def one(  # noqa: PLR0913, PLR0917
     fqdn: str,
     file_path: str,
     directory_path: str,
     fqdn_list_file: str,
     config_path: str,
+    load_all: bool,  # noqa: FBT001
 ):
     """Fetch and cache groups for a single institution.
 
@@ -145,13 +222,289 @@ def one(
         logger.info(
             f"Loading from directory source: {directory_path} and {fqdn_list_file}"
         )
-        fetch_one(fqdn, directory_path=directory_path, fqdn_list_file=fqdn_list_file)
+        fetch_one(
+            fqdn,
+            load_all=load_all,
+            directory_path=directory_path,
+            fqdn_list_file=fqdn_list_file,
+        )
     else:
         if file_path is None:
             file_path = DEFAULT_INSTITUTIONS_PATH
 
         logger.info(f"Loading from file source: {file_path}")
-        fetch_one(fqdn, toml_path=file_path)
+        fetch_one(fqdn, load_all=load_all, toml_path=file_path)
+
+
+@main.command(context_settings={"show_default": True})
+@click.option(
+    "--file-path",
+    "-f",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the TOML file containing institution data.",
+)
+@click.option(
+    "--directory-path",
+    "-d",
+    type=click.Path(exists=True, file_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the directory containing institution TLS files.",
+)
+@click.option(
+    "--fqdn-list-file",
+    "-l",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the file containing FQDN list.",
+)
+@click.option(
+    "--config-path",
+    "-c",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=DEFAULT_CONFIG_PATH,
+    help="Specify the path to the configuration TOML file.",
+)
+@click.option(
+    "--concurrency",
+    "-n",
+    type=click.IntRange(min=1),
+    required=False,
+    default=None,
+    help="Specify the number of institutions to process concurrently. "
+    "Overrides FETCH_CONCURRENCY setting.",
+)
+def serve(
+    file_path: str,
+    directory_path: str,
+    fqdn_list_file: str,
+    config_path: str,
+    concurrency: int | None,
+):
+    """Keep groups of all institutions cached, refreshing each on its own interval.
+
+    Cannot specify both --file-path and --directory-path/--fqdn-list-file.
+
+    """
+    setup_config(config_path, **setting_overrides(FETCH_CONCURRENCY=concurrency))
+    setup_logger(__package__)  # pyright: ignore[reportArgumentType]
+
+    validate_source_options(file_path, directory_path, fqdn_list_file)
+
+    if directory_path and fqdn_list_file:
+        logger.info(
+            f"Loading from directory source: {directory_path} and {fqdn_list_file}"
+        )
+        serve_forever(directory_path=directory_path, fqdn_list_file=fqdn_list_file)
+    else:
+        if file_path is None:
+            file_path = DEFAULT_INSTITUTIONS_PATH
+
+        logger.info(f"Loading from file source: {file_path}")
+        serve_forever(toml_path=file_path)
+
+
+@main.command(context_settings={"show_default": True})
+@click.option(
+    "--file-path",
+    "-f",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the TOML file containing institution data.",
+)
+@click.option(
+    "--directory-path",
+    "-d",
+    type=click.Path(exists=True, file_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the directory containing institution TLS files.",
+)
+@click.option(
+    "--fqdn-list-file",
+    "-l",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the file containing FQDN list.",
+)
+@click.option(
+    "--config-path",
+    "-c",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=DEFAULT_CONFIG_PATH,
+    help="Specify the path to the configuration TOML file.",
+)
+@click.option(
+    "--bucket",
+    "-b",
+    type=click.IntRange(min=1),
+    required=False,
+    default=3600,
+    help="Specify the width in seconds of each histogram bucket.",
+)
+def expiry(
+    file_path: str,
+    directory_path: str,
+    fqdn_list_file: str,
+    config_path: str,
+    bucket: int,
+):
+    """Report a histogram of the time until group caches expire.
+
+    Cannot specify both --file-path and --directory-path/--fqdn-list-file.
+
+    """
+    setup_config(config_path)
+    setup_logger(__package__)  # pyright: ignore[reportArgumentType]
+
+    validate_source_options(file_path, directory_path, fqdn_list_file)
+
+    if directory_path and fqdn_list_file:
+        logger.info(
+            f"Loading from directory source: {directory_path} and {fqdn_list_file}"
+        )
+        report_expiry(
+            bucket=bucket, directory_path=directory_path, fqdn_list_file=fqdn_list_file
+        )
+    else:
+        if file_path is None:
+            file_path = DEFAULT_INSTITUTIONS_PATH
+
+        logger.info(f"Loading from file source: {file_path}")
+        report_expiry(bucket=bucket, toml_path=file_path)
+
+
+@main.command(context_settings={"show_default": True})
+@click.option(
+    "--file-path",
+    "-f",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the TOML file containing institution data.",
+)
+@click.option(
+    "--directory-path",
+    "-d",
+    type=click.Path(exists=True, file_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the directory containing institution TLS files.",
+)
+@click.option(
+    "--fqdn-list-file",
+    "-l",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the file containing FQDN list.",
+)
+@click.option(
+    "--config-path",
+    "-c",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=DEFAULT_CONFIG_PATH,
+    help="Specify the path to the configuration TOML file.",
+)
+def touch(
+    file_path: str,
+    directory_path: str,
+    fqdn_list_file: str,
+    config_path: str,
+):
+    """Extend TTL of group caches for all institutions without calling mAP API.
+
+    Cannot specify both --file-path and --directory-path/--fqdn-list-file.
+
+    """
+    setup_config(config_path)
+    setup_logger(__package__)  # pyright: ignore[reportArgumentType]
+
+    validate_source_options(file_path, directory_path, fqdn_list_file)
+
+    if directory_path and fqdn_list_file:
+        logger.info(
+            f"Loading from directory source: {directory_path} and {fqdn_list_file}"
+        )
+        extend_all(directory_path=directory_path, fqdn_list_file=fqdn_list_file)
+    else:
+        if file_path is None:
+            file_path = DEFAULT_INSTITUTIONS_PATH
+
+        logger.info(f"Loading from file source: {file_path}")
+        extend_all(toml_path=file_path)
+
+
+@main.command(context_settings={"show_default": True})
+@click.option(
+    "--file-path",
+    "-f",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the TOML file containing institution data.",
+)
+@click.option(
+    "--directory-path",
+    "-d",
+    type=click.Path(exists=True, file_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the directory containing institution TLS files.",
+)
+@click.option(
+    "--fqdn-list-file",
+    "-l",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=None,
+    help="Specify the path to the file containing FQDN list.",
+)
+@click.option(
+    "--config-path",
+    "-c",
+    type=click.Path(exists=True, dir_okay=False, path_type=str),
+    required=False,
+    default=DEFAULT_CONFIG_PATH,
+    help="Specify the path to the configuration TOML file.",
+)
+def certs(
+    file_path: str,
+    directory_path: str,
+    fqdn_list_file: str,
+    config_path: str,
+):
+    """Report TLS client certificates that cannot be used or expire soon.
+
+    Cannot specify both --file-path and --directory-path/--fqdn-list-file.
+
+    """
+    setup_config(config_path)
+    setup_logger(__package__)  # pyright: ignore[reportArgumentType]
+
+    validate_source_options(file_path, directory_path, fqdn_list_file)
+
+    if directory_path and fqdn_list_file:
+        logger.info(
+            f"Loading from directory source: {directory_path} and {fqdn_list_file}"
+        )
+        report_certificates(
+            directory_path=directory_path, fqdn_list_file=fqdn_list_file
+        )
+    else:
+        if file_path is None:
+            file_path = DEFAULT_INSTITUTIONS_PATH
+
+        logger.info(f"Loading from file source: {file_path}")
+        report_certificates(toml_path=file_path)
 
 
 def validate_source_options(
@@ -172,3 +525,30 @@ def validate_source_options(
     if not file_path and operator.xor(directory_path is None, fqdn_list_file is None):
         error = "Both --directory-path and --fqdn-list-file must be specified."
         raise click_.UsageError(error)
+
+
+def validate_shard_options(shard_index: int | None, shard_count: int | None) -> None:
+    """Validate shard options for splitting institutions among workers.
+
+    Their range is validated by `Settings` together with the settings.
+
+    Raises:
+        click.UsageError: If only one of the shard options is specified.
+
+    """
+    if (shard_index is None) != (shard_count is None):
+        error = "Both --shard-index and --shard-count must be specified."
+        raise click_.UsageError(error)
+
+
+def setting_overrides(**options: object) -> dict[str, object]:
+    """Collect settings given as command line options.
+
+    Arguments:
+        options (object): Setting names and option values.
+
+    Returns:
+        dict[str, object]: Settings whose options were specified.
+
+    """
+    return {name: value for name, value in options.items() if value is not None}
@@ -0,0 +1,209 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Adaptive concurrency module for weko-group-cache-db.
+
+The number of institutions fetched concurrently follows AIMD
+(additive increase, multiplicative decrease) on responses of mAP API.
+It grows by one for each round of healthy responses, and is cut in half
+when mAP API asks clients to back off or its latency or error rate rises.
+"""
+
+import math
+import threading
+import time
+import typing as t
+
+from contextvars import ContextVar
+
+from werkzeug.local import LocalProxy
+
+from .config import config
+from .logger import logger
+
+MIN_ROUND_SAMPLES = 8
+"""Fewest responses observed before the concurrency is adjusted."""
+
+LATENCY_PERCENTILE = 0.95
+"""Percentile of response latency compared with the baseline."""
+
+LATENCY_TOLERANCE = 2.0
+"""Ratio of the latency percentile to the baseline that is still healthy."""
+
+BASELINE_DRIFT = 0.1
+"""Weight of each round in the moving baseline of latency."""
+
+ERROR_RATE_LIMIT = 0.1
+"""Highest rate of failed responses in a round that is still healthy."""
+
+DECREASE_FACTOR = 0.5
+"""Factor applied to the concurrency when it is cut."""
+
+
+class AdaptiveConcurrency:
+    """Thread-safe AIMD controller of institutions fetched concurrently.
+
+    Responses are observed in rounds of at least `limit` responses.
+    After a healthy round, `limit` grows by one up to `maximum`.
+    After a round with a high error rate, or with a latency percentile
+    well above the moving baseline, it is cut in half down to `minimum`.
+    Overload responses (429 and 503) cut it at once, at most once a round,
+    and pause new requests until their `Retry-After` has passed.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        *,
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            initial (int): Concurrency to start with.
+            minimum (int): Lowest concurrency, at least 1.
+            maximum (int): Highest concurrency, at least `minimum`.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self._clock = clock
+        self._latencies: list[float] = []
+        self._failures = 0
+        self._baseline: float | None = None
+        self._since_cut = math.inf
+        self._resume_at = -math.inf
+        self._lock = threading.Lock()
+
+    def pause(self) -> float:
+        """Return how long new requests must wait for `Retry-After`.
+
+        Returns:
+            float: Seconds until new requests may be sent, or 0.
+
+        """
+        return max(0.0, self._resume_at - self._clock())
+
+    def observe(self, latency: float, *, failed: bool = False) -> None:
+        """Record a response of mAP API or a request that failed to get one.
+
+        Arguments:
+            latency (float): Seconds taken by the request.
+            failed (bool): Whether the request failed with an endpoint error.
+
+        """
+        with self._lock:
+            self._since_cut += 1
+            if failed:
+                self._failures += 1
+            else:
+                self._latencies.append(latency)
+            if self._failures + len(self._latencies) >= max(
+                self.limit, MIN_ROUND_SAMPLES
+            ):
+                self._adjust()
+
+    def overloaded(self, retry_after: float | None = None) -> None:
+        """Record a response that asks clients to back off.
+
+        Arguments:
+            retry_after (float | None): Seconds from `Retry-After`, if any.
+
+        """
+        with self._lock:
+            self._since_cut += 1
+            if retry_after:
+                self._resume_at = max(self._resume_at, self._clock() + retry_after)
+            # responses to requests sent before the cut do not cut it again
+            if self._since_cut > self.limit:
+                self._decrease("mAP API is overloaded")
+
+    def _adjust(self) -> None:
+        samples = self._failures + len(self._latencies)
+        error_rate = self._failures / samples
+        latency = _percentile(self._latencies, LATENCY_PERCENTILE)
+        baseline = self._baseline
+        if latency is not None:
+            self._baseline = (
+                latency
+                if baseline is None
+                else min(latency, baseline + (latency - baseline) * BASELINE_DRIFT)
+            )
+
+        if error_rate > ERROR_RATE_LIMIT:
+            self._decrease(f"{error_rate:.0%} of requests failed")
+        elif (
+            latency is not None
+            and baseline is not None
+            and latency > baseline * LATENCY_TOLERANCE
+        ):
+            self._decrease(f"latency rose to {latency:.2f} seconds")
+        else:
+            self._latencies.clear()
+            self._failures = 0
+            if self.limit < self.maximum:
+                self.limit += 1
+                logger.debug("Raised fetch concurrency to %d.", self.limit)
+
+    def _decrease(self, reason: str) -> None:
+        self._latencies.clear()
+        self._failures = 0
+        self._since_cut = 0
+        limit = max(self.minimum, int(self.limit * DECREASE_FACTOR))
+        if limit < self.limit:
+            logger.info(
+                "Reduced fetch concurrency to %(limit)d, since %(reason)s.",
+                {"limit": limit, "reason": reason},
+            )
+            self.limit = limit
+
+
+def _percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def concurrency_bounds() -> tuple[int, int, int]:
+    """Return the initial, minimum and maximum concurrency from the config.
+
+    Returns:
+        tuple[int, int, int]:
+            `FETCH_CONCURRENCY` within the bounds, `FETCH_CONCURRENCY_MIN`
+            and `FETCH_CONCURRENCY_MAX`, which defaults to `FETCH_CONCURRENCY`.
+
+    """
+    minimum = max(1, config.FETCH_CONCURRENCY_MIN)
+    maximum = max(minimum, config.FETCH_CONCURRENCY_MAX or config.FETCH_CONCURRENCY)
+    return min(max(config.FETCH_CONCURRENCY, minimum), maximum), minimum, maximum
+
+
+_current_fetch_concurrency: ContextVar[AdaptiveConcurrency] = ContextVar(
+    "current_fetch_concurrency"
+)
+
+
+def setup_fetch_concurrency() -> AdaptiveConcurrency:
+    """Initialize the adaptive concurrency of fetching groups from the config.
+
+    Returns:
+        AdaptiveConcurrency: The controller shared by every request in this context.
+
+    """
+    controller = AdaptiveConcurrency(*concurrency_bounds())
+    _current_fetch_concurrency.set(controller)
+    return controller
+
+
+fetch_concurrency = t.cast(
+    AdaptiveConcurrency,
+    LocalProxy(
+        lambda: _current_fetch_concurrency.get(None) or setup_fetch_concurrency()
+    ),
+)
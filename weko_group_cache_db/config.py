@@ -12,7 +12,7 @@ from pathlib import Path
 
 import rich_click as click
 
-from pydantic import BaseModel, computed_field
+from pydantic import BaseModel, computed_field, model_validator
 from pydantic_settings import (
     BaseSettings,
     PydanticBaseSettingsSource,
@@ -48,14 +48,115 @@ class Settings(BaseSettings):
     If it specified less than 0, it will be considered as no expiration.
     """
 
+    CACHE_TTL_SPREAD: t.Annotated[int, "seconds"] = 0
+    """Maximum offset added to `CACHE_TTL` of each institution.
+
+    The offset is derived from the FQDN, so that caches written together
+    expire at different times. If it specified 0 or less, no offset is added.
+    """
+
+    STALE_WHILE_REVALIDATE: bool = False
+    """Whether to keep group information of institutions that failed to update.
+
+    If enabled, the TTL of their existing caches is extended
+    and `stale_since` is set, so that the last known groups are kept
+    until a later update succeeds.
+    """
+
+    STALE_AFTER: t.Annotated[int, "seconds"] = 43200
+    """Age of group information after which it is refreshed in stale-only runs."""
+
+    STALE_TTL_MARGIN: t.Annotated[int, "seconds"] = 3600
+    """Remaining time-to-live under which group information is refreshed
+    in stale-only runs, regardless of its age.
+    """
+
+    TOUCH_STALE_AFTER: t.Annotated[int, "seconds"] = 43200
+    """Age of group information after which `wgcd touch` marks it stale."""
+
+    REFRESH_INTERVAL: t.Annotated[int | float, "seconds"] = 43200
+    """Interval between refreshes of each institution in the daemon."""
+
+    REFRESH_JITTER: t.Annotated[float, "ratio"] = 0.1
+    """Ratio by which each refresh interval in the daemon is randomly scaled.
+
+    For example, 0.1 makes each interval between 90% and 110% of
+    `REFRESH_INTERVAL`, so that institutions do not become due at the same time.
+    """
+
+    MANIFEST_CACHE_PATH: str | None = None
+    """Path to the compiled manifest of loaded institutions.
+
+    While the source files of institutions have not changed,
+    institutions are loaded from the manifest without validation.
+    If it is not specified, institutions are validated on every load.
+    """
+
+    DIRECTORY_SCAN_WORKERS: t.Annotated[int, "workers"] = 1
+    """Number of threads to list subdirectories of the cert directory.
+
+    Listing in parallel hides the latency of network file systems.
+    If it specified 1 or less, subdirectories are listed sequentially.
+    """
+
+    CERT_CHECK_WORKERS: t.Annotated[int, "workers"] = 4
+    """Number of threads to check TLS client certificates of all institutions.
+
+    If it specified 1 or less, certificates are checked sequentially.
+    """
+
+    CERT_EXPIRY_WARNING: t.Annotated[int, "seconds"] = 2592000
+    """Time before expiry from which TLS client certificates are reported."""
+
     MAP_GROUPS_API_ENDPOINT: str
     """Map groups API endpoint."""
 
+    JSON_DECODER: t.Literal["auto", "msgspec", "orjson", "json"] = "auto"
+    """Decoder of response bodies of mAP groups API.
+
+    `msgspec` decodes only the group IDs and skips the other fields,
+    and `orjson` and `json` decode the whole body.
+    `auto` uses the first of them that is installed.
+    """
+
+    STREAM_RESPONSES: bool = False
+    """Whether to parse response bodies of mAP groups API while they are received.
+
+    Memory used for each response is then bounded by its largest group
+    instead of the whole body. `JSON_DECODER` is not used while enabled.
+    """
+
+    PAGE_SIZE: t.Annotated[int, "groups"] = 0
+    """Number of groups requested in each page of mAP groups API.
+
+    If it specified 0 or less, all groups are requested at once.
+    """
+
+    PAGE_CONCURRENCY: t.Annotated[int, "requests"] = 4
+    """Maximum number of pages of an institution fetched at the same time.
+
+    The pages following the first one are fetched concurrently,
+    each taking a token from the rate limiter.
+    """
+
     REQUEST_TIMEOUT: t.Annotated[int, "seconds"] = 20
     """Request timeout when connecting to mAP API."""
 
     REQUEST_INTERVAL: t.Annotated[int, "seconds"] = 3
-    """Request interval when fetching groups from mAP API."""
+    """Request interval when fetching groups from mAP API.
+
+    It is used to derive `REQUEST_RATE` when that is not specified.
+    """
+
+    REQUEST_RATE: t.Annotated[float | None, "requests/second"] = None
+    """Maximum sustained rate of requests to mAP API, including retries.
+
+    If it is not specified, `1 / REQUEST_INTERVAL` will be used.
+    If it specified 0 or less, requests will not be rate limited.
+    """
+
+    REQUEST_BURST: t.Annotated[int, "requests"] = 1
+    """Maximum number of requests to mAP API that can be sent in a burst."""
 
     REQUEST_RETRIES: t.Annotated[int, "times"] = 3
     """Request retries when failed to fetch groups from mAP API."""
@@ -69,6 +170,74 @@ class Settings(BaseSettings):
     REQUEST_RETRY_MAX: t.Annotated[int | float, "seconds"] = 90
     """Maximum time for exponential backoff during request retries."""
 
+    CIRCUIT_BREAKER_THRESHOLD: t.Annotated[int, "failures"] = 10
+    """Consecutive failures of mAP API that open the circuit breaker.
+
+    Connection errors, timeouts and 5xx responses are counted.
+    While the circuit is open, institutions fail without requests or retries.
+    If it specified 0 or less, the circuit breaker never opens.
+    """
+
+    CIRCUIT_BREAKER_RESET_TIMEOUT: t.Annotated[int | float, "seconds"] = 60
+    """Time the circuit breaker stays open before a request probes mAP API."""
+
+    SESSION_POOL_SIZE: t.Annotated[int, "sessions"] = 8
+    """Maximum number of HTTP sessions kept open for reuse.
+
+    A session is kept for each pair of client certificate and key,
+    and the least recently used one is closed when the pool is full.
+    It should not be less than `FETCH_CONCURRENCY_MAX`,
+    so that sessions are not closed while requests are in flight.
+    """
+
+    SESSION_IDLE_TIMEOUT: t.Annotated[int | float, "seconds"] = 60
+    """Time after which an unused HTTP session is closed.
+
+    It is measured from the end of the last request on the session,
+    and a session with requests in flight is never closed.
+    """
+
+    FETCH_CONCURRENCY: t.Annotated[int, "workers"] = 1
+    """Number of institutions to fetch and cache concurrently.
+
+    If it specified 1 or less, institutions will be processed sequentially.
+    When fetching all institutions, it is the initial number, which is adjusted
+    within `FETCH_CONCURRENCY_MIN` and `FETCH_CONCURRENCY_MAX`
+    by the latency and errors of mAP API.
+    """
+
+    FETCH_CONCURRENCY_MIN: t.Annotated[int, "workers"] = 1
+    """Lowest number of institutions fetched concurrently when mAP API is loaded."""
+
+    FETCH_CONCURRENCY_MAX: t.Annotated[int | None, "workers"] = None
+    """Highest number of institutions fetched concurrently when mAP API is healthy.
+
+    If it is not specified, `FETCH_CONCURRENCY` will be used,
+    so the number is only reduced while mAP API is loaded.
+    """
+
+    SHARD_COUNT: t.Annotated[int, "workers"] = 1
+    """Number of workers that share the institutions to fetch and cache.
+
+    Each worker processes the institutions whose FQDN hashes to its
+    `SHARD_INDEX`, regardless of their order in the source.
+    If it specified 1 or less, all institutions are processed.
+    """
+
+    SHARD_INDEX: int = 0
+    """Index of the shard processed by this worker, from 0 to `SHARD_COUNT - 1`."""
+
+    REDIS_FLUSH_SIZE: t.Annotated[int, "institutions"] = 1
+    """Number of institutions whose groups are written to Redis in one pipeline.
+
+    Validators of the last responses are also read for this many institutions
+    in one pipeline.
+    If it specified 1 or less, groups will be written for each institution.
+    """
+
+    REDIS_FLUSH_INTERVAL: t.Annotated[int | float, "seconds"] = 1
+    """Maximum time to keep fetched groups buffered before writing them to Redis."""
+
     REDIS_TYPE: t.Literal["redis", "sentinel"] = "redis"
     """Redis type to use. `redis` or `sentinel` is allowed."""
 
@@ -109,6 +278,25 @@ class Settings(BaseSettings):
         validate_default=True,
     )
 
+    @model_validator(mode="after")
+    def validate_shard(self) -> t.Self:
+        """Validate that `SHARD_INDEX` is one of the `SHARD_COUNT` shards.
+
+        Returns:
+            Settings: The validated settings.
+
+        Raises:
+            ValueError: If the shard settings are negative or out of range.
+
+        """
+        if self.SHARD_COUNT < 0 or self.SHARD_INDEX < 0:
+            error_message = "SHARD_COUNT and SHARD_INDEX must not be negative."
+            raise ValueError(error_message)
+        if max(1, self.SHARD_COUNT) <= self.SHARD_INDEX:
+            error_message = "SHARD_INDEX must be less than SHARD_COUNT."
+            raise ValueError(error_message)
+        return self
+
     @classmethod
     def settings_customise_sources(
         cls,
@@ -193,9 +381,15 @@ _no_config_msg = "Config has not been initialized."
 _current_config: ContextVar[Settings] = ContextVar("current_config")
 
 
-def setup_config(toml_path: str) -> None:
-    """Initialize the global config instance."""
-    _current_config.set(Settings(toml_path=toml_path))  # pyright: ignore[reportCallIssue]
+def setup_config(toml_path: str, **overrides: object) -> None:
+    """Initialize the global config instance.
+
+    Arguments:
+        toml_path (str): Path to the configuration TOML file.
+        overrides (object): Settings that take precedence over every other source.
+
+    """
+    _current_config.set(Settings(toml_path=toml_path, **overrides))  # pyright: ignore[reportCallIssue]
 
 
 config = t.cast(Settings, LocalProxy(_current_config, unbound_message=_no_config_msg))
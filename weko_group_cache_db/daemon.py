@@ -0,0 +1,202 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Daemon module for weko-group-cache-db.
+
+The daemon loads config and institutions once, and keeps HTTP sessions
+and the Redis connection pool for its whole lifetime.
+Each institution is refreshed on its own jittered interval,
+so requests to mAP API are spread over time instead of sent in one burst.
+"""
+
+import random
+import signal
+import threading
+import typing as t
+
+from datetime import UTC, datetime
+
+from .breaker import setup_circuit_breaker
+from .cache import CacheResult, Freshness, get_freshness, keep_stale
+from .concurrency import fetch_concurrency, setup_fetch_concurrency
+from .config import config
+from .exc import CircuitOpenError
+from .groups import (
+    Attempt,
+    AttemptPool,
+    fetch_and_cache,
+    select_shard,
+)
+from .loader import InstitutionSource, load_institutions
+from .logger import logger
+from .ratelimit import setup_rate_limiter
+from .redis import connection
+from .retry import RetryQueue
+from .session import setup_session_pool
+
+if t.TYPE_CHECKING:
+    from redis import Redis  # pragma: no cover
+
+
+def serve(
+    *, stop: threading.Event | None = None, **kwargs: t.Unpack[InstitutionSource]
+) -> None:
+    """Keep group caches of all institutions fresh until stopped.
+
+    The first refresh of each institution is scheduled within its remaining
+    refresh interval, based on `updated_at` and TTL of its cache.
+    Institutions without caches are refreshed immediately.
+    SIGTERM and SIGINT stop the daemon after in-flight refreshes are finished.
+    Only institutions in the shard of this worker are kept fresh,
+    see `select_shard`.
+
+    Arguments:
+        stop (threading.Event | None):
+            Event that stops the daemon when set.
+            If not specified, it is set by SIGTERM and SIGINT.
+        kwargs (InstitutionSource):
+            - toml_path (str | Path): Path to the TOML file.
+            - directory_path (str | Path): Path to the directory containing TOML files.
+            - fqdn_list_file (str | Path): Path to the file containing FQDN list.
+
+    """
+    store = connection()
+    setup_rate_limiter()
+    setup_circuit_breaker()
+    setup_fetch_concurrency()
+    institutions = list(select_shard(load_institutions(**kwargs)))
+
+    if not institutions:
+        logger.warning("No institutions found to fetch and cache groups for.")
+        return
+
+    if stop is None:
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+    schedule: RetryQueue[Attempt] = RetryQueue()
+    now = datetime.now(UTC)
+    freshness = get_freshness(store, [institution.fqdn for institution in institutions])
+    for institution, fresh in zip(institutions, freshness, strict=True):
+        schedule.push((institution, 0), initial_delay(fresh, now))
+
+    logger.info(
+        "Serving %(count)d institution(s), refreshing each every %(interval)d seconds.",
+        {"count": len(institutions), "interval": config.REFRESH_INTERVAL},
+    )
+    with setup_session_pool():
+        _refresh_until_stopped(schedule, store, stop)
+    logger.info("Stopped serving.")
+
+
+def refresh_interval() -> float:
+    """Return a jittered interval until the next refresh of an institution.
+
+    Returns:
+        float:
+            `REFRESH_INTERVAL` seconds scaled by a random factor
+            within `1 ± REFRESH_JITTER`.
+
+    """
+    jitter = min(max(config.REFRESH_JITTER, 0), 1)
+    return config.REFRESH_INTERVAL * random.uniform(1 - jitter, 1 + jitter)  # noqa: S311
+
+
+def initial_delay(freshness: Freshness, now: datetime) -> float:
+    """Return a delay until the first refresh of an institution in the daemon.
+
+    The delay is spread at random up to the time the cache becomes due,
+    which is `REFRESH_INTERVAL` after `updated_at`, or `STALE_TTL_MARGIN`
+    before it expires, whichever comes first.
+
+    Arguments:
+        freshness (Freshness): Freshness of the institution's cache.
+        now (datetime): Current time.
+
+    Returns:
+        float: Seconds to wait before the first refresh.
+
+    """
+    if freshness.updated_at is None or freshness.ttl == -2:  # noqa: PLR2004
+        return 0.0
+
+    due = config.REFRESH_INTERVAL - (now - freshness.updated_at).total_seconds()
+    if freshness.ttl >= 0:
+        due = min(due, freshness.ttl - config.STALE_TTL_MARGIN)
+    return random.uniform(0, max(0.0, due))  # noqa: S311
+
+
+def _refresh_until_stopped(
+    schedule: RetryQueue[Attempt],
+    store: Redis,
+    stop: threading.Event,
+) -> None:
+    """Refresh institutions as they become due on a bounded thread pool.
+
+    A refreshed institution is scheduled again after `refresh_interval`.
+    A failed one is retried with backoff up to `REQUEST_RETRIES` times,
+    and then waits for its next regular refresh, keeping its stale cache
+    if `STALE_WHILE_REVALIDATE` is enabled, see `AttemptPool`.
+    One refused by the open circuit breaker is not retried, but refreshed
+    again once the circuit lets a request probe mAP API,
+    so that a short outage does not put it off for a whole interval.
+    The number of refreshes in flight is adapted to the responses of mAP API
+    in the same way as `fetch_all`, see `AdaptiveConcurrency`.
+
+    Arguments:
+        schedule (RetryQueue[Attempt]):
+            Institutions and their attempts, ordered by their due time.
+        store (Redis): Redis store object shared by the workers.
+        stop (threading.Event): Event that stops the refresh loop when set.
+
+    """
+    with AttemptPool(
+        fetch_and_cache(retry=False),
+        store,
+        schedule,
+        max_workers=fetch_concurrency.maximum,
+        thread_name_prefix="wgcd-serve",
+    ) as attempts:
+        while not stop.is_set() or attempts:
+            pause = fetch_concurrency.pause()
+            while (
+                not stop.is_set()
+                and not pause
+                and len(attempts) < fetch_concurrency.limit
+                and (entry := schedule.pop_due())
+            ):
+                attempts.submit(entry)
+
+            if not attempts:
+                stop.wait(pause or schedule.delay())
+                continue
+
+            # a due institution can only start when a worker is free,
+            # so a full pool waits for an attempt to finish
+            free = not stop.is_set() and len(attempts) < fetch_concurrency.limit
+            timeout = pause or schedule.delay() if free else None
+            for institution, outcome in attempts.wait(timeout):
+                if isinstance(outcome, Exception):
+                    keep_stale(store, [institution.fqdn])
+                schedule.push((institution, 0), next_refresh_delay(outcome))
+
+
+def next_refresh_delay(outcome: CacheResult | Exception | None) -> float:
+    """Return a delay until the next refresh of an institution that is done.
+
+    Arguments:
+        outcome (CacheResult | Exception | None):
+            Result of the last refresh, or its error if it failed for good.
+
+    Returns:
+        float:
+            Seconds until the circuit breaker lets a request probe mAP API
+            if the refresh was refused by it, or `refresh_interval` otherwise.
+
+    """
+    if isinstance(outcome, CircuitOpenError):
+        # a circuit with a probe in flight gives no time, so wait a full timeout
+        return outcome.retry_after or config.CIRCUIT_BREAKER_RESET_TIMEOUT
+    return refresh_interval()
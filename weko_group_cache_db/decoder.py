@@ -0,0 +1,546 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Decoder module for response bodies of mAP groups API.
+
+Only `id` of each entry in the SCIM list response is cached,
+together with the pagination of the response.
+The `msgspec` decoder reads the body into a schema of just those fields
+and skips the others, such as members, without building Python objects
+for them. `orjson` and `json` decode the whole body.
+`GroupPageParser` instead parses the body while it is received.
+"""
+
+import codecs
+import functools
+import json
+import re
+import typing as t
+
+from .config import config
+from .exc import ConfigurationError
+
+type GroupPageDecoder = t.Callable[[bytes], GroupPage]
+"""Function that decodes a page of groups from a response body."""
+
+AUTO_DECODERS = ("msgspec", "orjson", "json")
+"""Decoders tried by `auto`, in order of preference."""
+
+STREAM_CHUNK_SIZE = 65536
+"""Size in bytes of chunks read from a streamed response body."""
+
+JSON_WHITESPACE = " \t\n\r"
+"""Characters allowed between JSON tokens."""
+
+JSON_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+"""Pattern of the characters of a JSON string up to its closing quote."""
+
+JSON_SKIP_RUN = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+"""Pattern of the characters of a JSON value up to its next bracket."""
+
+JSON_SCALAR_RUN = re.compile(r'[^\s,:\[\]{}"]*')
+"""Pattern of the characters of a JSON number or literal."""
+
+JSON_SCALAR = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+"""Pattern of a valid JSON number or literal."""
+
+JSON_OPENING = {"]": "[", "}": "{"}
+"""Opening bracket of each closing bracket."""
+
+PAGINATION_FIELDS = ("totalResults", "startIndex", "itemsPerPage")
+"""Members of a SCIM list response that describe its pagination."""
+
+
+class GroupPage(t.NamedTuple):
+    """Group IDs in a SCIM list response of mAP groups API and its pagination."""
+
+    group_ids: list[str]
+    """IDs of the groups in the response."""
+
+    total_results: int | None = None
+    """Number of groups in all pages, if returned."""
+
+    start_index: int | None = None
+    """1-based index of the first group in the response, if returned."""
+
+    items_per_page: int | None = None
+    """Number of groups returned in the response, if returned."""
+
+
+def decode_group_page(content: bytes) -> GroupPage:
+    """Decode a page of groups from a response body with the configured decoder.
+
+    Arguments:
+        content (bytes): Response body of mAP groups API.
+
+    Returns:
+        GroupPage: Group IDs and pagination of the response.
+
+    Raises:
+        ValueError: If the body is not a valid response.
+
+    """  # noqa: DOC502
+    return get_decoder(config.JSON_DECODER)(content)
+
+
+@functools.cache
+def get_decoder(name: str) -> GroupPageDecoder:
+    """Return the decoder of the given name.
+
+    Arguments:
+        name (str):
+            `msgspec`, `orjson` or `json`.
+            `auto` selects the first of them that is installed.
+
+    Returns:
+        GroupPageDecoder: The decoder.
+
+    Raises:
+        ConfigurationError: If the decoder is unknown or not installed.
+
+    """
+    if name == "auto":
+        for candidate in AUTO_DECODERS:
+            try:
+                return get_decoder(candidate)
+            except ConfigurationError:
+                continue
+
+    factory = DECODERS.get(name)
+    if factory is None:
+        error_message = f"Unknown JSON decoder: {name}"
+        raise ConfigurationError(error_message)
+
+    try:
+        return factory()
+    except ImportError as ex:
+        error_message = f"JSON decoder '{name}' is not installed."
+        raise ConfigurationError(error_message) from ex
+
+
+def parse_group_page(chunks: t.Iterable[bytes]) -> GroupPage:
+    """Parse a page of groups from a response body while it is received.
+
+    Arguments:
+        chunks (Iterable[bytes]): Chunks of the response body.
+
+    Returns:
+        GroupPage: Group IDs and pagination of the response.
+
+    Raises:
+        ValueError: If the body is not a valid response.
+
+    """  # noqa: DOC502
+    parser = GroupPageParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+class GroupPageParser:
+    """Incremental parser of response bodies of mAP groups API.
+
+    The body is scanned as it is received, and only the keys of the response
+    and of each element of `entry`, `id` of each element and the pagination
+    are decoded. Other values, such as members, are skipped by scanning
+    for their closing brackets without decoding them, so the time is linear
+    in the size of the body and the parser holds the IDs and the unfinished
+    token besides the unparsed chunk, however large a single value is.
+    Skipped values are only checked for balanced brackets and closed strings.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self.group_ids: list[str] = []
+        self.pagination: dict[str, int] = {}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._closed = False
+        self._name = ""
+        self._field = ""
+        self._group_id: str | None = None
+        self._parts: list[str] = []
+        self._brackets: list[str] = []
+        self._on_string: t.Callable[[str], None] = self._set_name
+        self._then: t.Callable[[int], int | None] = self._after_member
+        self._state: t.Callable[[int], int | None] = self._object_start
+
+    def feed(self, chunk: bytes) -> None:
+        """Parse the next chunk of the response body.
+
+        Arguments:
+            chunk (bytes): The chunk.
+
+        Raises:
+            ValueError: If the body received so far is not a valid response.
+
+        """  # noqa: DOC502
+        self._buffer += self._text.decode(chunk)
+        self._parse()
+
+    def close(self) -> GroupPage:
+        """Finish parsing at the end of the response body.
+
+        Returns:
+            GroupPage: Group IDs and pagination of the response.
+
+        Raises:
+            ValueError: If the body is not a valid response.
+
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        self._closed = True
+        self._parse()
+        if self._state != self._done:
+            error_message = "Response body ended unexpectedly."
+            raise ValueError(error_message)
+        if self._buffer.strip(JSON_WHITESPACE):
+            error_message = "Extra data after response body."
+            raise ValueError(error_message)
+        return GroupPage(
+            self.group_ids, *(self.pagination.get(key) for key in PAGINATION_FIELDS)
+        )
+
+    def _parse(self) -> None:
+        pos = 0
+        try:
+            while (end := self._state(pos)) is not None:
+                pos = end
+        finally:
+            # drop the parsed part so that the buffer does not grow with the body
+            self._buffer = self._buffer[pos:]
+
+    def _skip(self, pos: int) -> int | None:
+        size = len(self._buffer)
+        while pos < size and self._buffer[pos] in JSON_WHITESPACE:
+            pos += 1
+        return pos if pos < size else None
+
+    def _expect(self, pos: int, expected: str) -> str:
+        char = self._buffer[pos]
+        if char not in expected:
+            error_message = f"Expecting one of {expected!r} but got {char!r}."
+            raise ValueError(error_message)
+        return char
+
+    def _scalar(self, pos: int) -> tuple[t.Any, int] | None:
+        end = match_end(JSON_SCALAR_RUN, self._buffer, pos)
+        # a number or literal is complete only when followed by a delimiter
+        if end == len(self._buffer) and not self._closed:
+            return None
+        token = self._buffer[pos:end]
+        if not JSON_SCALAR.fullmatch(token):
+            error_message = f"Expecting value but got {token or self._buffer[pos]!r}."
+            raise ValueError(error_message)
+        return json.loads(token), end
+
+    def _string(self, pos: int) -> int | None:
+        # the string is decoded from its raw parts once its closing quote arrives
+        end = match_end(JSON_STRING_BODY, self._buffer, pos)
+        self._parts.append(self._buffer[pos:end])
+        if end == len(self._buffer) or self._buffer[end] != '"':
+            return end if end > pos else None
+        raw = "".join(self._parts)
+        self._parts.clear()
+        self._on_string(json.loads(f'"{raw}"'))
+        return end + 1
+
+    def _read_string(self, pos: int, on_string: t.Callable[[str], None]) -> int:
+        self._expect(pos, '"')
+        self._on_string = on_string
+        self._state = self._string
+        return pos + 1
+
+    def _skip_value(self, pos: int, then: t.Callable[[int], int | None]) -> int | None:
+        self._then = then
+        char = self._buffer[pos]
+        if char == '"':
+            self._state = self._skipped_string
+            return pos + 1
+        if char in "[{":
+            self._brackets.append(char)
+            self._state = self._skipped_nested
+            return pos + 1
+        if (decoded := self._scalar(pos)) is None:
+            return None
+        self._state = then
+        return decoded[1]
+
+    def _skipped_string(self, pos: int) -> int | None:
+        end = match_end(JSON_STRING_BODY, self._buffer, pos)
+        if end == len(self._buffer) or self._buffer[end] != '"':
+            return end if end > pos else None
+        self._state = self._skipped_nested if self._brackets else self._then
+        return end + 1
+
+    def _skipped_nested(self, pos: int) -> int | None:
+        buffer, brackets = self._buffer, self._brackets
+        start, size = pos, len(buffer)
+        skip_run = JSON_SKIP_RUN.match
+        while True:
+            # jump over everything but brackets and unterminated strings at once
+            pos = skip_run(buffer, pos).end()  # pyright: ignore[reportOptionalMemberAccess]
+            if pos == size:
+                return pos if pos > start else None
+            char = buffer[pos]
+            if char == '"':
+                self._state = self._skipped_string
+                return pos + 1
+            if char in "[{":
+                brackets.append(char)
+            elif brackets.pop() != JSON_OPENING[char]:
+                error_message = f"Unbalanced {char!r} in response body."
+                raise ValueError(error_message)
+            elif not brackets:
+                self._state = self._then
+                return pos + 1
+            pos += 1
+
+    def _object_start(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        self._expect(pos, "{")
+        self._state = self._first_key
+        return pos + 1
+
+    def _first_key(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._expect(pos, '"}') == "}":
+            self._state = self._done
+            return pos + 1
+        self._state = self._key
+        return pos
+
+    def _key(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        return self._read_string(pos, self._set_name)
+
+    def _set_name(self, name: str) -> None:
+        self._name = name
+        self._state = self._colon
+
+    def _colon(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        self._expect(pos, ":")
+        self._state = self._entry_start if self._name == "entry" else self._member
+        return pos + 1
+
+    def _member(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._name not in PAGINATION_FIELDS or self._buffer[pos] in '"[{':
+            return self._skip_value(pos, self._after_member)
+        if (decoded := self._scalar(pos)) is None:
+            return None
+        value, end = decoded
+        if type(value) is int:
+            self.pagination[self._name] = value
+        self._state = self._after_member
+        return end
+
+    def _after_member(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        self._state = self._key if self._expect(pos, ",}") == "," else self._done
+        return pos + 1
+
+    def _entry_start(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        self._expect(pos, "[")
+        self._state = self._first_entry
+        return pos + 1
+
+    def _first_entry(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._buffer[pos] == "]":
+            self._state = self._after_member
+            return pos + 1
+        self._state = self._entry
+        return pos
+
+    def _entry(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._buffer[pos] != "{":
+            return self._skip_value(pos, self._after_entry)
+        self._group_id = None
+        self._state = self._group_first_key
+        return pos + 1
+
+    def _after_entry(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        self._state = (
+            self._entry if self._expect(pos, ",]") == "," else self._after_member
+        )
+        return pos + 1
+
+    def _group_first_key(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._buffer[pos] == "}":
+            self._state = self._after_entry
+            return pos + 1
+        self._state = self._group_key
+        return pos
+
+    def _group_key(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        return self._read_string(pos, self._set_field)
+
+    def _set_field(self, field: str) -> None:
+        self._field = field
+        self._state = self._group_colon
+
+    def _group_colon(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        self._expect(pos, ":")
+        self._state = self._group_member
+        return pos + 1
+
+    def _group_member(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._field != "id":
+            return self._skip_value(pos, self._after_group_member)
+        if self._buffer[pos] != '"':
+            # only a string is an ID, as with the other decoders
+            self._group_id = None
+            return self._skip_value(pos, self._after_group_member)
+        return self._read_string(pos, self._set_group_id)
+
+    def _set_group_id(self, group_id: str) -> None:
+        self._group_id = group_id
+        self._state = self._after_group_member
+
+    def _after_group_member(self, start: int) -> int | None:
+        if (pos := self._skip(start)) is None:
+            return None
+        if self._expect(pos, ",}") == ",":
+            self._state = self._group_key
+        else:
+            if self._group_id is not None:
+                self.group_ids.append(self._group_id.split("/")[-1])
+            self._state = self._after_entry
+        return pos + 1
+
+    @staticmethod
+    def _done(_pos: int) -> None:
+        return None
+
+
+def match_end(pattern: re.Pattern[str], text: str, pos: int) -> int:
+    """Return the end of the match of a pattern at a position of a text.
+
+    Arguments:
+        pattern (re.Pattern[str]): Pattern that may match the empty string.
+        text (str): Text to match.
+        pos (int): Position to match at.
+
+    Returns:
+        int: End of the match, or `pos` if the pattern does not match.
+
+    """
+    match = pattern.match(text, pos)
+    return match.end() if match else pos
+
+
+def extract_group_ids(body: dict[str, t.Any]) -> list[str]:
+    """Extract group IDs from a response body of mAP groups API.
+
+    Arguments:
+        body (dict[str, Any]): Decoded response body.
+
+    Returns:
+        list[str]: List of group IDs.
+
+    """
+    return [
+        group["id"].split("/")[-1] for group in body.get("entry", []) if "id" in group
+    ]
+
+
+def extract_group_page(body: dict[str, t.Any]) -> GroupPage:
+    """Extract group IDs and pagination from a response body of mAP groups API.
+
+    Arguments:
+        body (dict[str, Any]): Decoded response body.
+
+    Returns:
+        GroupPage: Group IDs and pagination of the response.
+
+    """
+    return GroupPage(
+        extract_group_ids(body),
+        *(
+            value if type(value := body.get(key)) is int else None
+            for key in PAGINATION_FIELDS
+        ),
+    )
+
+
+def json_decoder() -> GroupPageDecoder:
+    """Create a decoder with the standard `json` module.
+
+    Returns:
+        GroupPageDecoder: Decoder that extracts a page from the decoded body.
+
+    """
+    return lambda content: extract_group_page(json.loads(content))
+
+
+def orjson_decoder() -> GroupPageDecoder:
+    """Create a decoder with `orjson`.
+
+    Returns:
+        GroupPageDecoder: Decoder that extracts a page from the decoded body.
+
+    """
+    import orjson  # noqa: PLC0415
+
+    return lambda content: extract_group_page(orjson.loads(content))
+
+
+def msgspec_decoder() -> GroupPageDecoder:
+    """Create a decoder with `msgspec` that decodes only the IDs and pagination.
+
+    Returns:
+        GroupPageDecoder: Decoder that raises `ValueError` for an invalid body.
+
+    """
+    import msgspec  # noqa: PLC0415
+
+    from .schema import GroupListResponse  # noqa: PLC0415
+
+    decoder = msgspec.json.Decoder(GroupListResponse)
+
+    def _decode(content: bytes) -> GroupPage:
+        try:
+            body = decoder.decode(content)
+        except msgspec.DecodeError as ex:
+            raise ValueError(str(ex)) from ex
+        return GroupPage(
+            [entry.id.split("/")[-1] for entry in body.entry if entry.id is not None],
+            *(
+                value if type(value) is int else None
+                for value in (body.total_results, body.start_index, body.items_per_page)
+            ),
+        )
+
+    return _decode
+
+
+DECODERS: dict[str, t.Callable[[], GroupPageDecoder]] = {
+    "msgspec": msgspec_decoder,
+    "orjson": orjson_decoder,
+    "json": json_decoder,
+}
+"""Factories of decoders keyed by their names."""
@@ -28,5 +28,67 @@ class UpdateError(WekoGroupCacheDbError):
         return f"FQDN: {self.fqdn}, {self.origin}"
 
 
+class CacheExpiredError(WekoGroupCacheDbError):
+    """Exception class for group caches that expired before they were refreshed."""
+
+    def __init__(self, fqdn: str) -> None:
+        """Initialize the exception with the FQDN of the expired cache.
+
+        Args:
+            fqdn (str): The FQDN whose cache has expired.
+
+        """
+        super().__init__(fqdn)
+        self.fqdn = fqdn
+
+    def __str__(self) -> str:  # noqa: D105
+        return f"Group cache of {self.fqdn} expired before it was refreshed."
+
+
+class CertificateError(WekoGroupCacheDbError):
+    """Exception class for TLS client certificates that cannot be used."""
+
+    def __init__(self, fqdn: str, reason: str) -> None:
+        """Initialize the exception with the reason the certificate is unusable.
+
+        Args:
+            fqdn (str): The FQDN of the institution owning the certificate.
+            reason (str): Why the certificate cannot be used.
+
+        """
+        super().__init__(fqdn, reason)
+        self.fqdn = fqdn
+        self.reason = reason
+
+    def __str__(self) -> str:  # noqa: D105
+        return f"TLS client certificate of {self.fqdn} cannot be used: {self.reason}"
+
+
 class ConfigurationError(WekoGroupCacheDbError):
     """Exception class for configuration errors in weko-group-cache-db."""
+
+
+class CircuitOpenError(WekoGroupCacheDbError):
+    """Exception class for requests refused while the circuit breaker is open."""
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        """Initialize the exception with the time until the next probe.
+
+        Args:
+            endpoint (str): The endpoint whose circuit breaker is open.
+            retry_after (float):
+                Seconds until a request may probe the endpoint,
+                or 0 if another request is already probing it.
+
+        """
+        super().__init__(endpoint, retry_after)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:  # noqa: D105
+        if self.retry_after > 0:
+            return (
+                f"Circuit breaker of {self.endpoint} is open "
+                f"for {self.retry_after:.1f} more seconds."
+            )
+        return f"Circuit breaker of {self.endpoint} is probing whether it recovered."
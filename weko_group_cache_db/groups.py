@@ -4,11 +4,17 @@
 
 """Utils module for weko-group-cache-db."""
 
+import contextlib
+import contextvars
+import hashlib
+import itertools
 import time
 import traceback
 import typing as t
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import UTC, datetime
+from http import HTTPStatus
 from urllib.parse import urljoin
 
 import backoff
@@ -17,20 +23,89 @@ import requests
 
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
 
+from .breaker import circuit_breaker, is_endpoint_failure, setup_circuit_breaker
+from .cache import (
+    CacheResult,
+    Freshness,
+    WriteBuffer,
+    extend_caches,
+    get_all_validators,
+    get_freshness,
+    get_validators,
+    keep_stale,
+    queue_groups,
+    queue_touch,
+)
+from .concurrency import fetch_concurrency, setup_fetch_concurrency
 from .config import config
-from .exc import UpdateError
-from .loader import Institution, InstitutionSource, load_institutions
+from .decoder import (
+    STREAM_CHUNK_SIZE,
+    GroupPage,
+    decode_group_page,
+    parse_group_page,
+)
+from .exc import (
+    CacheExpiredError,
+    CertificateError,
+    CircuitOpenError,
+    UpdateError,
+)
+from .loader import (
+    Institution,
+    InstitutionSource,
+    check_certificate,
+    find_institution,
+    iter_institutions,
+    load_institutions,
+)
 from .logger import console, logger
+from .ratelimit import rate_limiter, setup_rate_limiter
 from .redis import connection
+from .retry import RetryQueue, parse_retry_after, retry_delay
+from .session import session_pool, setup_session_pool
 
 if t.TYPE_CHECKING:
+    from collections.abc import Mapping  # pragma: no cover
+
     from redis import Redis  # pragma: no cover
 
 
-def fetch_all(**kwargs: t.Unpack[InstitutionSource]):
+RETRYABLE_ERRORS = (requests.RequestException, redis.RedisError)
+"""Errors on which an institution is retried."""
+
+OVERLOAD_STATUSES = frozenset({
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+})
+"""Statuses of responses by which mAP API asks clients to back off."""
+
+VALIDATOR_HEADERS = {
+    "etag": ("ETag", "If-None-Match"),
+    "last_modified": ("Last-Modified", "If-Modified-Since"),
+}
+"""Response and conditional request headers of each cached validator."""
+
+
+class MapGroups(t.NamedTuple):
+    """Groups of an institution fetched from mAP API."""
+
+    group_ids: list[str] | None
+    """List of group IDs, or None if not modified since the given validators."""
+
+    validators: dict[str, str]
+    """Validators to send in the next conditional request."""
+
+
+def fetch_all(*, stale_only: bool = False, **kwargs: t.Unpack[InstitutionSource]):
     """Fetch and cache groups for all institutions.
 
+    Only institutions in the shard of this worker are processed,
+    see `select_shard`.
+
     Arguments:
+        stale_only (bool):
+            Whether to process only institutions whose caches are stale,
+            oldest first. See `select_stale`.
         kwargs (InstitutionSource):
             - toml_path (str | Path): Path to the TOML file.
             - directory_path (str | Path): Path to the directory containing TOML files.
@@ -42,44 +117,73 @@ def fetch_all(**kwargs: t.Unpack[InstitutionSource]):
 
     """
     store = connection()
-    institutions = load_institutions(**kwargs)
-    total = len(institutions)
-    exceptions: list[UpdateError] = []
+    setup_rate_limiter()
+    setup_circuit_breaker()
+    setup_fetch_concurrency()
+    institutions = select_shard(iter_institutions(**kwargs))
+    outcomes: dict[str, CacheResult | UpdateError] = {}
 
-    if total == 0:
+    # load the first institution before the progress bar is shown,
+    # so that an empty or unreadable source is reported on its own
+    first = next(institutions, None)
+    if first is None:
         logger.warning("No institutions found to fetch and cache groups for.")
         return
 
-    with Progress(
-        SpinnerColumn(),
-        *Progress.get_default_columns(),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
+    pending: t.Iterable[Institution] = itertools.chain([first], institutions)
+    total = None
+    if stale_only:
+        loaded = list(pending)
+        pending = select_stale(
+            loaded, get_freshness(store, [institution.fqdn for institution in loaded])
+        )
+        if not pending:
+            return
+        total = len(pending)
+
+    expired: list[str] = []
+    buffer = create_write_buffer(store, outcomes, expired)
+    processed: dict[str, Institution] = {}
+
+    with (
+        Progress(
+            SpinnerColumn(),
+            *Progress.get_default_columns(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress,
+        setup_session_pool(),
+        buffer or contextlib.nullcontext(),
+    ):
         task = progress.add_task(
             "Fetching and caching groups for all institutions", total=total
         )
 
-        for index, institution in enumerate(institutions):
-            try:
-                group_count = fetch_and_cache()(institution, store)
-                logger.info(
-                    "Successfully cached %(count)d groups for %(fqdn)s.",
-                    {"count": group_count, "fqdn": institution.fqdn},
-                )
-            except (requests.RequestException, redis.RedisError) as ex:
-                logger.error(
-                    "Despite retries %(count)d times, failed to cache groups to Redis "
-                    "for institution: %(fqdn)s.",
-                    {"count": config.REQUEST_RETRIES, "fqdn": institution.fqdn},
+        def _stream() -> t.Iterator[Institution]:
+            for institution in pending:
+                processed[institution.fqdn] = institution
+                yield institution
+            progress.update(task, total=len(processed))
+
+        fetch_outcomes = _fetch_with_retry_queue(
+            _stream(),
+            store,
+            buffer=buffer,
+            advance=lambda: progress.update(task, advance=1),
+        )
+        if buffer is not None:
+            buffer.flush()
+            # the caches expired after the validators were read,
+            # so they are fetched again without validators and written directly
+            fetch_outcomes.update(
+                _fetch_with_retry_queue(
+                    (processed[fqdn] for fqdn in expired), store, advance=lambda: None
                 )
-                traceback.print_exc()
-                exceptions.append(UpdateError(institution.fqdn, origin=ex))
-            finally:
-                progress.update(task, advance=1)
+            )
 
-            if index != total - 1:
-                time.sleep(config.REQUEST_INTERVAL)
+    outcomes.update(fetch_outcomes)
+    exceptions = summarize(processed, outcomes)
+    keep_stale(store, [error.fqdn for error in exceptions])
 
     if exceptions:
         error_message = "Failed to update information from %d institution(s)."
@@ -87,11 +191,483 @@ def fetch_all(**kwargs: t.Unpack[InstitutionSource]):
         raise ExceptionGroup(error_message % len(exceptions), exceptions)
 
 
-def fetch_one(fqdn: str, **kwargs: t.Unpack[InstitutionSource]) -> None:
+def create_write_buffer(
+    store: Redis, outcomes: dict[str, CacheResult | UpdateError], expired: list[str]
+) -> WriteBuffer | None:
+    """Create the write buffer for `fetch_all` from the config.
+
+    Arguments:
+        store (Redis): Redis store object.
+        outcomes (dict[str, CacheResult | UpdateError]):
+            Outcomes keyed by FQDN, to which flushed institutions are added.
+        expired (list[str]):
+            List to which FQDNs are added instead of outcomes
+            if their caches expired before their touches were flushed.
+
+    Returns:
+        WriteBuffer | None: The buffer, or None if `REDIS_FLUSH_SIZE` is 1 or less.
+
+    """
+    if config.REDIS_FLUSH_SIZE <= 1:
+        return None
+
+    def _on_flushed(fqdn: str, result: CacheResult, error: Exception | None) -> None:
+        if isinstance(error, CacheExpiredError):
+            expired.append(fqdn)
+        elif error is None:
+            logger.info(
+                "Successfully cached %(count)d groups for %(fqdn)s.",
+                {"count": result.group_count, "fqdn": fqdn},
+            )
+            outcomes[fqdn] = result
+        else:
+            logger.error("Failed to cache groups to Redis for institution: %s.", fqdn)
+            outcomes[fqdn] = UpdateError(fqdn, origin=error)
+
+    return WriteBuffer(
+        store,
+        size=config.REDIS_FLUSH_SIZE,
+        interval=config.REDIS_FLUSH_INTERVAL,
+        on_flushed=_on_flushed,
+    )
+
+
+def summarize(
+    fqdns: t.Iterable[str], outcomes: dict[str, CacheResult | UpdateError]
+) -> list[UpdateError]:
+    """Log the numbers of changed and unchanged institutions of a run.
+
+    Arguments:
+        fqdns (Iterable[str]): FQDNs of the institutions processed in the run.
+        outcomes (dict[str, CacheResult | UpdateError]): Outcomes keyed by FQDN.
+
+    Returns:
+        list[UpdateError]: Errors in the same order as the given FQDNs.
+
+    """
+    results = [
+        outcome for outcome in outcomes.values() if isinstance(outcome, CacheResult)
+    ]
+    changed = sum(result.changed for result in results)
+    logger.info(
+        "Cached groups for %(count)d institution(s): "
+        "%(changed)d changed, %(unchanged)d unchanged.",
+        {
+            "count": len(results),
+            "changed": changed,
+            "unchanged": len(results) - changed,
+        },
+    )
+
+    return [
+        outcome
+        for fqdn in fqdns
+        if isinstance(outcome := outcomes.get(fqdn), UpdateError)
+    ]
+
+
+def extend_all(**kwargs: t.Unpack[InstitutionSource]) -> None:
+    """Extend TTL of group caches for all institutions without fetching groups.
+
+    The extended caches are marked with `stale_since`
+    until they are updated from mAP API again.
+
+    Arguments:
+        kwargs (InstitutionSource):
+            - toml_path (str | Path): Path to the TOML file.
+            - directory_path (str | Path): Path to the directory containing TOML files.
+            - fqdn_list_file (str | Path): Path to the file containing FQDN list.
+
+    """
+    store = connection()
+    institutions = load_institutions(**kwargs)
+
+    if not institutions:
+        logger.warning("No institutions found to extend group caches for.")
+        return
+
+    extended = extend_caches(
+        store,
+        [institution.fqdn for institution in institutions],
+        stale_after=config.TOUCH_STALE_AFTER,
+    )
+    logger.info(
+        "Extended group caches of %(count)d of %(total)d institution(s).",
+        {"count": len(extended), "total": len(institutions)},
+    )
+
+
+def select_stale(
+    institutions: list[Institution], freshness: list[Freshness]
+) -> list[Institution]:
+    """Select institutions whose group caches should be refreshed, oldest first.
+
+    A cache is stale if it does not exist, is older than `STALE_AFTER`,
+    or expires within `STALE_TTL_MARGIN`.
+    Institutions without caches come first in their original order.
+
+    Arguments:
+        institutions (list[Institution]): Institutions to select from.
+        freshness (list[Freshness]): Freshness of each institution's cache.
+
+    Returns:
+        list[Institution]: Institutions with stale caches.
+
+    """
+    now = datetime.now(UTC)
+    stale = [
+        (fresh, institution)
+        for institution, fresh in zip(institutions, freshness, strict=True)
+        if fresh.is_stale(now)
+    ]
+    stale.sort(key=lambda item: item[0].updated_at or datetime.min.replace(tzinfo=UTC))
+
+    logger.info(
+        "Refreshing %(count)d of %(total)d institution(s) with stale caches.",
+        {"count": len(stale), "total": len(institutions)},
+    )
+    return [institution for _, institution in stale]
+
+
+def shard_of(fqdn: str, count: int) -> int:
+    """Return the shard of an institution among the given number of shards.
+
+    The shard is derived from a hash of the FQDN, so it does not depend on
+    the order of institutions and is the same in every run and on every worker.
+
+    Arguments:
+        fqdn (str): FQDN of the institution.
+        count (int): Number of shards.
+
+    Returns:
+        int: Index of the shard, from 0 to `count - 1`.
+
+    """
+    digest = hashlib.sha256(fqdn.encode()).digest()
+    return int.from_bytes(digest[:8]) % count
+
+
+def select_shard(institutions: t.Iterable[Institution]) -> t.Iterator[Institution]:
+    """Yield the institutions in the shard of this worker.
+
+    Institutions are split by `shard_of` into `SHARD_COUNT` shards,
+    and those in the `SHARD_INDEX` shard are yielded as they are taken.
+    If `SHARD_COUNT` is 1 or less, all institutions are yielded.
+
+    Arguments:
+        institutions (Iterable[Institution]): Institutions to select from.
+
+    Yields:
+        Institution: Institution in the shard.
+
+    """
+    if config.SHARD_COUNT <= 1:
+        yield from institutions
+        return
+
+    logger.info(
+        "Processing shard %(index)d of %(count)d shards.",
+        {"index": config.SHARD_INDEX, "count": config.SHARD_COUNT},
+    )
+    yield from (
+        institution
+        for institution in institutions
+        if shard_of(institution.fqdn, config.SHARD_COUNT) == config.SHARD_INDEX
+    )
+
+
+type Attempt = tuple[Institution, int]
+"""Institution and the number of retries already made for it."""
+
+
+class AttemptPool:
+    """Bounded thread pool of attempts to fetch and cache groups for institutions.
+
+    Each attempt runs in a copy of the current context, since config and
+    logger are context-local. A failed attempt is not retried inline.
+    If its error is transient, the institution is put on the retry queue
+    with a not-before time, up to `REQUEST_RETRIES` times.
+    Any other error fails only that institution.
+    """
+
+    def __init__(
+        self,
+        retrieve: t.Callable[[Institution, Redis], CacheResult | None],
+        store: Redis,
+        retries: RetryQueue[Attempt],
+        *,
+        max_workers: int,
+        thread_name_prefix: str,
+    ) -> None:
+        """Initialize the pool.
+
+        Args:
+            retrieve (Callable[[Institution, Redis], CacheResult | None]):
+                Function that fetches and caches groups for an institution.
+            store (Redis): Redis store object shared by the workers.
+            retries (RetryQueue[Attempt]): Queue on which failed attempts are put.
+            max_workers (int): Maximum number of attempts running at the same time.
+            thread_name_prefix (str): Prefix of the names of the worker threads.
+
+        """
+        self.retrieve = retrieve
+        self.store = store
+        self.retries = retries
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+        self._running: dict[Future[CacheResult | None], Attempt] = {}
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._running)
+
+    def __enter__(self) -> t.Self:  # noqa: D105
+        return self
+
+    def __exit__(self, *_: object) -> None:  # noqa: D105
+        self._executor.shutdown()
+
+    def submit(self, attempt: Attempt) -> None:
+        """Start an attempt for an institution.
+
+        Arguments:
+            attempt (Attempt): The institution and its retries already made.
+
+        """
+        future = self._executor.submit(
+            contextvars.copy_context().run, self.retrieve, attempt[0], self.store
+        )
+        self._running[future] = attempt
+
+    def wait(
+        self, timeout: float | None
+    ) -> list[tuple[Institution, CacheResult | Exception | None]]:
+        """Wait until an attempt finishes, and settle the finished attempts.
+
+        Arguments:
+            timeout (float | None): Seconds to wait at most, or None to wait forever.
+
+        Returns:
+            list[tuple[Institution, CacheResult | Exception | None]]:
+                Institutions that are done with their result, None if the result
+                is left in a write buffer, or the error if they failed for good.
+                Institutions put on the retry queue are not included.
+
+        """
+        done, _ = wait(self._running, timeout=timeout, return_when=FIRST_COMPLETED)
+        settled: list[tuple[Institution, CacheResult | Exception | None]] = []
+        for future in done:
+            institution, attempt = self._running.pop(future)
+            try:
+                result = future.result()
+            except Exception as ex:  # noqa: BLE001
+                if attempt < config.REQUEST_RETRIES and isinstance(
+                    ex, RETRYABLE_ERRORS
+                ):
+                    delay = max(retry_delay(attempt), error_retry_after(ex) or 0)
+                    logger.info(
+                        "Retrying institution %(fqdn)s in %(delay).1f seconds.",
+                        {"fqdn": institution.fqdn, "delay": delay},
+                    )
+                    self.retries.push((institution, attempt + 1), delay)
+                    continue
+
+                if isinstance(
+                    ex, (*RETRYABLE_ERRORS, CertificateError, CircuitOpenError)
+                ):
+                    log_failure(institution.fqdn, ex)
+                else:
+                    logger.exception(
+                        "Failed to cache groups for institution %s "
+                        "due to an unexpected error.",
+                        institution.fqdn,
+                    )
+                settled.append((institution, ex))
+                continue
+
+            if result is not None:
+                logger.info(
+                    "Successfully cached %(count)d groups for %(fqdn)s.",
+                    {"count": result.group_count, "fqdn": institution.fqdn},
+                )
+            settled.append((institution, result))
+        return settled
+
+
+def _fetch_with_retry_queue(
+    institutions: t.Iterable[Institution],
+    store: Redis,
+    *,
+    buffer: WriteBuffer | None = None,
+    advance: t.Callable[[], t.Any],
+) -> dict[str, CacheResult | UpdateError]:
+    """Fetch and cache groups for institutions on a bounded thread pool.
+
+    Requests from all workers share the rate limiter,
+    so the concurrency only bounds the number of requests in flight.
+    It starts at `FETCH_CONCURRENCY` and is adapted to the responses
+    of mAP API, see `AdaptiveConcurrency`. No institution is started
+    while mAP API asks clients to wait with `Retry-After`.
+    A failed institution is not retried inline. It is put on a retry queue
+    with a not-before time, and the workers keep going with other institutions
+    until the time passes, see `AttemptPool`.
+    Institutions are taken from the iterable only when a worker is free,
+    so a streaming loader keeps loading while the workers wait on the network.
+    If a write buffer is given, validators are read ahead for as many
+    institutions as the buffer flushes at once, see `prefetch_validators`.
+
+    Arguments:
+        institutions (Iterable[Institution]): Institutions to process.
+        store (Redis): Redis store object shared by the workers.
+        buffer (WriteBuffer | None): Write buffer shared by the workers, if any.
+        advance (Callable[[], Any]): Callback invoked when an institution is done.
+
+    Returns:
+        dict[str, CacheResult | UpdateError]:
+            Outcomes keyed by FQDN, except for those left in the write buffer.
+
+    """
+    retries: RetryQueue[Attempt] = RetryQueue()
+    outcomes: dict[str, CacheResult | UpdateError] = {}
+    validators: dict[str, dict[str, str]] = {}
+    if buffer is not None:
+        institutions = prefetch_validators(institutions, store, validators)
+    waiting = ((institution, 0) for institution in institutions)
+
+    with AttemptPool(
+        fetch_and_cache(buffer, retry=False, validators=validators),
+        store,
+        retries,
+        max_workers=fetch_concurrency.maximum,
+        thread_name_prefix="wgcd-fetch",
+    ) as attempts:
+        while True:
+            pause = fetch_concurrency.pause()
+            # due retries take precedence over institutions not tried yet
+            while (
+                not pause
+                and len(attempts) < fetch_concurrency.limit
+                and (entry := retries.pop_due() or next(waiting, None))
+            ):
+                attempts.submit(entry)
+
+            if not attempts:
+                # a free worker found nothing to do, so all institutions are taken
+                if not pause and not retries:
+                    break
+                time.sleep(pause or retries.delay() or 0)
+                continue
+
+            # a due retry can only start when a worker is free,
+            # so a full pool waits for an attempt to finish
+            free = len(attempts) < fetch_concurrency.limit
+            timeout = retries.delay() if free else None
+            for institution, outcome in attempts.wait(pause or timeout):
+                if isinstance(outcome, Exception):
+                    outcomes[institution.fqdn] = UpdateError(
+                        institution.fqdn, origin=outcome
+                    )
+                elif outcome is not None:
+                    outcomes[institution.fqdn] = outcome
+                advance()
+
+    return outcomes
+
+
+def prefetch_validators(
+    institutions: t.Iterable[Institution],
+    store: Redis,
+    validators: dict[str, dict[str, str]],
+) -> t.Iterator[Institution]:
+    """Read validators of institutions in batches of `REDIS_FLUSH_SIZE`.
+
+    Validators of each batch are read in one pipeline before its institutions
+    are yielded, so buffered institutions need no round trip of their own.
+    If Redis fails, the batch is yielded without validators,
+    and they are read for each institution instead.
+
+    Arguments:
+        institutions (Iterable[Institution]): Institutions to process.
+        store (Redis): Redis store object.
+        validators (dict[str, dict[str, str]]):
+            Dict to which validators are added keyed by FQDN.
+
+    Yields:
+        Institution: The given institutions in order.
+
+    """
+    for batch in itertools.batched(
+        institutions, max(1, config.REDIS_FLUSH_SIZE), strict=False
+    ):
+        fqdns = [institution.fqdn for institution in batch]
+        try:
+            validators.update(zip(fqdns, get_all_validators(store, fqdns), strict=True))
+        except redis.RedisError:
+            logger.warning(
+                "Failed to read validators from Redis for %d institution(s).",
+                len(fqdns),
+            )
+        yield from batch
+
+
+def error_retry_after(error: Exception) -> float | None:
+    """Return how long the response that caused an error asks to wait.
+
+    Arguments:
+        error (Exception): Error raised when fetching or caching groups.
+
+    Returns:
+        float | None:
+            Seconds from `Retry-After` of the response,
+            or None if the error has no response or the header.
+
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    return parse_retry_after(response.headers.get("Retry-After"))
+
+
+def log_failure(fqdn: str, error: Exception) -> None:
+    """Log an institution that failed to update after retries.
+
+    `CertificateError` and `CircuitOpenError` are not retried,
+    so they are logged on their own without the traceback.
+
+    Arguments:
+        fqdn (str): FQDN of the institution.
+        error (Exception): The last error of the institution.
+
+    """
+    if isinstance(error, CertificateError):
+        logger.error(str(error))
+        return
+    if isinstance(error, CircuitOpenError):
+        logger.error(
+            "Skipped institution %(fqdn)s: %(error)s", {"fqdn": fqdn, "error": error}
+        )
+        return
+
+    logger.error(
+        "Despite retries %(count)d times, failed to cache groups "
+        "to Redis for institution: %(fqdn)s.",
+        {"count": config.REQUEST_RETRIES, "fqdn": fqdn},
+    )
+    traceback.print_exc()
+
+
+def fetch_one(
+    fqdn: str, *, load_all: bool = False, **kwargs: t.Unpack[InstitutionSource]
+) -> None:
     """Fetch and cache groups for a specific institution.
 
+    Only the target institution is loaded from the source,
+    unless `load_all` is specified.
+
     Arguments:
         fqdn (str): FQDN of the target institution.
+        load_all (bool):
+            Whether to load and validate all institutions before looking it up.
         kwargs (InstitutionSource):
             - toml_path (str | Path): Path to the TOML file.
             - directory_path (str | Path): Path to the directory containing TOML files.
@@ -103,55 +679,118 @@ def fetch_one(fqdn: str, **kwargs: t.Unpack[InstitutionSource]) -> None:
 
     """
     store = connection()
-    institutions = load_institutions(**kwargs)
-
-    target_institution = next(
-        (inst for inst in institutions if inst.fqdn == fqdn), None
-    )
+    setup_rate_limiter()
+    setup_circuit_breaker()
+    if load_all:
+        target_institution = next(
+            (inst for inst in load_institutions(**kwargs) if inst.fqdn == fqdn), None
+        )
+    else:
+        target_institution = find_institution(fqdn, **kwargs)
 
     if target_institution is None:
         error_message = "Institution with FQDN %s not found."
         logger.error(error_message, fqdn)
         raise ValueError(error_message % fqdn)
 
-    with console.status(f"Fetching and caching groups for institution: {fqdn}"):
+    with (
+        console.status(f"Fetching and caching groups for institution: {fqdn}"),
+        setup_session_pool(),
+    ):
         try:
-            group_count = fetch_and_cache()(target_institution, store)
-            logger.info("Successfully cached %d groups for %s.", group_count, fqdn)
+            result = fetch_and_cache()(target_institution, store)
+            logger.info(
+                "Successfully cached %d groups for %s.", result.group_count, fqdn
+            )
         except (requests.RequestException, redis.RedisError) as ex:
             logger.error(
                 "Despite retries %(count)d times, failed to cache groups to Redis "
                 "for institution: %(fqdn)s.",
                 {"count": config.REQUEST_RETRIES, "fqdn": target_institution.fqdn},
             )
+            keep_stale(store, [fqdn])
+            raise UpdateError(fqdn, origin=ex) from ex
+        except (CertificateError, CircuitOpenError) as ex:
+            log_failure(fqdn, ex)
+            keep_stale(store, [fqdn])
             raise UpdateError(fqdn, origin=ex) from ex
 
 
-def fetch_and_cache():
+@t.overload
+def fetch_and_cache(
+    buffer: None = None,
+    *,
+    retry: bool = True,
+    validators: dict[str, dict[str, str]] | None = None,
+) -> t.Callable[[Institution, Redis], CacheResult]: ...
+
+
+@t.overload
+def fetch_and_cache(
+    buffer: WriteBuffer,
+    *,
+    retry: bool = True,
+    validators: dict[str, dict[str, str]] | None = None,
+) -> t.Callable[[Institution, Redis], CacheResult | None]: ...
+
+
+def fetch_and_cache(
+    buffer: WriteBuffer | None = None,
+    *,
+    retry: bool = True,
+    validators: dict[str, dict[str, str]] | None = None,
+) -> t.Callable[[Institution, Redis], CacheResult | None]:
     """Return a function that fetches and caches groups with retries.
 
+    Arguments:
+        buffer (WriteBuffer | None):
+            Write buffer to add fetched groups to instead of writing them directly.
+            Redis errors of buffered groups are reported when the buffer is flushed.
+        retry (bool):
+            Whether to retry inline with backoff.
+            If False, the function makes a single attempt.
+        validators (dict[str, dict[str, str]] | None):
+            Validators read ahead keyed by FQDN. An institution found here
+            takes its validators out instead of reading them from Redis.
+
     Returns:
-        Callable[[Institution,Redis],int]:
+        Callable[[Institution,Redis],CacheResult|None]:
             A function that takes an Institution and Redis store,
             fetches groups from the mAP API, and caches them in Redis with retries.
+            It returns None if the groups were added to the write buffer.
+            It raises `CertificateError` without any request or retry
+            if TLS client certificate of the institution cannot be used,
+            and `CircuitOpenError` if the circuit breaker is open.
 
     """
 
-    @backoff.on_exception(
-        lambda: backoff.expo(
-            base=config.REQUEST_RETRY_BASE,
-            factor=config.REQUEST_RETRY_FACTOR,
-            max_value=config.REQUEST_RETRY_MAX,
-        ),
-        (requests.RequestException, redis.RedisError),
-        max_tries=config.REQUEST_RETRIES + 1,
-        jitter=backoff.full_jitter,
-    )
-    def _retrieve_fetch_and_cache(institution: Institution, store: Redis) -> int:
+    def _retrieve_fetch_and_cache(
+        institution: Institution, store: Redis
+    ) -> CacheResult | None:
+        check_certificate(institution)
         try:
-            group_ids = fetch_map_groups(institution)
-            set_groups_to_redis(institution.fqdn, group_ids, store=store)
-            return len(group_ids)
+            last_validators = (validators or {}).pop(institution.fqdn, None)
+            if last_validators is None:
+                last_validators = get_validators(store, institution.fqdn)
+            result = fetch_map_groups(institution, last_validators)
+            if result.group_ids is None:
+                if buffer is not None:
+                    buffer.touch(institution.fqdn)
+                    return None
+                group_count = touch_groups(institution.fqdn, store=store)
+                if group_count >= 0:
+                    return CacheResult(group_count, changed=False)
+                # the cache expired after the validators were read
+                result = fetch_map_groups(institution)
+
+            group_ids = result.group_ids or []
+            if buffer is not None:
+                buffer.add(institution.fqdn, group_ids, result.validators)
+                return None
+            changed = set_groups_to_redis(
+                institution.fqdn, group_ids, validators=result.validators, store=store
+            )
+            return CacheResult(len(group_ids), changed)
         except requests.RequestException:
             logger.warning(
                 "Failed to fetch groups from mAP API for institution: %s",
@@ -165,56 +804,317 @@ def fetch_and_cache():
             )
             raise
 
-    return _retrieve_fetch_and_cache
+    if not retry:
+        return _retrieve_fetch_and_cache
+
+    return backoff.on_exception(
+        lambda: backoff.expo(
+            base=config.REQUEST_RETRY_BASE,
+            factor=config.REQUEST_RETRY_FACTOR,
+            max_value=config.REQUEST_RETRY_MAX,
+        ),
+        (requests.RequestException, redis.RedisError),
+        max_tries=config.REQUEST_RETRIES + 1,
+        jitter=backoff.full_jitter,
+    )(_retrieve_fetch_and_cache)
 
 
-def fetch_map_groups(institution: Institution) -> list[str]:
+def fetch_map_groups(
+    institution: Institution, validators: dict[str, str] | None = None
+) -> MapGroups:
     """Fetch and cache groups for the given institution.
 
+    Every request takes a token from the rate limiter before it is sent.
+    Requests are sent on the pooled session for the client certificate,
+    so their connections are reused by retries and other institutions.
+    If validators are given, the request is conditional
+    and the groups are not returned when they have not been modified.
+    If `PAGE_SIZE` is set, groups are requested in pages, and the pages
+    following the first one are fetched concurrently once it tells
+    the total number of groups.
+    Requests are guarded by the circuit breaker of mAP API.
+
     Arguments:
         institution (Institution): Institution object.
+        validators (dict[str, str] | None): Validators of the last response.
 
     Returns:
-        list[str]: List of group IDs.
+        MapGroups:
+            Group IDs and validators of the response.
+            Validators are empty if groups were returned in multiple pages,
+            since those of the first page do not cover the others.
 
-    """
+    Raises:
+        CircuitOpenError: If the circuit breaker does not let requests through.
+
+    """  # noqa: DOC502
+    with circuit_breaker.guard():
+        return _fetch_map_groups(institution, validators)
+
+
+def _fetch_map_groups(
+    institution: Institution, validators: dict[str, str] | None
+) -> MapGroups:
     endpoint = urljoin(config.MAP_GROUPS_API_ENDPOINT, institution.sp_connector_id)
+    with session_pool.checkout(
+        institution.client_cert_path, institution.client_key_path
+    ) as session:
+        return _fetch_pages(session, endpoint, validators)
 
-    response = requests.get(
-        endpoint,
-        cert=(institution.client_cert_path, institution.client_key_path),
-        timeout=config.REQUEST_TIMEOUT,
-    )
-    response.raise_for_status()
-    group_entries = response.json().get("entry", [])
 
-    group_ids: list[str] = [
-        group["id"].split("/")[-1] for group in group_entries if "id" in group
+def _fetch_pages(
+    session: requests.Session, endpoint: str, validators: dict[str, str] | None
+) -> MapGroups:
+    first, first_validators = fetch_group_page(session, endpoint, 1, validators)
+    if first is None:
+        return MapGroups(None, first_validators)
+    if not (starts := remaining_page_starts(first)):
+        return MapGroups(first.group_ids, first_validators)
+
+    with ThreadPoolExecutor(
+        max_workers=min(max(1, config.PAGE_CONCURRENCY), len(starts)),
+        thread_name_prefix="wgcd-pages",
+    ) as executor:
+        # config and logger are context-local, so each page is fetched in a copy
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                fetch_group_page,
+                session,
+                endpoint,
+                start,
+            )
+            for start in starts
+        ]
+        try:
+            pages = [future.result()[0] for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return MapGroups(merge_pages(first, pages), {})
+
+
+def fetch_group_page(
+    session: requests.Session,
+    endpoint: str,
+    start_index: int,
+    validators: dict[str, str] | None = None,
+) -> tuple[GroupPage | None, dict[str, str]]:
+    """Fetch a page of groups from mAP groups API.
+
+    If `STREAM_RESPONSES` is enabled, the body is parsed while it is received.
+    The outcome of the request is reported to the adaptive concurrency.
+
+    Arguments:
+        session (requests.Session): Session that presents the client certificate.
+        endpoint (str): Endpoint of the institution.
+        start_index (int): 1-based index of the first group of the page.
+        validators (dict[str, str] | None): Validators of the last response.
+
+    Returns:
+        tuple[GroupPage | None, dict[str, str]]:
+            The page, or None if not modified since the given validators,
+            and validators of the response.
+
+    Raises:
+        requests.RequestException: If the request fails.
+        requests.exceptions.InvalidJSONError:
+            If the response body is not a valid response of mAP groups API.
+
+    """
+    rate_limiter.acquire()
+    started = time.monotonic()
+    try:
+        response = session.get(
+            endpoint,
+            params=page_params(start_index),
+            headers=conditional_headers(validators),
+            timeout=config.REQUEST_TIMEOUT,
+            stream=config.STREAM_RESPONSES,
+        )
+    except requests.RequestException as ex:
+        if is_endpoint_failure(ex):
+            fetch_concurrency.observe(time.monotonic() - started, failed=True)
+        raise
+    observe_response(response.status_code, response.headers, time.monotonic() - started)
+
+    with contextlib.closing(response):
+        if response.status_code == HTTPStatus.NOT_MODIFIED and validators:
+            return None, validators
+        response.raise_for_status()
+
+        try:
+            page = (
+                parse_group_page(response.iter_content(STREAM_CHUNK_SIZE))
+                if config.STREAM_RESPONSES
+                else decode_group_page(response.content)
+            )
+        except ValueError as ex:
+            raise requests.exceptions.InvalidJSONError(ex, response=response) from ex
+    return page, response_validators(response.headers)
+
+
+def observe_response(
+    status_code: int, headers: Mapping[str, str], latency: float
+) -> None:
+    """Report a response of mAP API to the adaptive concurrency.
+
+    Arguments:
+        status_code (int): Status code of the response.
+        headers (Mapping[str, str]): Case-insensitive response headers.
+        latency (float): Seconds until the response was received.
+
+    """
+    if status_code in OVERLOAD_STATUSES:
+        fetch_concurrency.overloaded(parse_retry_after(headers.get("Retry-After")))
+    else:
+        fetch_concurrency.observe(
+            latency, failed=status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+
+
+def page_params(start_index: int) -> dict[str, int] | None:
+    """Build query parameters of mAP groups API for a page of groups.
+
+    Arguments:
+        start_index (int): 1-based index of the first group of the page.
+
+    Returns:
+        dict[str, int] | None:
+            SCIM pagination parameters, or None if `PAGE_SIZE` is not set.
+
+    """
+    if config.PAGE_SIZE <= 0:
+        return None
+    return {"startIndex": start_index, "count": config.PAGE_SIZE}
+
+
+def remaining_page_starts(first: GroupPage) -> list[int]:
+    """Return start indexes of the pages following the first page.
+
+    The step is `itemsPerPage` of the first page, which may be less than
+    `PAGE_SIZE` if mAP API limits the page size.
+
+    Arguments:
+        first (GroupPage): The first page.
+
+    Returns:
+        list[int]:
+            1-based start indexes of the remaining pages, or an empty list
+            if `PAGE_SIZE` is not set or the first page holds all groups.
+
+    """
+    if config.PAGE_SIZE <= 0 or first.total_results is None:
+        return []
+    step = first.items_per_page or len(first.group_ids)
+    if step <= 0:
+        return []
+    return list(range((first.start_index or 1) + step, first.total_results + 1, step))
+
+
+def merge_pages(first: GroupPage, pages: t.Iterable[GroupPage | None]) -> list[str]:
+    """Merge group IDs of pages in order.
+
+    Arguments:
+        first (GroupPage): The first page.
+        pages (Iterable[GroupPage | None]): The following pages in order.
+
+    Returns:
+        list[str]: Group IDs of all pages.
+
+    """
+    return [
+        *first.group_ids,
+        *(group_id for page in pages if page for group_id in page.group_ids),
     ]
 
-    return group_ids
+
+def conditional_headers(validators: dict[str, str] | None) -> dict[str, str]:
+    """Build conditional request headers from the validators of the last response.
+
+    Arguments:
+        validators (dict[str, str] | None): Validators keyed by their hash fields.
+
+    Returns:
+        dict[str, str]: Request headers.
+
+    """
+    validators = validators or {}
+    return {
+        request_header: validators[field]
+        for field, (_, request_header) in VALIDATOR_HEADERS.items()
+        if validators.get(field)
+    }
+
+
+def response_validators(headers: Mapping[str, str]) -> dict[str, str]:
+    """Extract validators from response headers of mAP groups API.
+
+    Arguments:
+        headers (Mapping[str, str]): Case-insensitive response headers.
+
+    Returns:
+        dict[str, str]: Validators keyed by their hash fields.
+
+    """
+    return {
+        field: headers[response_header]
+        for field, (response_header, _) in VALIDATOR_HEADERS.items()
+        if headers.get(response_header)
+    }
 
 
-def set_groups_to_redis(fqdn: str, group_ids: list[str], *, store: Redis | None = None):
+def set_groups_to_redis(
+    fqdn: str,
+    group_ids: list[str],
+    *,
+    validators: dict[str, str] | None = None,
+    store: Redis | None = None,
+) -> bool:
     """Set groups to redis.
 
+    The update is sent as a single MULTI/EXEC transaction,
+    so it costs one round trip and the key is never left without its TTL.
+    `groups` is rewritten only if the digest of the group IDs has changed.
+
     Arguments:
         fqdn(str): fqdn of the target sp
         group_ids(list[str]): list of group ids
+        validators(dict[str, str] | None): validators of the mAP API response
         store(Redis | None):
             Redis store object. If None, a new connection will be established.
 
+    Returns:
+        bool: Whether the cached groups were rewritten.
+
     """
-    transformed_fqdn = fqdn.replace(".", "_").replace("-", "_")
-    redis_key = transformed_fqdn + config.CACHE_KEY_SUFFIX
-    updated_at = datetime.now(UTC).isoformat(timespec="seconds")
+    if store is None:
+        store = connection()
+
+    with store.pipeline(transaction=True) as pipe:
+        queue_groups(pipe, fqdn, group_ids, validators)
+        (changed,) = pipe.execute()
+    return bool(changed)
+
+
+def touch_groups(fqdn: str, *, store: Redis | None = None) -> int:
+    """Refresh `updated_at` and TTL of groups that have not been modified.
 
+    Arguments:
+        fqdn(str): fqdn of the target sp
+        store(Redis | None):
+            Redis store object. If None, a new connection will be established.
+
+    Returns:
+        int: Number of cached groups, or -1 if the cache has already expired.
+
+    """
     if store is None:
         store = connection()
 
-    store.hset(
-        redis_key, mapping={"updated_at": updated_at, "groups": ",".join(group_ids)}
-    )
-    store.persist(redis_key)
-    if config.CACHE_TTL >= 0:
-        store.expire(redis_key, config.CACHE_TTL)
+    with store.pipeline(transaction=False) as pipe:
+        queue_touch(pipe, fqdn)
+        (group_count,) = pipe.execute()
+    return group_count
@@ -4,10 +4,17 @@
 
 """File loader module for weko-group-cache-db."""
 
+import functools
+import os
+import pickle  # noqa: S403
+import ssl
+import subprocess  # noqa: S404
 import tomllib
 import traceback
 import typing as t
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
 from pathlib import Path
 from tomllib import TOMLDecodeError
 
@@ -18,8 +25,9 @@ from pydantic_core import ValidationError
 from rich.progress import Progress, SpinnerColumn, TimeElapsedColumn
 
 from .config import config
-from .exc import ConfigurationError
+from .exc import CertificateError, ConfigurationError
 from .logger import console, logger
+from .session import FileStamp, cached_ssl_context, file_stamp
 
 
 class InstitutionSource(t.TypedDict):
@@ -38,6 +46,10 @@ class InstitutionSource(t.TypedDict):
 def load_institutions(**kwargs: t.Unpack[InstitutionSource]) -> list[Institution]:
     """Load institution information from the configured source.
 
+    If `MANIFEST_CACHE_PATH` is set, institutions are loaded from the manifest
+    without validation while the source files have not changed.
+    Otherwise the loaded institutions are written to the manifest.
+
     Arguments:
         kwargs (InstitutionSource):
             Source configuration for loading institution information.
@@ -46,21 +58,255 @@ def load_institutions(**kwargs: t.Unpack[InstitutionSource]) -> list[Institution
         list[Institution]: List of Institution objects.
 
     """
+    key = manifest_key(**kwargs) if config.MANIFEST_CACHE_PATH else None
+    if key is not None and (institutions := read_manifest(key)) is not None:
+        logger.info("%d institutions loaded from manifest cache.", len(institutions))
+        return institutions
+
+    skipped: list[Institution] = []
     if "toml_path" in kwargs:
-        return load_institutions_from_toml(kwargs["toml_path"])
-    if "directory_path" in kwargs and "fqdn_list_file" in kwargs:
-        return load_institutions_from_directory(
-            kwargs["directory_path"], kwargs["fqdn_list_file"]
+        institutions = load_institutions_from_toml(kwargs["toml_path"], skipped=skipped)
+    elif "directory_path" in kwargs and "fqdn_list_file" in kwargs:
+        institutions = load_institutions_from_directory(
+            kwargs["directory_path"], kwargs["fqdn_list_file"], skipped=skipped
         )
-    logger.error("Invalid institution source configuration.")
-    return []
+    else:
+        logger.error("Invalid institution source configuration.")
+        return []
+
+    if key is not None:
+        write_manifest(key, institutions, skipped)
+    return institutions
+
+
+def iter_institutions(
+    **kwargs: t.Unpack[InstitutionSource],
+) -> t.Iterator[Institution]:
+    """Yield institution information from the configured source as it is loaded.
+
+    Unlike `load_institutions`, each institution is validated only when it is
+    consumed, so the caller can start working on the first institutions
+    while the rest are still being loaded. Entries of FQDN list file are read
+    line by line. The manifest at `MANIFEST_CACHE_PATH` is used as in
+    `load_institutions`.
+
+    Arguments:
+        kwargs (InstitutionSource):
+            Source configuration for loading institution information.
+
+    Yields:
+        Institution: Institution object.
+
+    Raises:
+        ConfigurationError: If the TOML file cannot be read or is invalid.
+
+    """  # noqa: DOC502
+    key = manifest_key(**kwargs) if config.MANIFEST_CACHE_PATH else None
+    if key is not None and (cached := read_manifest(key)) is not None:
+        logger.info("%d institutions loaded from manifest cache.", len(cached))
+        yield from cached
+        return
+
+    skipped: list[Institution] = []
+    if "toml_path" in kwargs:
+        institutions = iter_institutions_from_toml(kwargs["toml_path"], skipped=skipped)
+    elif "directory_path" in kwargs and "fqdn_list_file" in kwargs:
+        institutions = iter_institutions_from_directory(
+            kwargs["directory_path"], kwargs["fqdn_list_file"], skipped=skipped
+        )
+    else:
+        logger.error("Invalid institution source configuration.")
+        return
+
+    if key is None:
+        yield from institutions
+        return
+
+    loaded: list[Institution] = []
+    for institution in institutions:
+        loaded.append(institution)
+        yield institution
+    write_manifest(key, loaded, skipped)
+
+
+MANIFEST_VERSION = 3
+"""Version of the manifest format. Manifests of other versions are ignored."""
+
+
+def manifest_key(**kwargs: t.Unpack[InstitutionSource]) -> tuple[t.Any, ...] | None:
+    """Return the key that identifies the source files of institutions.
+
+    The key consists of the paths, modification times and sizes of the TOML file,
+    or of the FQDN list file and the cert directory, and the settings
+    that affect the loaded institutions.
+    The manifest extends the key with the stamps of TLS client cert/key files
+    of the loaded institutions, see `tls_file_stamps`, and with the missing
+    files of the skipped institutions, see `missing_tls_files`.
+
+    Arguments:
+        kwargs (InstitutionSource):
+            Source configuration for loading institution information.
+
+    Returns:
+        tuple[Any, ...] | None:
+            The key, or None if the source is invalid or cannot be stat'ed.
+
+    """
+    if "toml_path" in kwargs:
+        paths = [kwargs["toml_path"]]
+    elif "directory_path" in kwargs and "fqdn_list_file" in kwargs:
+        paths = [kwargs["directory_path"], kwargs["fqdn_list_file"]]
+    else:
+        return None
+
+    try:
+        stats = [(path, path.stat()) for path in map(Path, paths)]
+    except OSError:
+        return None
+
+    return (
+        MANIFEST_VERSION,
+        config.SP_CONNECTOR_ID_PREFIX,
+        *((str(path.resolve()), st.st_mtime_ns, st.st_size) for path, st in stats),
+    )
+
+
+def read_manifest(key: tuple[t.Any, ...]) -> list[Institution] | None:
+    """Read institutions from the manifest at `MANIFEST_CACHE_PATH`.
+
+    The manifest is unpickled, so it must be writable only by trusted users.
+
+    Arguments:
+        key (tuple[Any, ...]): Key of the current source files.
+
+    Returns:
+        list[Institution] | None:
+            Institutions in the manifest, or None if it does not exist,
+            cannot be read, or was written for other source files
+            or other TLS client cert/key files.
+            It is also None if a missing file of a skipped institution appears.
+
+    """
+    try:
+        with Path(config.MANIFEST_CACHE_PATH).open("rb") as f:  # pyright: ignore[reportArgumentType]
+            manifest_key, items = pickle.load(f)  # noqa: S301
+    except FileNotFoundError:
+        return None
+    except OSError, pickle.UnpicklingError, EOFError, TypeError, ValueError:
+        logger.warning(
+            "Ignored unreadable manifest cache: %s", config.MANIFEST_CACHE_PATH
+        )
+        return None
+
+    *source_key, stamps, missing = manifest_key
+    if tuple(source_key) != key or any(Path(path).exists() for path in missing):
+        return None
+    institutions = [Institution.model_construct(**item) for item in items]
+    if tls_file_stamps(institutions) != stamps:
+        return None
+    return institutions
+
+
+def write_manifest(
+    key: tuple[t.Any, ...],
+    institutions: list[Institution],
+    skipped: list[Institution] | None = None,
+) -> None:
+    """Write institutions to the manifest at `MANIFEST_CACHE_PATH`.
+
+    The manifest is replaced atomically, so concurrent readers never see
+    a partially written one. Failures are logged and ignored.
+    It is not written if TLS client cert/key files of an institution
+    have been removed since it was loaded, or if those of a skipped
+    institution have all been provisioned since.
+
+    Arguments:
+        key (tuple[Any, ...]): Key of the current source files.
+        institutions (list[Institution]): Validated institutions to write.
+        skipped (list[Institution] | None):
+            Institutions skipped due to missing TLS client cert/key files.
+
+    """
+    stamps = tls_file_stamps(institutions)
+    missing = missing_tls_files(skipped or [])
+    if stamps is None or missing is None:
+        return
+
+    path = Path(config.MANIFEST_CACHE_PATH)  # pyright: ignore[reportArgumentType]
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    items = [institution.model_dump() for institution in institutions]
+    try:
+        with temp_path.open("wb") as f:
+            pickle.dump(
+                ((*key, stamps, missing), items), f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        temp_path.replace(path)
+    except OSError:
+        logger.warning("Failed to write manifest cache: %s", path)
+        temp_path.unlink(missing_ok=True)
+
+
+def tls_file_stamps(
+    institutions: list[Institution],
+) -> tuple[tuple[FileStamp, FileStamp], ...] | None:
+    """Return the stamps of TLS client cert/key files of institutions.
+
+    Arguments:
+        institutions (list[Institution]): Institutions to stamp.
+
+    Returns:
+        tuple[tuple[FileStamp, FileStamp], ...] | None:
+            Stamps of the certificate and the key of each institution,
+            or None if any of the files cannot be stat'ed.
+
+    """
+    try:
+        return tuple(
+            (
+                file_stamp(institution.client_cert_path),
+                file_stamp(institution.client_key_path),
+            )
+            for institution in institutions
+        )
+    except OSError:
+        return None
+
+
+def missing_tls_files(institutions: list[Institution]) -> tuple[str, ...] | None:
+    """Return the missing TLS client cert/key files of skipped institutions.
+
+    Arguments:
+        institutions (list[Institution]): Institutions skipped due to missing files.
+
+    Returns:
+        tuple[str, ...] | None:
+            Paths of the files that do not exist,
+            or None if both files of an institution exist now.
+
+    """
+    missing: list[str] = []
+    for institution in institutions:
+        paths = [
+            path
+            for path in (institution.client_cert_path, institution.client_key_path)
+            if not Path(path).exists()
+        ]
+        if not paths:
+            return None
+        missing.extend(paths)
+    return tuple(missing)
 
 
-def load_institutions_from_toml(toml_path: str | Path) -> list[Institution]:
+def load_institutions_from_toml(
+    toml_path: str | Path, *, skipped: list[Institution] | None = None
+) -> list[Institution]:
     """Load institution information from TOML file.
 
     Arguments:
         toml_path (Path): Path to the TOML file.
+        skipped (list[Institution] | None):
+            List to collect institutions skipped due to missing TLS client
+            cert/key files, if any.
 
     Returns:
         list[Institution]: List of Institution objects.
@@ -68,6 +314,121 @@ def load_institutions_from_toml(toml_path: str | Path) -> list[Institution]:
     Raises:
         ConfigurationError: If the TOML file cannot be read or is invalid.
 
+    """  # noqa: DOC502
+    entries = read_toml_entries(toml_path)
+    if not entries:
+        return []
+
+    with Progress(
+        SpinnerColumn(),
+        *Progress.get_default_columns(),
+        TimeElapsedColumn(),
+        console=console,
+    ) as progress:
+        task = progress.add_task(
+            "Validating institution entries...", total=len(entries)
+        )
+        return list(
+            validate_toml_entries(
+                entries,
+                advance=lambda: progress.update(task, advance=1),
+                skipped=skipped,
+            )
+        )
+
+
+def iter_institutions_from_toml(
+    toml_path: str | Path, *, skipped: list[Institution] | None = None
+) -> t.Iterator[Institution]:
+    """Yield institution information from TOML file as each entry is validated.
+
+    Arguments:
+        toml_path (str | Path): Path to the TOML file.
+        skipped (list[Institution] | None):
+            List to collect institutions skipped due to missing TLS client
+            cert/key files, if any.
+
+    Yields:
+        Institution: Institution object.
+
+    Raises:
+        ConfigurationError: If the TOML file cannot be read or is invalid.
+
+    """  # noqa: DOC502
+    yield from validate_toml_entries(read_toml_entries(toml_path), skipped=skipped)
+
+
+def validate_toml_entries(
+    entries: t.Iterable[t.Any],
+    *,
+    advance: t.Callable[[], t.Any] | None = None,
+    skipped: list[Institution] | None = None,
+) -> t.Iterator[Institution]:
+    """Validate institution entries of TOML file one by one.
+
+    Invalid entries and entries without TLS client cert/key files are skipped
+    with a warning.
+
+    Arguments:
+        entries (Iterable[Any]): Entries of the 'institutions' section.
+        advance (Callable[[], Any] | None):
+            Callback invoked when an entry is done, if any.
+        skipped (list[Institution] | None):
+            List to collect institutions skipped due to missing TLS client
+            cert/key files, if any.
+
+    Yields:
+        Institution: Institution object.
+
+    """
+    p = inflect.engine()
+    count = 0
+    for index, item in enumerate(entries):
+        ordinal = p.ordinal(index + 1)  # pyright: ignore[reportArgumentType]
+
+        try:
+            institution = Institution.model_validate(item)
+        except ValidationError:
+            institution_fqdn = item.get("fqdn", "Unknown")
+            logger.warning(
+                'Failed to load %(ordinal)s institution "%(fqdn)s".',
+                {"ordinal": ordinal, "fqdn": institution_fqdn},
+            )
+            traceback.print_exc()
+            continue
+        else:
+            if not check_existence_file(institution):
+                logger.warning(
+                    'Skip %(ordinal)s institution "%(fqdn)s" '
+                    "due to missing TLS client cert/key files.",
+                    {"ordinal": ordinal, "fqdn": institution.fqdn},
+                )
+                if skipped is not None:
+                    skipped.append(institution)
+                continue
+
+            count += 1
+            yield institution
+        finally:
+            if advance is not None:
+                advance()
+
+    logger.info("%d institutions loaded successfully.", count)
+
+
+def read_toml_entries(toml_path: str | Path) -> list[t.Any]:
+    """Read institution entries from TOML file without validating them.
+
+    Arguments:
+        toml_path (str | Path): Path to the TOML file.
+
+    Returns:
+        list[Any]: Entries of the 'institutions' section,
+            or an empty list if the section is missing or not a list.
+
+    Raises:
+        ConfigurationError: If the TOML file cannot be read or is invalid.
+
     """
     if isinstance(toml_path, str):
         toml_path = Path(toml_path)
@@ -85,54 +446,15 @@ def load_institutions_from_toml(toml_path: str | Path) -> list[Institution]:
             logger.error(error_message, toml_path)
             raise ConfigurationError(error_message % toml_path) from ex
 
-        if "institutions" not in toml_data:
-            logger.error("No 'institutions' section found in the TOML file.")
-            return []
+    if "institutions" not in toml_data:
+        logger.error("No 'institutions' section found in the TOML file.")
+        return []
 
-        if not isinstance(toml_data["institutions"], list):
-            logger.error("The 'institutions' section must be a list in the TOML file.")
-            return []
+    if not isinstance(toml_data["institutions"], list):
+        logger.error("The 'institutions' section must be a list in the TOML file.")
+        return []
 
-    p = inflect.engine()
-    institutions: list[Institution] = []
-    with Progress(
-        SpinnerColumn(),
-        *Progress.get_default_columns(),
-        TimeElapsedColumn(),
-        console=console,
-    ) as progress:
-        task = progress.add_task(
-            "Validating institution entries...", total=len(toml_data["institutions"])
-        )
-        for index, item in enumerate(toml_data["institutions"]):
-            ordinal = p.ordinal(index + 1)  # pyright: ignore[reportArgumentType]
-
-            try:
-                institution = Institution.model_validate(item)
-            except ValidationError:
-                institution_fqdn = item.get("fqdn", "Unknown")
-                logger.warning(
-                    'Failed to load %(ordinal)s institution "%(fqdn)s".',
-                    {"ordinal": ordinal, "fqdn": institution_fqdn},
-                )
-                traceback.print_exc()
-                continue
-            else:
-                if not check_existence_file(institution):
-                    logger.warning(
-                        'Skip %(ordinal)s institution "%(fqdn)s" '
-                        "due to missing TLS client cert/key files.",
-                        {"ordinal": ordinal, "fqdn": institution.fqdn},
-                    )
-                    continue
-
-                institutions.append(institution)
-            finally:
-                progress.update(task, advance=1)
-
-    logger.info("%d institutions loaded successfully.", len(institutions))
-
-    return institutions
+    return toml_data["institutions"]
 
 
 CRT_FILE_NAME = "server.crt"
@@ -141,9 +463,15 @@ CRT_FILE_NAME = "server.crt"
 KEY_FILE_NAME = "server.key"
 """File name for TLS client key in directory source."""
 
+TLS_FILE_NAMES = frozenset({CRT_FILE_NAME, KEY_FILE_NAME})
+"""File names required in the directory of each institution."""
+
 
 def load_institutions_from_directory(
-    directory_path: str | Path, fqdn_list_file: str | Path
+    directory_path: str | Path,
+    fqdn_list_file: str | Path,
+    *,
+    skipped: list[Institution] | None = None,
 ) -> list[Institution]:
     """Load institution information from the configured directory.
 
@@ -152,6 +480,9 @@ def load_institutions_from_directory(
             Path to the directory containing TOML files.
         fqdn_list_file (str | Path):
             Path to the file containing FQDN list
+        skipped (list[Institution] | None):
+            List to collect institutions skipped due to missing TLS client
+            cert/key files, if any.
 
     Returns:
         list[Institution]: List of Institution objects.
@@ -163,13 +494,8 @@ def load_institutions_from_directory(
         fqdn_list_file = Path(fqdn_list_file)
 
     with fqdn_list_file.open("r", encoding="utf-8") as f:
-        fqdn_list = [
-            L.split(" ")[0]
-            for line in f
-            if (L := line.strip()) and not L.startswith("#")
-        ]
-    p = inflect.engine()
-    institutions: list[Institution] = []
+        fqdn_list = list(read_fqdn_list(f))
+
     with Progress(
         SpinnerColumn(),
         *Progress.get_default_columns(),
@@ -179,46 +505,307 @@ def load_institutions_from_directory(
         task = progress.add_task(
             "Loading institutions from directory...", total=len(fqdn_list)
         )
-        for index, fqdn in enumerate(fqdn_list):
-            ordinal = p.ordinal(index + 1)  # pyright: ignore[reportArgumentType]
+        return list(
+            validate_directory_entries(
+                directory_path,
+                fqdn_list,
+                advance=lambda: progress.update(task, advance=1),
+                skipped=skipped,
+            )
+        )
+
+
+def iter_institutions_from_directory(
+    directory_path: str | Path,
+    fqdn_list_file: str | Path,
+    *,
+    skipped: list[Institution] | None = None,
+) -> t.Iterator[Institution]:
+    """Yield institution information from the configured directory.
+
+    The FQDN list file is read line by line as institutions are consumed.
+
+    Arguments:
+        directory_path (str | Path):
+            Path to the directory containing TOML files.
+        fqdn_list_file (str | Path):
+            Path to the file containing FQDN list
+        skipped (list[Institution] | None):
+            List to collect institutions skipped due to missing TLS client
+            cert/key files, if any.
+
+    Yields:
+        Institution: Institution object.
+
+    """
+    with Path(fqdn_list_file).open("r", encoding="utf-8") as f:
+        yield from validate_directory_entries(
+            Path(directory_path), read_fqdn_list(f), skipped=skipped
+        )
+
 
-            sp_connector_id = (
-                f"{config.SP_CONNECTOR_ID_PREFIX}"
-                f"{fqdn.replace('.', '_').replace('-', '_')}"
+def validate_directory_entries(
+    directory_path: Path,
+    fqdns: t.Iterable[str],
+    *,
+    advance: t.Callable[[], t.Any] | None = None,
+    skipped: list[Institution] | None = None,
+) -> t.Iterator[Institution]:
+    """Build and validate institutions of the configured directory one by one.
+
+    Invalid institutions and institutions without TLS client cert/key files
+    are skipped with a warning. The files are looked up in the index built
+    by `index_directory` instead of being checked one by one.
+
+    Arguments:
+        directory_path (Path): Path to the directory containing TLS files.
+        fqdns (Iterable[str]): FQDNs of the institutions.
+        advance (Callable[[], Any] | None):
+            Callback invoked when an institution is done, if any.
+        skipped (list[Institution] | None):
+            List to collect institutions skipped due to missing TLS client
+            cert/key files, if any.
+
+    Yields:
+        Institution: Institution object.
+
+    """
+    index = index_directory(directory_path)
+    p = inflect.engine()
+    count = 0
+    for number, fqdn in enumerate(fqdns, start=1):
+        ordinal = p.ordinal(number)  # pyright: ignore[reportArgumentType]
+
+        try:
+            institution = build_directory_institution(directory_path, fqdn)
+        except ValidationError:
+            logger.warning(
+                'Failed to load %(ordinal)s institution "%(fqdn)s".',
+                {"ordinal": ordinal, "fqdn": fqdn},
             )
-            client_cert_path = directory_path / fqdn / CRT_FILE_NAME
-            client_key_path = directory_path / fqdn / KEY_FILE_NAME
-
-            try:
-                institution = Institution(
-                    name=None,
-                    fqdn=fqdn,
-                    sp_connector_id=sp_connector_id,
-                    client_cert_path=str(client_cert_path),
-                    client_key_path=str(client_key_path),
-                )
-            except ValidationError:
+            traceback.print_exc()
+            continue
+        else:
+            if not TLS_FILE_NAMES.issubset(index.get(fqdn, ())):
                 logger.warning(
-                    'Failed to load %(ordinal)s institution "%(fqdn)s".',
-                    {"ordinal": ordinal, "fqdn": fqdn},
+                    'Skip %(ordinal)s institution "%(fqdn)s" due to missing '
+                    "TLS client cert/key files.",
+                    {"ordinal": ordinal, "fqdn": institution.fqdn},
                 )
-                traceback.print_exc()
+                if skipped is not None:
+                    skipped.append(institution)
                 continue
-            else:
-                if not check_existence_file(institution):
-                    logger.warning(
-                        'Skip %(ordinal)s institution "%(fqdn)s" due to missing '
-                        "TLS client cert/key files.",
-                        {"ordinal": ordinal, "fqdn": institution.fqdn},
-                    )
-                    continue
-                institutions.append(institution)
-            finally:
-                progress.update(task, advance=1)
-
-    logger.info("%d institutions loaded successfully.", len(institutions))
 
-    return institutions
+            count += 1
+            yield institution
+        finally:
+            if advance is not None:
+                advance()
+
+    logger.info("%d institutions loaded successfully.", count)
+
+
+def index_directory(directory_path: Path) -> dict[str, frozenset[str]]:
+    """Index files of all institutions in the configured directory.
+
+    The directory and each of its subdirectories are listed by `os.scandir`
+    once, instead of checking the files of each institution separately.
+    Subdirectories are listed on `DIRECTORY_SCAN_WORKERS` threads.
+
+    Arguments:
+        directory_path (Path): Path to the directory containing TLS files.
+
+    Returns:
+        dict[str, frozenset[str]]:
+            Names of regular files in each subdirectory, keyed by its name.
+            Empty if the directory cannot be read.
+
+    """
+    try:
+        with os.scandir(directory_path) as entries:
+            subdirectories = [
+                (entry.name, entry.path) for entry in entries if entry.is_dir()
+            ]
+    except OSError:
+        logger.error("Failed to read institution directory: %s", directory_path)
+        return {}
+
+    workers = min(config.DIRECTORY_SCAN_WORKERS, len(subdirectories))
+    paths = [path for _, path in subdirectories]
+    if workers > 1:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="wgcd-scan"
+        ) as executor:
+            files = list(executor.map(list_files, paths))
+    else:
+        files = [list_files(path) for path in paths]
+
+    return {name: names for (name, _), names in zip(subdirectories, files, strict=True)}
+
+
+def list_files(path: str) -> frozenset[str]:
+    """List names of regular files in a directory.
+
+    Arguments:
+        path (str): Path to the directory.
+
+    Returns:
+        frozenset[str]: Names of the files, or empty if it cannot be read.
+
+    """
+    try:
+        with os.scandir(path) as entries:
+            return frozenset(entry.name for entry in entries if entry.is_file())
+    except OSError:
+        return frozenset()
+
+
+def read_fqdn_list(lines: t.Iterable[str]) -> t.Iterator[str]:
+    """Read FQDNs from the lines of FQDN list file.
+
+    Blank lines and lines starting with `#` are skipped,
+    and anything after the first space of a line is ignored.
+
+    Arguments:
+        lines (Iterable[str]): Lines of the FQDN list file.
+
+    Yields:
+        str: FQDN of each institution.
+
+    """
+    for line in lines:
+        if (stripped := line.strip()) and not stripped.startswith("#"):
+            yield stripped.split(" ")[0]
+
+
+def build_directory_institution(directory_path: Path, fqdn: str) -> Institution:
+    """Build an institution whose TLS files are in the directory named by its FQDN.
+
+    Arguments:
+        directory_path (Path): Path to the directory containing TLS files.
+        fqdn (str): FQDN of the institution.
+
+    Returns:
+        Institution: Institution object.
+
+    Raises:
+        ValidationError: If the institution is invalid.
+
+    """  # noqa: DOC502
+    sp_connector_id = (
+        f"{config.SP_CONNECTOR_ID_PREFIX}{fqdn.replace('.', '_').replace('-', '_')}"
+    )
+    return Institution(
+        name=None,
+        fqdn=fqdn,
+        sp_connector_id=sp_connector_id,
+        client_cert_path=str(directory_path / fqdn / CRT_FILE_NAME),
+        client_key_path=str(directory_path / fqdn / KEY_FILE_NAME),
+    )
+
+
+def find_institution(
+    fqdn: str, **kwargs: t.Unpack[InstitutionSource]
+) -> Institution | None:
+    """Load only the institution with the given FQDN from the configured source.
+
+    Other institutions are neither validated nor checked for their TLS files.
+    If the manifest at `MANIFEST_CACHE_PATH` is up to date, it is looked up instead.
+
+    Arguments:
+        fqdn (str): FQDN of the institution.
+        kwargs (InstitutionSource):
+            Source configuration for loading institution information.
+
+    Returns:
+        Institution | None: The institution, or None if it is not found or invalid.
+
+    """
+    key = manifest_key(**kwargs) if config.MANIFEST_CACHE_PATH else None
+    if key is not None and (institutions := read_manifest(key)) is not None:
+        return next((inst for inst in institutions if inst.fqdn == fqdn), None)
+
+    if "toml_path" in kwargs:
+        return find_institution_in_toml(kwargs["toml_path"], fqdn)
+    if "directory_path" in kwargs and "fqdn_list_file" in kwargs:
+        return find_institution_in_directory(
+            kwargs["directory_path"], kwargs["fqdn_list_file"], fqdn
+        )
+    logger.error("Invalid institution source configuration.")
+    return None
+
+
+def find_institution_in_toml(toml_path: str | Path, fqdn: str) -> Institution | None:
+    """Load the first institution with the given FQDN from TOML file.
+
+    Arguments:
+        toml_path (str | Path): Path to the TOML file.
+        fqdn (str): FQDN of the institution.
+
+    Returns:
+        Institution | None: The institution, or None if it is not found or invalid.
+
+    """
+    entries = read_toml_entries(toml_path)
+    item = next(
+        (
+            item
+            for item in entries
+            if isinstance(item, dict) and item.get("fqdn") == fqdn
+        ),
+        None,
+    )
+    if item is None:
+        return None
+
+    try:
+        institution = Institution.model_validate(item)
+    except ValidationError:
+        logger.warning('Failed to load institution "%s".', fqdn)
+        traceback.print_exc()
+        return None
+
+    if not check_existence_file(institution):
+        logger.warning(
+            'Skip institution "%s" due to missing TLS client cert/key files.', fqdn
+        )
+        return None
+    return institution
+
+
+def find_institution_in_directory(
+    directory_path: str | Path, fqdn_list_file: str | Path, fqdn: str
+) -> Institution | None:
+    """Load the institution with the given FQDN from the configured directory.
+
+    The FQDN list file is scanned only until the FQDN is found.
+
+    Arguments:
+        directory_path (str | Path): Path to the directory containing TLS files.
+        fqdn_list_file (str | Path): Path to the file containing FQDN list.
+        fqdn (str): FQDN of the institution.
+
+    Returns:
+        Institution | None: The institution, or None if it is not found or invalid.
+
+    """
+    with Path(fqdn_list_file).open("r", encoding="utf-8") as f:
+        if fqdn not in read_fqdn_list(f):
+            return None
+
+    try:
+        institution = build_directory_institution(Path(directory_path), fqdn)
+    except ValidationError:
+        logger.warning('Failed to load institution "%s".', fqdn)
+        traceback.print_exc()
+        return None
+
+    if not check_existence_file(institution):
+        logger.warning(
+            'Skip institution "%s" due to missing TLS client cert/key files.', fqdn
+        )
+        return None
+    return institution
 
 
 def check_existence_file(institution: Institution) -> bool:
@@ -237,6 +824,176 @@ def check_existence_file(institution: Institution) -> bool:
     return cert_path.exists() and key_path.exists()
 
 
+class CertificateStatus(t.NamedTuple):
+    """Result of checking a pair of TLS client certificate and key."""
+
+    not_after: datetime | None
+    """Expiry of the certificate, or None if it cannot be read."""
+
+    error: str | None
+    """Why the pair cannot be used regardless of time, or None if it can."""
+
+    def problem(self, now: datetime) -> str | None:
+        """Return why the pair cannot be used at the given time.
+
+        Arguments:
+            now (datetime): Current time.
+
+        Returns:
+            str | None: The reason, or None if the pair can be used.
+
+        """
+        if self.error is not None:
+            return self.error
+        if self.not_after is not None and self.not_after <= now:
+            return f"expired at {self.not_after.isoformat()}"
+        return None
+
+
+def inspect_certificate(institution: Institution) -> CertificateStatus | None:
+    """Check TLS client certificate and key of an institution.
+
+    The result is cached while modification times and sizes of the files
+    do not change, so that the pair is loaded once per process.
+
+    Arguments:
+        institution (Institution): Institution object.
+
+    Returns:
+        CertificateStatus | None:
+            Result of the check, or None if the files cannot be found.
+            Missing files are left to the loader and the HTTP client to report.
+
+    """
+    try:
+        cert_stamp = file_stamp(institution.client_cert_path)
+        key_stamp = file_stamp(institution.client_key_path)
+    except OSError:
+        return None
+
+    return _inspect_certificate(
+        institution.client_cert_path, institution.client_key_path, cert_stamp, key_stamp
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _inspect_certificate(
+    cert_path: str,
+    key_path: str,
+    cert_stamp: FileStamp,
+    key_stamp: FileStamp,
+) -> CertificateStatus:
+    """Load a pair of TLS client certificate and key, cached by file stamps.
+
+    The pair is loaded into the SSL context cached for the HTTP sessions,
+    so a pair that can be used is not loaded again when its session is created.
+
+    Arguments:
+        cert_path (str): Path to the certificate file.
+        key_path (str): Path to the key file.
+        cert_stamp (FileStamp): Modification time and size of the certificate.
+        key_stamp (FileStamp): Modification time and size of the key.
+
+    Returns:
+        CertificateStatus: Result of the check.
+
+    """
+    try:
+        cached_ssl_context(cert_path, key_path, cert_stamp, key_stamp)
+    except ssl.SSLError as ex:
+        return CertificateStatus(None, f"certificate and key do not match: {ex}")
+    except OSError as ex:
+        return CertificateStatus(None, f"failed to read certificate and key: {ex}")
+
+    try:
+        not_after = certificate_not_after(cert_path)
+    except OSError, subprocess.SubprocessError, ValueError:
+        return CertificateStatus(None, "failed to read expiry of certificate")
+    return CertificateStatus(not_after, None)
+
+
+OPENSSL_TIMEOUT = 10
+"""Seconds to wait for `openssl` to read a certificate."""
+
+
+def certificate_not_after(cert_path: str) -> datetime:
+    """Read the expiry of the first certificate in a PEM file.
+
+    The certificate is decoded by `openssl x509`, as the standard library
+    has no public API to parse a certificate that is not of a peer.
+
+    Arguments:
+        cert_path (str): Path to the certificate file.
+
+    Returns:
+        datetime: The end of the validity period in UTC.
+
+    Raises:
+        OSError: If `openssl` cannot be run.
+        subprocess.SubprocessError:
+            If the file contains no certificate or `openssl` does not finish.
+        ValueError: If the validity of the certificate cannot be read.
+
+    """  # noqa: DOC502
+    result = subprocess.run(  # noqa: S603
+        ["openssl", "x509", "-noout", "-enddate", "-in", cert_path],  # noqa: S607
+        capture_output=True,
+        check=True,
+        text=True,
+        timeout=OPENSSL_TIMEOUT,
+    )
+    name, _, value = result.stdout.strip().partition("=")
+    if name != "notAfter":
+        error_message = f"Unexpected output of openssl: {result.stdout!r}"
+        raise ValueError(error_message)
+    return datetime.fromtimestamp(ssl.cert_time_to_seconds(value), UTC)
+
+
+def check_certificate(institution: Institution) -> None:
+    """Check that TLS client certificate of an institution can be used now.
+
+    Arguments:
+        institution (Institution): Institution object.
+
+    Raises:
+        CertificateError:
+            If the certificate has expired or does not match the key.
+            Retrying it does not help, so it should not be retried.
+
+    """
+    status = inspect_certificate(institution)
+    if status is None:
+        return
+    if (reason := status.problem(datetime.now(UTC))) is not None:
+        raise CertificateError(institution.fqdn, reason)
+
+
+def preflight_certificates(
+    institutions: list[Institution],
+) -> list[CertificateStatus | None]:
+    """Check TLS client certificates of institutions in parallel.
+
+    Certificates are checked on `CERT_CHECK_WORKERS` threads.
+
+    Arguments:
+        institutions (list[Institution]): Institutions to check.
+
+    Returns:
+        list[CertificateStatus | None]:
+            Result of each institution in the same order.
+            See `inspect_certificate`.
+
+    """
+    workers = min(config.CERT_CHECK_WORKERS, len(institutions))
+    if workers <= 1:
+        return [inspect_certificate(institution) for institution in institutions]
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="wgcd-certs"
+    ) as executor:
+        return list(executor.map(inspect_certificate, institutions))
+
+
 class Institution(BaseModel):
     """Institution model for loading from TOML file."""
 
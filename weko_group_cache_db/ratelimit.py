@@ -0,0 +1,111 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Rate limiter module for weko-group-cache-db."""
+
+import asyncio
+import math
+import threading
+import time
+import typing as t
+
+from contextvars import ContextVar
+
+from werkzeug.local import LocalProxy
+
+from .config import config
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter.
+
+    Tokens are refilled continuously at `rate` per second up to `burst`.
+    Callers reserve a token and wait for their reservation,
+    so concurrent callers are served in arrival order.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        *,
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the token bucket.
+
+        Args:
+            rate (float):
+                Tokens refilled per second. `math.inf` disables rate limiting.
+            burst (int): Maximum number of tokens that can be accumulated.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        """Whether the bucket never makes callers wait."""
+        return math.isinf(self.rate)
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it.
+
+        Returns:
+            float: Seconds to wait before the reserved token becomes available.
+
+        """
+        if self.unlimited:
+            return 0.0
+
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._updated = now
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        if (delay := self.reserve()) > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a token is available."""
+        if (delay := self.reserve()) > 0:
+            await asyncio.sleep(delay)
+
+
+_current_rate_limiter: ContextVar[TokenBucket] = ContextVar("current_rate_limiter")
+
+
+def setup_rate_limiter() -> TokenBucket:
+    """Initialize the rate limiter for mAP API requests from the config.
+
+    If `REQUEST_RATE` is not specified, it is derived from `REQUEST_INTERVAL`.
+
+    Returns:
+        TokenBucket: The rate limiter shared by every request in this context.
+
+    """
+    rate = config.REQUEST_RATE
+    if rate is None:
+        rate = 1 / config.REQUEST_INTERVAL if config.REQUEST_INTERVAL > 0 else 0
+    if rate <= 0:
+        rate = math.inf
+
+    limiter = TokenBucket(rate, config.REQUEST_BURST)
+    _current_rate_limiter.set(limiter)
+    return limiter
+
+
+rate_limiter = t.cast(
+    TokenBucket,
+    LocalProxy(lambda: _current_rate_limiter.get(None) or setup_rate_limiter()),
+)
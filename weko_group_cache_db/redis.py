@@ -5,6 +5,7 @@
 """Redis connection module for weko-group-cache-db."""
 
 from redis import Redis, sentinel
+from redis.asyncio import Redis as AsyncRedis, sentinel as async_sentinel
 from redis.exceptions import ConnectionError as RedisConnectionError
 
 from .config import config
@@ -60,4 +61,53 @@ def _sentinel_connection() -> Redis:
 
     """
     sentinels = sentinel.Sentinel(config.REDIS_SENTINELS, decode_responses=False)
-    return sentinels.master_for(config.REDIS_SENTINEL_MASTER, db=config.REDIS_DB_INDEX)
+    return sentinels.master_for(_sentinel_master(), db=config.REDIS_DB_INDEX)
+
+
+def _sentinel_master() -> str:
+    """Return the name of the master monitored by Redis Sentinel.
+
+    Returns:
+        str: Name of the master.
+
+    Raises:
+        ValueError: If `REDIS_SENTINEL_MASTER` is not set.
+
+    """
+    if config.REDIS_SENTINEL_MASTER is None:
+        error_message = "REDIS_SENTINEL_MASTER is required for Redis Sentinel."
+        raise ValueError(error_message)
+    return config.REDIS_SENTINEL_MASTER
+
+
+async def async_connection() -> AsyncRedis:
+    """Establish Redis connection for asyncio.
+
+    Returns:
+        AsyncRedis: Redis store object for asyncio.
+
+    Raises:
+        ValueError: If configuration for Redis is invalid.
+        ConnectionError: If failed to connect to Redis.
+
+    """
+    try:
+        if config.REDIS_TYPE == "redis":
+            store = AsyncRedis.from_url(config.REDIS_URL)
+            await store.ping()  # pyright: ignore[reportGeneralTypeIssues]
+            logger.info("Successfully connected to Redis.")
+        else:
+            sentinels = async_sentinel.Sentinel(
+                config.REDIS_SENTINELS, decode_responses=False
+            )
+            store = sentinels.master_for(_sentinel_master(), db=config.REDIS_DB_INDEX)
+            await store.ping()  # pyright: ignore[reportGeneralTypeIssues]
+            logger.info("Successfully connected to Redis Sentinel.")
+    except ValueError:
+        logger.error("Failed to connect to Redis. Invalid configuration.")
+        raise
+    except RedisConnectionError:
+        logger.error("Failed to connect to Redis. Something went wrong on Redis.")
+        raise
+
+    return store
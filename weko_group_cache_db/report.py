@@ -0,0 +1,209 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Report module for weko-group-cache-db."""
+
+import typing as t
+
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+from rich.table import Table
+
+from .cache import get_freshness
+from .config import config
+from .loader import InstitutionSource, load_institutions, preflight_certificates
+from .logger import console, logger
+from .redis import connection
+
+if t.TYPE_CHECKING:
+    from .cache import Freshness  # pragma: no cover
+    from .loader import CertificateStatus  # pragma: no cover
+
+
+EXPIRY_MISSING = -2
+"""Histogram key of group caches that do not exist."""
+
+EXPIRY_NEVER = -1
+"""Histogram key of group caches that never expire."""
+
+BAR_WIDTH = 40
+"""Width of the longest bar in the histogram table."""
+
+
+def report_expiry(
+    *, bucket: int = 3600, **kwargs: t.Unpack[InstitutionSource]
+) -> dict[int, int]:
+    """Print a histogram of the time until group caches of institutions expire.
+
+    Arguments:
+        bucket (int): Width of each histogram bucket in seconds.
+        kwargs (InstitutionSource):
+            - toml_path (str | Path): Path to the TOML file.
+            - directory_path (str | Path): Path to the directory containing TOML files.
+            - fqdn_list_file (str | Path): Path to the file containing FQDN list.
+
+    Returns:
+        dict[int, int]: The histogram. See `expiry_histogram`.
+
+    """
+    store = connection()
+    institutions = load_institutions(**kwargs)
+
+    if not institutions:
+        logger.warning("No institutions found to report group caches for.")
+        return {}
+
+    freshness = get_freshness(store, [institution.fqdn for institution in institutions])
+    histogram = expiry_histogram(freshness, bucket)
+    console.print(histogram_table(histogram, bucket))
+    return histogram
+
+
+def expiry_histogram(freshness: list[Freshness], bucket: int) -> dict[int, int]:
+    """Count group caches by the time until they expire.
+
+    Arguments:
+        freshness (list[Freshness]): Freshness of group caches.
+        bucket (int): Width of each histogram bucket in seconds.
+
+    Returns:
+        dict[int, int]:
+            Numbers of caches keyed by the start of their bucket in seconds,
+            in ascending order. Buckets between the earliest and the latest
+            expiry are included even if they are empty.
+            `EXPIRY_MISSING` and `EXPIRY_NEVER` count caches that do not exist
+            and caches that never expire.
+
+    """
+    counts = Counter(
+        fresh.ttl if fresh.ttl < 0 else fresh.ttl // bucket * bucket
+        for fresh in freshness
+    )
+    if expiring := [start for start in counts if start >= 0]:
+        for start in range(min(expiring), max(expiring) + 1, bucket):
+            counts.setdefault(start, 0)
+    return dict(sorted(counts.items()))
+
+
+def histogram_table(histogram: dict[int, int], bucket: int) -> Table:
+    """Render an expiry histogram as a table.
+
+    Arguments:
+        histogram (dict[int, int]): The histogram from `expiry_histogram`.
+        bucket (int): Width of each histogram bucket in seconds.
+
+    Returns:
+        Table: Table with a row for each bucket.
+
+    """
+    table = Table(title="Expiry of group caches")
+    table.add_column("Expires in")
+    table.add_column("Institutions", justify="right")
+    table.add_column("")
+
+    peak = max(histogram.values(), default=0)
+    for start, count in histogram.items():
+        if start == EXPIRY_MISSING:
+            label = "missing"
+        elif start == EXPIRY_NEVER:
+            label = "never"
+        else:
+            label = f"{timedelta(seconds=start)} - {timedelta(seconds=start + bucket)}"
+        bar = "█" * round(BAR_WIDTH * count / peak) if peak else ""
+        table.add_row(label, str(count), bar)
+
+    return table
+
+
+def report_certificates(
+    **kwargs: t.Unpack[InstitutionSource],
+) -> dict[str, CertificateStatus]:
+    """Print TLS client certificates that cannot be used or expire soon.
+
+    Certificates expiring within `CERT_EXPIRY_WARNING` are reported
+    with those that have expired or do not match their keys.
+
+    Arguments:
+        kwargs (InstitutionSource):
+            - toml_path (str | Path): Path to the TOML file.
+            - directory_path (str | Path): Path to the directory containing TOML files.
+            - fqdn_list_file (str | Path): Path to the file containing FQDN list.
+
+    Returns:
+        dict[str, CertificateStatus]:
+            Reported certificates keyed by FQDN, unusable ones first
+            and then in order of expiry.
+
+    """
+    institutions = load_institutions(**kwargs)
+
+    if not institutions:
+        logger.warning("No institutions found to report certificates for.")
+        return {}
+
+    now = datetime.now(UTC)
+    deadline = now + timedelta(seconds=config.CERT_EXPIRY_WARNING)
+    reported = sorted(
+        (
+            (institution.fqdn, status)
+            for institution, status in zip(
+                institutions, preflight_certificates(institutions), strict=True
+            )
+            if status is not None
+            and (
+                status.problem(now) is not None
+                or (status.not_after is not None and status.not_after <= deadline)
+            )
+        ),
+        key=lambda item: (
+            item[1].problem(now) is None,
+            item[1].not_after or datetime.min.replace(tzinfo=UTC),
+        ),
+    )
+
+    unusable = sum(status.problem(now) is not None for _, status in reported)
+    logger.info(
+        "Checked certificates of %(total)d institution(s): "
+        "%(unusable)d unusable, %(expiring)d expiring soon.",
+        {
+            "total": len(institutions),
+            "unusable": unusable,
+            "expiring": len(reported) - unusable,
+        },
+    )
+    if reported:
+        console.print(certificates_table(reported, now))
+    return dict(reported)
+
+
+def certificates_table(
+    certificates: list[tuple[str, CertificateStatus]], now: datetime
+) -> Table:
+    """Render checked TLS client certificates as a table.
+
+    Arguments:
+        certificates (list[tuple[str, CertificateStatus]]):
+            FQDNs and the results of their certificates.
+        now (datetime): Current time.
+
+    Returns:
+        Table: Table with a row for each certificate.
+
+    """
+    table = Table(title="TLS client certificates")
+    table.add_column("FQDN")
+    table.add_column("Expires at")
+    table.add_column("Remaining", justify="right")
+    table.add_column("Problem")
+
+    for fqdn, status in certificates:
+        if status.not_after is None:
+            expires_at = remaining = "-"
+        else:
+            expires_at = status.not_after.isoformat()
+            remaining = str(max(status.not_after - now, timedelta()))
+        table.add_row(fqdn, expires_at, remaining, status.problem(now) or "")
+
+    return table
@@ -0,0 +1,126 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Deferred retry module for weko-group-cache-db."""
+
+import heapq
+import itertools
+import threading
+import time
+import typing as t
+
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import backoff
+
+from .config import config
+
+RETRY_AFTER_MAX = 3600
+"""Longest `Retry-After` in seconds that is honored, against broken values."""
+
+
+def retry_delay(attempt: int) -> float:
+    """Return how long to wait before retrying after the given failed attempt.
+
+    The delay follows the same exponential backoff with full jitter
+    as inline retries, configured by `REQUEST_RETRY_*` settings.
+
+    Arguments:
+        attempt (int): Number of retries already made, starting from 0.
+
+    Returns:
+        float: Seconds to wait before the next attempt.
+
+    """
+    value = min(
+        config.REQUEST_RETRY_FACTOR * config.REQUEST_RETRY_BASE**attempt,
+        config.REQUEST_RETRY_MAX,
+    )
+    return backoff.full_jitter(value)
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """Parse the value of a `Retry-After` response header.
+
+    Arguments:
+        value (str | None): Delay in seconds or an HTTP date.
+        now (datetime | None): Current time. Defaults to the current UTC time.
+
+    Returns:
+        float | None:
+            Seconds to wait before retrying, up to `RETRY_AFTER_MAX`,
+            or None if the value is missing or invalid.
+
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(min(int(value), RETRY_AFTER_MAX))
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except TypeError, ValueError:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    delay = (retry_at - (now or datetime.now(UTC))).total_seconds()
+    return min(max(0.0, delay), RETRY_AFTER_MAX)
+
+
+class RetryQueue[T]:
+    """Thread-safe queue of items to retry, ordered by their not-before time."""
+
+    def __init__(self, *, clock: t.Callable[[], float] = time.monotonic) -> None:
+        """Initialize the retry queue.
+
+        Args:
+            clock (Callable[[], float]): Monotonic clock in seconds.
+
+        """
+        self._clock = clock
+        self._heap: list[tuple[float, int, T]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._heap)
+
+    def push(self, item: T, delay: float) -> None:
+        """Schedule an item to be retried after the given delay.
+
+        Arguments:
+            item (T): Item to retry.
+            delay (float): Seconds to wait before the item may be retried.
+
+        """
+        with self._lock:
+            not_before = self._clock() + delay
+            heapq.heappush(self._heap, (not_before, next(self._counter), item))
+
+    def pop_due(self) -> T | None:
+        """Take the earliest item whose not-before time has passed.
+
+        Returns:
+            T | None: The item, or None if no item is due yet.
+
+        """
+        with self._lock:
+            if not self._heap or self._heap[0][0] > self._clock():
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def delay(self) -> float | None:
+        """Return how long until the earliest item is due.
+
+        Returns:
+            float | None: Seconds until the earliest item is due,
+                or None if the queue is empty.
+
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self._clock())
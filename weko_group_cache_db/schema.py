@@ -0,0 +1,27 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""Schema module of mAP groups API responses for the `msgspec` decoder.
+
+This module requires `msgspec`, so it is imported only by the decoder.
+"""
+
+import typing as t
+
+import msgspec
+
+
+class Group(msgspec.Struct):
+    """Entry of a SCIM list response, with only its ID."""
+
+    id: str | None = None
+
+
+class GroupListResponse(msgspec.Struct, rename="camel"):
+    """SCIM list response, with only its entries and pagination."""
+
+    entry: list[Group] = msgspec.field(default_factory=list)
+    total_results: t.Any = None
+    start_index: t.Any = None
+    items_per_page: t.Any = None
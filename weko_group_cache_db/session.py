@@ -0,0 +1,600 @@
+#
+# Copyright (C) 2025 National Institute of Informatics.
+#
+
+"""HTTP session pool module for weko-group-cache-db."""
+
+import asyncio
+import contextlib
+import functools
+import ssl
+import threading
+import time
+import typing as t
+
+from contextvars import ContextVar
+from pathlib import Path
+
+import httpx
+import requests
+
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from werkzeug.local import LocalProxy
+
+from .concurrency import concurrency_bounds
+from .config import config
+
+if t.TYPE_CHECKING:
+    import socket  # pragma: no cover
+
+    from urllib3 import HTTPSConnectionPool, PoolManager  # pragma: no cover
+
+type SessionKey = tuple[str, str]
+"""Pair of client certificate path and client key path."""
+
+type FileStamp = tuple[int, int]
+"""Modification time in nanoseconds and size of a file."""
+
+SSL_CONTEXT_CACHE_SIZE = 256
+"""Maximum number of SSL contexts kept loaded for client certificates."""
+
+
+class SessionPool[S]:
+    """Thread-safe pool of HTTP sessions keyed by client certificate and key.
+
+    Sessions are reused across retries and across institutions sharing a
+    certificate, so connections and TLS sessions survive between requests.
+    The least recently used session is closed when more than `size` sessions
+    are open, and sessions unused for `idle_timeout` seconds are closed
+    the next time the pool is used.
+    A session is also replaced when `revision` of its certificate changes.
+    Sessions taken with `checkout` are never closed while they are in use.
+    One replaced during that time is closed when it is returned.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        factory: t.Callable[[str, str], S],
+        *,
+        close: t.Callable[[S], t.Any],
+        size: int,
+        idle_timeout: float,
+        revision: t.Callable[[str, str], object] | None = None,
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the session pool.
+
+        Args:
+            factory (Callable[[str, str], S]):
+                Function that creates a session for a certificate and key path.
+            close (Callable[[S], Any]): Function that closes an evicted session.
+            size (int): Maximum number of sessions kept open.
+            idle_timeout (float): Seconds after which an unused session is closed.
+            revision (Callable[[str, str], object] | None):
+                Function that returns the revision of a certificate and key path.
+                A session created for another revision is closed and recreated.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+
+        """
+        self.factory = factory
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self.revision = revision
+        self._close = close
+        self._clock = clock
+        self._sessions: dict[SessionKey, tuple[S, float, object]] = {}
+        self._checked_out: dict[int, int] = {}
+        self._retired: dict[int, S] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._sessions)
+
+    def __enter__(self) -> t.Self:  # noqa: D105
+        return self
+
+    def __exit__(self, *_: object) -> None:  # noqa: D105
+        self.close()
+
+    def get(self, cert_path: str, key_path: str) -> S:
+        """Return the session for the given client certificate, creating it if needed.
+
+        The session may be closed by the pool once it is idle,
+        so use `checkout` to keep it open while requests are in flight.
+
+        Arguments:
+            cert_path (str): Path to the client certificate.
+            key_path (str): Path to the client key.
+
+        Returns:
+            S: Session that presents the client certificate.
+
+        """
+        return self._take(cert_path, key_path, checkout=False)
+
+    @contextlib.contextmanager
+    def checkout(self, cert_path: str, key_path: str) -> t.Iterator[S]:
+        """Check out the session for the given client certificate while it is in use.
+
+        The session is not closed as idle or least recently used until
+        it is returned, and its idle time starts when it is returned.
+
+        Arguments:
+            cert_path (str): Path to the client certificate.
+            key_path (str): Path to the client key.
+
+        Yields:
+            S: Session that presents the client certificate.
+
+        """
+        session = self._take(cert_path, key_path, checkout=True)
+        try:
+            yield session
+        finally:
+            self._return(cert_path, key_path, session)
+
+    def _take(self, cert_path: str, key_path: str, *, checkout: bool) -> S:
+        key = (cert_path, key_path)
+        revision = self.revision(cert_path, key_path) if self.revision else None
+        with self._lock:
+            now = self._clock()
+            evicted = [
+                self._sessions.pop(idle)[0]
+                for idle, (session, used_at, _) in list(self._sessions.items())
+                if idle != key
+                and id(session) not in self._checked_out
+                and now - used_at >= self.idle_timeout
+            ]
+
+            # re-insert the entry so that the dict stays in LRU order
+            entry = self._sessions.pop(key, None)
+            if entry is not None and entry[2] is not revision:
+                self._retire(entry[0], evicted)
+                entry = None
+            session = self.factory(cert_path, key_path) if entry is None else entry[0]
+            self._sessions[key] = (session, now, revision)
+            if checkout:
+                self._checked_out[id(session)] = (
+                    self._checked_out.get(id(session), 0) + 1
+                )
+
+            # sessions in use are skipped, so the pool may stay over `size`
+            # until they are returned
+            unused = [
+                lru
+                for lru, (lru_session, _, _) in self._sessions.items()
+                if lru != key and id(lru_session) not in self._checked_out
+            ]
+            excess = len(self._sessions) - self.size
+            evicted.extend(
+                self._sessions.pop(lru)[0] for lru in unused[: max(0, excess)]
+            )
+
+        for stale in evicted:
+            self._close(stale)
+        return session
+
+    def _return(self, cert_path: str, key_path: str, session: S) -> None:
+        key = (cert_path, key_path)
+        with self._lock:
+            count = self._checked_out.pop(id(session)) - 1
+            if count:
+                self._checked_out[id(session)] = count
+                return
+            retired = self._retired.pop(id(session), None)
+            entry = self._sessions.get(key)
+            if entry is not None and entry[0] is session:
+                # the session has just been used, so it moves to the MRU end
+                del self._sessions[key]
+                self._sessions[key] = (session, self._clock(), entry[2])
+
+        if retired is not None:
+            self._close(retired)
+
+    def _retire(self, session: S, evicted: list[S]) -> None:
+        if id(session) in self._checked_out:
+            self._retired[id(session)] = session
+        else:
+            evicted.append(session)
+
+    def close(self) -> None:
+        """Close all sessions in the pool."""
+        with self._lock:
+            sessions = [session for session, _, _ in self._sessions.values()]
+            sessions.extend(self._retired.values())
+            self._sessions.clear()
+            self._retired.clear()
+
+        for session in sessions:
+            self._close(session)
+
+
+class ResumingSSLSocket(ssl.SSLSocket):
+    """SSL socket that saves its TLS session to its context when closed."""
+
+    def close(self) -> None:  # noqa: D102
+        if isinstance(self.context, ResumingSSLContext):
+            self.context.save_session(self.server_hostname, self.session)
+        super().close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSL context that resumes the last TLS session with each server.
+
+    A TLS session can only be resumed by the context that established it,
+    so the context keeps the last session with each server and offers it
+    to the next handshake, which then skips the certificate exchange
+    and the signature with the client key.
+    With TLS 1.3, the session ticket arrives after the handshake,
+    so the session is taken when a connection is closed or reused.
+    """
+
+    sslsocket_class = ResumingSSLSocket
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT) -> None:  # noqa: ARG002
+        """Initialize the context.
+
+        Args:
+            protocol (int): TLS protocol, which is consumed by `ssl.SSLContext`.
+
+        """
+        self._connections: dict[str | bytes | None, ssl.SSLSocket | ssl.SSLObject] = {}
+        self._sessions: dict[str | bytes | None, ssl.SSLSession] = {}
+        self._resume_lock = threading.Lock()
+
+    def wrap_socket(  # noqa: D102, PLR0913, PLR0917
+        self,
+        sock: socket.socket,
+        server_side: bool = False,  # noqa: FBT001, FBT002
+        do_handshake_on_connect: bool = True,  # noqa: FBT001, FBT002
+        suppress_ragged_eofs: bool = True,  # noqa: FBT001, FBT002
+        server_hostname: str | bytes | None = None,
+        session: ssl.SSLSession | None = None,
+    ) -> ssl.SSLSocket:
+        wrapped = super().wrap_socket(
+            sock,
+            server_side,
+            do_handshake_on_connect,
+            suppress_ragged_eofs,
+            server_hostname,
+            session or self.last_session(server_hostname),
+        )
+        self._remember(server_hostname, wrapped)
+        return wrapped
+
+    def wrap_bio(  # noqa: D102
+        self,
+        incoming: ssl.MemoryBIO,
+        outgoing: ssl.MemoryBIO,
+        server_side: bool = False,  # noqa: FBT001, FBT002
+        server_hostname: str | bytes | None = None,
+        session: ssl.SSLSession | None = None,
+    ) -> ssl.SSLObject:
+        wrapped = super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side,
+            server_hostname,
+            session or self.last_session(server_hostname),
+        )
+        self._remember(server_hostname, wrapped)
+        return wrapped
+
+    def last_session(
+        self, server_hostname: str | bytes | None
+    ) -> ssl.SSLSession | None:
+        """Return the last TLS session established with the given server.
+
+        Arguments:
+            server_hostname (str | bytes | None): Host name of the server.
+
+        Returns:
+            ssl.SSLSession | None: The session, or None if there is none.
+
+        """
+        with self._resume_lock:
+            connection = self._connections.get(server_hostname)
+        if connection is not None:
+            self.save_session(server_hostname, connection.session)
+        return self._sessions.get(server_hostname)
+
+    def save_session(
+        self, server_hostname: str | bytes | None, session: ssl.SSLSession | None
+    ) -> None:
+        """Keep a TLS session established with the given server for resumption.
+
+        A session without a ticket does not replace one with a ticket,
+        since it cannot be resumed with TLS 1.3.
+
+        Arguments:
+            server_hostname (str | bytes | None): Host name of the server.
+            session (ssl.SSLSession | None): The session, ignored if None.
+
+        """
+        with self._resume_lock:
+            if session is not None and (
+                session.has_ticket or server_hostname not in self._sessions
+            ):
+                self._sessions[server_hostname] = session
+
+    def _remember(
+        self,
+        server_hostname: str | bytes | None,
+        connection: ssl.SSLSocket | ssl.SSLObject,
+    ) -> None:
+        if not connection.server_side:
+            with self._resume_lock:
+                self._connections[server_hostname] = connection
+
+
+def file_stamp(path: str) -> FileStamp:
+    """Return the modification time and size of a file.
+
+    Arguments:
+        path (str): Path to the file.
+
+    Returns:
+        FileStamp: Modification time in nanoseconds and size of the file.
+
+    Raises:
+        OSError: If the file cannot be stat'ed.
+
+    """  # noqa: DOC502
+    stat = Path(path).stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_ssl_context(cert_path: str, key_path: str) -> ssl.SSLContext:
+    """Return the SSL context that presents the given client certificate.
+
+    Contexts are cached by the modification times and sizes of the files,
+    so an unchanged certificate is not read from disk or parsed again,
+    and a renewed one is loaded into a new context.
+
+    Arguments:
+        cert_path (str): Path to the client certificate.
+        key_path (str): Path to the client key.
+
+    Returns:
+        ssl.SSLContext:
+            Context that verifies servers with the CA bundle of requests
+            and resumes TLS sessions with them.
+
+    Raises:
+        OSError: If the certificate or the key cannot be read.
+        ssl.SSLError: If the certificate or the key cannot be loaded.
+
+    """  # noqa: DOC502
+    return cached_ssl_context(
+        cert_path, key_path, file_stamp(cert_path), file_stamp(key_path)
+    )
+
+
+@functools.lru_cache(maxsize=SSL_CONTEXT_CACHE_SIZE)
+def cached_ssl_context(
+    cert_path: str,
+    key_path: str,
+    cert_stamp: FileStamp,  # noqa: ARG001
+    key_stamp: FileStamp,  # noqa: ARG001
+) -> ssl.SSLContext:
+    """Load the SSL context of `load_ssl_context` for the given file stamps.
+
+    Arguments:
+        cert_path (str): Path to the client certificate.
+        key_path (str): Path to the client key.
+        cert_stamp (FileStamp): Stamp of the certificate, part of the cache key.
+        key_stamp (FileStamp): Stamp of the key, part of the cache key.
+
+    Returns:
+        ssl.SSLContext: Context that presents the client certificate.
+
+    Raises:
+        OSError: If the certificate or the key cannot be read.
+        ssl.SSLError: If the certificate or the key cannot be loaded.
+
+    """  # noqa: DOC502
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_verify_locations(DEFAULT_CA_BUNDLE_PATH)
+    # an encrypted key fails instead of prompting for its password
+    context.load_cert_chain(cert_path, key_path, password=b"")
+    return context
+
+
+class ClientCertAdapter(HTTPAdapter):
+    """HTTP adapter that presents a client certificate with a loaded SSL context.
+
+    urllib3 loads the certificate, the key and the CA bundle from their paths
+    for every new connection, so the adapter passes them in `ssl_context`
+    instead of the paths.
+    """
+
+    def __init__(
+        self,
+        ssl_context: ssl.SSLContext,
+        *,
+        pool_connections: int = DEFAULT_POOLSIZE,
+        pool_maxsize: int = DEFAULT_POOLSIZE,
+    ) -> None:
+        """Initialize the adapter.
+
+        Args:
+            ssl_context (ssl.SSLContext): Context with the client certificate.
+            pool_connections (int): Number of connection pools to cache.
+            pool_maxsize (int): Maximum number of connections in each pool.
+
+        """
+        self.ssl_context = ssl_context
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def init_poolmanager(  # noqa: D102
+        self,
+        connections: int,
+        maxsize: int,
+        block: bool = DEFAULT_POOLBLOCK,  # noqa: FBT001
+        **pool_kwargs: object,
+    ) -> None:
+        super().init_poolmanager(
+            connections, maxsize, block, ssl_context=self.ssl_context, **pool_kwargs
+        )
+
+    def proxy_manager_for(  # noqa: D102
+        self, proxy: str, **proxy_kwargs: object
+    ) -> PoolManager:
+        return super().proxy_manager_for(
+            proxy, ssl_context=self.ssl_context, **proxy_kwargs
+        )
+
+    def cert_verify(  # noqa: D102
+        self,
+        conn: HTTPSConnectionPool,
+        url: str,
+        verify: bool | str,  # noqa: FBT001
+        cert: str | tuple[str, str] | None,
+    ) -> None:
+        super().cert_verify(conn, url, verify, cert)
+        if verify is True:
+            # the default CA bundle is already loaded into the context
+            conn.ca_certs = conn.ca_cert_dir = None
+
+
+def connection_limit() -> int:
+    """Return the number of connections kept open by each session.
+
+    Up to the highest fetch concurrency, each fetch worker may send
+    `PAGE_CONCURRENCY` requests at once for the pages of an institution
+    when `PAGE_SIZE` is set.
+
+    Returns:
+        int: Maximum number of connections per session.
+
+    """
+    pages = max(1, config.PAGE_CONCURRENCY) if config.PAGE_SIZE > 0 else 1
+    return concurrency_bounds()[2] * pages
+
+
+def create_session(cert_path: str, key_path: str) -> requests.Session:
+    """Create a session that presents the given client certificate.
+
+    Arguments:
+        cert_path (str): Path to the client certificate.
+        key_path (str): Path to the client key.
+
+    Returns:
+        requests.Session: Session with a connection pool sized for the workers.
+
+    """
+    session = requests.Session()
+    session.mount(
+        "https://",
+        ClientCertAdapter(
+            load_ssl_context(cert_path, key_path),
+            pool_connections=1,
+            pool_maxsize=connection_limit(),
+        ),
+    )
+    return session
+
+
+def create_async_client(cert_path: str, key_path: str) -> httpx.AsyncClient:
+    """Create an asyncio client that presents the given client certificate.
+
+    Arguments:
+        cert_path (str): Path to the client certificate.
+        key_path (str): Path to the client key.
+
+    Returns:
+        httpx.AsyncClient: Client with a connection pool sized for the workers.
+
+    """
+    return httpx.AsyncClient(
+        verify=load_ssl_context(cert_path, key_path),
+        timeout=config.REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_connections=connection_limit()),
+    )
+
+
+_current_session_pool: ContextVar[SessionPool[requests.Session]] = ContextVar(
+    "current_session_pool"
+)
+_current_async_session_pool: ContextVar[SessionPool[httpx.AsyncClient]] = ContextVar(
+    "current_async_session_pool"
+)
+_closing_clients: set[asyncio.Task[None]] = set()
+
+
+def setup_session_pool() -> SessionPool[requests.Session]:
+    """Initialize the pool of sessions for mAP API requests from the config.
+
+    Returns:
+        SessionPool[requests.Session]: The pool shared by every request in this context.
+
+    """
+    pool = SessionPool(
+        create_session,
+        close=requests.Session.close,
+        size=config.SESSION_POOL_SIZE,
+        idle_timeout=config.SESSION_IDLE_TIMEOUT,
+        revision=load_ssl_context,
+    )
+    _current_session_pool.set(pool)
+    return pool
+
+
+def setup_async_session_pool() -> SessionPool[httpx.AsyncClient]:
+    """Initialize the pool of asyncio clients for mAP API requests from the config.
+
+    Evicted clients are closed in the background on the running event loop.
+
+    Returns:
+        SessionPool[httpx.AsyncClient]:
+            The pool shared by every request in this context.
+
+    """
+    pool = SessionPool(
+        create_async_client,
+        close=_close_async_client,
+        size=config.SESSION_POOL_SIZE,
+        idle_timeout=config.SESSION_IDLE_TIMEOUT,
+        revision=load_ssl_context,
+    )
+    _current_async_session_pool.set(pool)
+    return pool
+
+
+async def close_async_session_pool(pool: SessionPool[httpx.AsyncClient]) -> None:
+    """Close all clients in the pool and wait until they are closed.
+
+    Arguments:
+        pool (SessionPool[httpx.AsyncClient]): The pool to close.
+
+    """
+    pool.close()
+    await asyncio.gather(*_closing_clients)
+
+
+def _close_async_client(client: httpx.AsyncClient) -> None:
+    task = asyncio.get_running_loop().create_task(client.aclose())
+    _closing_clients.add(task)
+    task.add_done_callback(_closing_clients.discard)
+
+
+def _current_or_setup[S](
+    current: ContextVar[SessionPool[S]], setup: t.Callable[[], SessionPool[S]]
+) -> SessionPool[S]:
+    # an empty pool is falsy, so it must not be replaced by `or`
+    pool = current.get(None)
+    return pool if pool is not None else setup()
+
+
+session_pool = t.cast(
+    SessionPool[requests.Session],
+    LocalProxy(lambda: _current_or_setup(_current_session_pool, setup_session_pool)),
+)
+
+async_session_pool = t.cast(
+    SessionPool[httpx.AsyncClient],
+    LocalProxy(
+        lambda: _current_or_setup(_current_async_session_pool, setup_async_session_pool)
+    ),
+)